@@ -0,0 +1,71 @@
+"""Indices compuestos para las consultas frecuentes y version de contadores.
+
+Idempotente: sirve tanto para BD creadas con create_tables() como para BD
+anteriores a estos indices.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# (nombre, tabla, columnas, unico)
+INDICES = [
+    ("ix_justificantes_empleado_tipo_fecha", "justificantes", ["empleado_id", "tipo", "fecha_inicio"], False),
+    ("ix_prestaciones_empleado_tipo_fechas", "prestaciones", ["empleado_id", "tipo", "fecha_inicio", "fecha_fin"], False),
+    ("ix_notificaciones_usuario_leida_fecha", "notificaciones", ["usuario_id", "leida", "created_at"], False),
+    ("uq_contadores_empleado_anio", "contadores", ["empleado_id", "anio"], True),
+    ("ix_adeudos_empleado_estado", "adeudos", ["empleado_id", "estado"], False),
+    ("ix_documentos_empleado_estado", "documentos", ["empleado_id", "estado"], False),
+    ("ix_users_empleado_id", "users", ["empleado_id"], False),
+    ("ix_users_role_active", "users", ["role", "active"], False),
+]
+
+
+def _es_restriccion_unica(inspector, tabla, columnas) -> bool:
+    # En BD nuevas la restriccion unica ya viene en el CREATE TABLE
+    return any(r["column_names"] == columnas for r in inspector.get_unique_constraints(tabla))
+
+
+def _revisar_contadores_duplicados():
+    # La restriccion unica no se puede crear si ya hay contadores duplicados
+    duplicados = op.get_bind().execute(sa.text(
+        "SELECT empleado_id, anio, COUNT(*) FROM contadores "
+        "GROUP BY empleado_id, anio HAVING COUNT(*) > 1"
+    )).all()
+    if duplicados:
+        detalle = ", ".join(f"empleado_id={e} anio={a} ({n} filas)" for e, a, n in duplicados)
+        raise RuntimeError(f"Hay contadores duplicados; unificarlos antes de migrar: {detalle}")
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    columnas = {c["name"] for c in inspector.get_columns("contadores")}
+    if "version" not in columnas:
+        with op.batch_alter_table("contadores") as batch:
+            batch.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+    for nombre, tabla, columnas, unico in INDICES:
+        if unico and _es_restriccion_unica(inspector, tabla, columnas):
+            continue
+        if nombre == "uq_contadores_empleado_anio":
+            _revisar_contadores_duplicados()
+        op.create_index(nombre, tabla, columnas, unique=unico, if_not_exists=True)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    # La columna contadores.version se conserva: otras partes del codigo dependen de ella
+    for nombre, tabla, columnas, unico in reversed(INDICES):
+        # La restriccion del CREATE TABLE no la creo esta migracion (en PostgreSQL
+        # su indice tiene el mismo nombre y no se puede borrar con DROP INDEX)
+        if unico and _es_restriccion_unica(inspector, tabla, columnas):
+            continue
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
@@ -0,0 +1,34 @@
+"""Tabla eventos_notificacion (avisos SSE entre workers).
+
+Idempotente: create_tables() ya la crea en BD nuevas.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "eventos_notificacion" in inspector.get_table_names():
+        return
+    op.create_table(
+        "eventos_notificacion",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("origen", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_eventos_notificacion_created_at", "eventos_notificacion", ["created_at"])
+
+
+def downgrade():
+    op.drop_index("ix_eventos_notificacion_created_at", table_name="eventos_notificacion", if_exists=True)
+    op.drop_table("eventos_notificacion")
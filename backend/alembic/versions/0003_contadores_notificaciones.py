@@ -0,0 +1,33 @@
+"""Tabla contadores_notificaciones (total y no leidas por usuario).
+
+Idempotente: create_tables() ya la crea en BD nuevas. No hace falta llenarla:
+el contador de cada usuario se crea con su siguiente notificacion (mientras
+tanto /conteo lo calcula desde notificaciones).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "contadores_notificaciones" in inspector.get_table_names():
+        return
+    op.create_table(
+        "contadores_notificaciones",
+        sa.Column("usuario_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("no_leidas", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("contadores_notificaciones")
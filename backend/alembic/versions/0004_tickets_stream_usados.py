@@ -0,0 +1,32 @@
+"""Tabla tickets_stream_usados (tickets de un solo uso del stream SSE).
+
+Idempotente: create_tables() ya la crea en BD nuevas.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if "tickets_stream_usados" in inspector.get_table_names():
+        return
+    op.create_table(
+        "tickets_stream_usados",
+        sa.Column("jti", sa.String(), primary_key=True),
+        sa.Column("expira", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_tickets_stream_usados_expira", "tickets_stream_usados", ["expira"])
+
+
+def downgrade():
+    op.drop_index("ix_tickets_stream_usados_expira", table_name="tickets_stream_usados", if_exists=True)
+    op.drop_table("tickets_stream_usados")
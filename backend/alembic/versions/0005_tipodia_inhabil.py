@@ -0,0 +1,28 @@
+"""Valor INHABIL en el enum tipodia de calendario_laboral.
+
+Idempotente: ADD VALUE IF NOT EXISTS no falla si create_tables() ya lo creo.
+En SQLite el Enum se guarda como VARCHAR y no hay nada que cambiar.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # ALTER TYPE ... ADD VALUE no puede ir dentro de una transaccion en PostgreSQL < 12
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE tipodia ADD VALUE IF NOT EXISTS 'INHABIL'")
+
+
+def downgrade():
+    # PostgreSQL no permite quitar valores de un enum; las filas INHABIL se conservan
+    pass
@@ -1,15 +1,102 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from .config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False},  # Solo para SQLite
-)
+
+def _sqlite_en_memoria(url: str) -> bool:
+    return ":memory:" in url or url == "sqlite://"
+
+
+ES_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+ES_SQLITE_MEMORIA = ES_SQLITE and _sqlite_en_memoria(settings.DATABASE_URL)
+ES_POSTGRES = settings.DATABASE_URL.startswith("postgresql")
+
+
+def _pragmas_sqlite() -> dict:
+    """PRAGMAs que se aplican a cada conexion nueva segun DB_PERFIL."""
+    pragmas = {"busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS}
+    if settings.DB_PERFIL == "produccion":
+        pragmas.update({
+            "journal_mode": settings.SQLITE_JOURNAL_MODE,
+            "synchronous": settings.SQLITE_SYNCHRONOUS,
+            "mmap_size": settings.SQLITE_MMAP_SIZE,
+            "cache_size": settings.SQLITE_CACHE_SIZE,
+            "temp_store": settings.SQLITE_TEMP_STORE,
+        })
+    return pragmas
+
+
+def _url_async(url: str) -> str:
+    """URL equivalente con driver asincrono (aiosqlite / asyncpg)."""
+    driver, resto = url.split("://", 1)
+    if driver.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{resto}"
+    if driver.startswith("postgresql"):
+        return f"postgresql+asyncpg://{resto}"
+    return url
+
+
+def _aplicar_pragmas_sqlite(motor):
+    pragmas = _pragmas_sqlite()
+
+    @event.listens_for(motor, "connect")
+    def _aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nombre, valor in pragmas.items():
+            cursor.execute(f"PRAGMA {nombre}={valor}")
+        cursor.close()
+
+
+def _opciones_engine(url: str = settings.DATABASE_URL) -> dict:
+    """Argumentos de create_engine segun el dialecto de la URL."""
+    pool = {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+    if url.startswith("postgresql"):
+        # QueuePool de psycopg2/asyncpg; pre_ping descarta conexiones cortadas por el servidor
+        return {
+            **pool,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+        }
+    if not url.startswith("sqlite"):
+        return pool
+    opciones = {"connect_args": {"check_same_thread": False}}  # Solo para SQLite
+    if not _sqlite_en_memoria(url):
+        # Archivo: un pool por proceso; cada worker de uvicorn tiene el suyo
+        opciones.update(pool)
+    return opciones
+
+
+def _crear_engine():
+    motor = create_engine(settings.DATABASE_URL, **_opciones_engine())
+    if ES_SQLITE:
+        _aplicar_pragmas_sqlite(motor)
+    return motor
+
+
+def _crear_engine_async():
+    opciones = _opciones_engine()
+    if ES_SQLITE and not ES_SQLITE_MEMORIA:
+        # aiosqlite usa NullPool por defecto: mantener el mismo pool que el motor sincrono
+        opciones["poolclass"] = AsyncAdaptedQueuePool
+    motor = create_async_engine(_url_async(settings.DATABASE_URL), **opciones)
+    if ES_SQLITE:
+        _aplicar_pragmas_sqlite(motor.sync_engine)
+    return motor
+
+
+engine = _crear_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Motor asincrono para rutas de E/S (listados, reportes, notificaciones).
+# expire_on_commit=False: en async no se puede recargar un atributo de forma implicita
+async_engine = _crear_engine_async()
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -22,6 +109,56 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency para obtener sesion asincrona de DB."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def abrir_transaccion(db: Session):
+    """Emite el BEGIN de la transaccion de la sesion si aun no se emitio.
+
+    pysqlite solo lo emite antes de INSERT/UPDATE/DELETE: un SAVEPOINT
+    (begin_nested) antes de esas sentencias abre su propia transaccion y su
+    RELEASE la confirma, aunque la sesion haga rollback despues. Llamar
+    antes de begin_nested() en SQLite; en otros dialectos no hace nada.
+    """
+    if ES_SQLITE:
+        conexion = db.connection()
+        dbapi = conexion.connection.dbapi_connection
+        # Sesion asincrona (run_sync): el adaptador envuelve la conexion de aiosqlite
+        dbapi = getattr(dbapi, "_connection", dbapi)
+        if not dbapi.in_transaction:
+            conexion.exec_driver_sql("BEGIN")
+
+
 def create_tables():
-    """Crear todas las tablas."""
+    """Crear todas las tablas y los indices que falten en tablas ya existentes."""
     Base.metadata.create_all(bind=engine)
+    # create_all no agrega indices nuevos a tablas que ya existian
+    for tabla in Base.metadata.sorted_tables:
+        for indice in tabla.indexes:
+            indice.create(bind=engine, checkfirst=True)
+
+
+def configuracion_efectiva() -> dict:
+    """Valores reales de la conexion (para /health)."""
+    info = {
+        "dialecto": engine.dialect.name,
+        "perfil": settings.DB_PERFIL,
+        "pool": {"clase": type(engine.pool).__name__, "estado": engine.pool.status()},
+        "pool_async": {"clase": type(async_engine.pool).__name__, "estado": async_engine.pool.status()},
+    }
+    if ES_SQLITE:
+        with engine.connect() as conn:
+            info["pragmas"] = {
+                nombre: conn.exec_driver_sql(f"PRAGMA {nombre}").scalar()
+                for nombre in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size", "temp_store")
+            }
+    elif ES_POSTGRES:
+        with engine.connect() as conn:
+            info["servidor"] = {
+                nombre: conn.exec_driver_sql(f"SHOW {nombre}").scalar()
+                for nombre in ("server_version", "max_connections")
+            }
+    return info
@@ -1,17 +1,53 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from .config import settings
-from .database import create_tables
-from .routes import adeudos, auth, documentos, empleados, justificantes, notificaciones, prestaciones, reportes
+from .database import SessionLocal, async_engine, configuracion_efectiva, create_tables
+from .routes import (
+    adeudos,
+    auth,
+    calendario,
+    documentos,
+    empleados,
+    justificantes,
+    notificaciones,
+    prestaciones,
+    reportes,
+)
+from .services.auditoria_service import escritor_auditoria
+from .services.calendario_service import calendario_service
+from .services.notificaciones_canal import backend_notificaciones, canal_notificaciones
+from .services.principales_cache import cache_principales
+from .services.validaciones_cache import cache_validaciones
+from .utils.dependencies import Principal, get_current_admin_user
 
 # Crear tablas al iniciar
 create_tables()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cargar ajustes del calendario laboral en memoria (una sola lectura)
+    db = SessionLocal()
+    try:
+        calendario_service.cargar_desde_db(db)
+    finally:
+        db.close()
+    await backend_notificaciones.iniciar()
+    yield
+    await backend_notificaciones.detener()
+    # Escribir la auditoria pendiente antes de cerrar las conexiones
+    escritor_auditoria.detener()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
+    lifespan=lifespan,
 )
 
 # CORS
@@ -32,6 +68,7 @@ app.include_router(documentos.router, prefix="/api/documentos", tags=["documento
 app.include_router(adeudos.router, prefix="/api/adeudos", tags=["adeudos"])
 app.include_router(notificaciones.router, prefix="/api/notificaciones", tags=["notificaciones"])
 app.include_router(reportes.router, prefix="/api/reportes", tags=["reportes"])
+app.include_router(calendario.router, prefix="/api/calendario", tags=["calendario"])
 
 
 @app.get("/")
@@ -45,4 +82,18 @@ def read_root():
 
 @app.get("/health")
 def health_check():
+    """Sonda publica: solo indica que el proceso responde (no consulta la BD)."""
     return {"status": "healthy"}
+
+
+@app.get("/health/detalle")
+def health_detalle(current_user: Principal = Depends(get_current_admin_user)):
+    """Configuracion efectiva de la BD y estadisticas de caches (solo admins)."""
+    return {
+        "status": "healthy",
+        "base_de_datos": configuracion_efectiva(),
+        "cache_validaciones": cache_validaciones.estadisticas(),
+        "cache_principales": cache_principales.estadisticas(),
+        "auditoria": escritor_auditoria.estadisticas(),
+        "notificaciones_stream": {"backend": backend_notificaciones.nombre, **canal_notificaciones.estadisticas()},
+    }
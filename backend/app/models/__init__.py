@@ -4,8 +4,8 @@ from .justificante import Justificante, TipoJustificante, EstadoJustificante
 from .prestacion import Prestacion, TipoPrestacion, EstadoPrestacion
 from .documento import Documento, EstadoDocumento, OrigenSolicitud
 from .adeudo import Adeudo, EstadoAdeudo
-from .notificacion import Notificacion
-from .contador import Contador
+from .notificacion import ContadorNotificaciones, EventoNotificacion, Notificacion, TicketStreamUsado
+from .contador import Contador, ContadorQuincena
 from .audit_log import AuditLog
 from .calendario_laboral import CalendarioLaboral, TipoDia
 
@@ -16,8 +16,8 @@ __all__ = [
     "Prestacion", "TipoPrestacion", "EstadoPrestacion",
     "Documento", "EstadoDocumento", "OrigenSolicitud",
     "Adeudo", "EstadoAdeudo",
-    "Notificacion",
-    "Contador",
+    "Notificacion", "EventoNotificacion", "ContadorNotificaciones", "TicketStreamUsado",
+    "Contador", "ContadorQuincena",
     "AuditLog",
     "CalendarioLaboral", "TipoDia",
 ]
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Enum as SQLEnum, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, Enum as SQLEnum, ForeignKey, Index, Integer, String, Text
 
 from ..database import Base
 
@@ -19,6 +19,9 @@ class TipoAdeudo(str, enum.Enum):
 
 class Adeudo(Base):
     __tablename__ = "adeudos"
+    __table_args__ = (
+        Index("ix_adeudos_empleado_estado", "empleado_id", "estado"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     empleado_id = Column(Integer, ForeignKey("empleados.id"), nullable=False)
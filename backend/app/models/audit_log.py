@@ -1,8 +1,9 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy import Column, DateTime, Integer, String
 
 from ..database import Base
+from .tipos import JSONTexto
 
 
 class AuditLog(Base):
@@ -14,7 +15,7 @@ class AuditLog(Base):
     accion = Column(String, nullable=False)
     tabla_afectada = Column(String, nullable=True)
     registro_id = Column(Integer, nullable=True)
-    datos_anteriores = Column(Text, nullable=True)  # JSON
-    datos_nuevos = Column(Text, nullable=True)       # JSON
+    datos_anteriores = Column(JSONTexto, nullable=True)
+    datos_nuevos = Column(JSONTexto, nullable=True)
     ip_address = Column(String, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -8,7 +8,8 @@ from ..database import Base
 class TipoDia(str, enum.Enum):
     FESTIVO = "Festivo"
     VACACION = "Vacacion"
-    LABORAL = "Laboral"
+    INHABIL = "Inhabil"    # Dia no laborable extra (sin reglas de festivo)
+    LABORAL = "Laboral"    # Anula un festivo o vacacion por defecto
 
 
 class CalendarioLaboral(Base):
@@ -1,12 +1,15 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, UniqueConstraint
 
 from ..database import Base
 
 
 class Contador(Base):
     __tablename__ = "contadores"
+    __table_args__ = (
+        UniqueConstraint("empleado_id", "anio", name="uq_contadores_empleado_anio"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     empleado_id = Column(Integer, ForeignKey("empleados.id"), nullable=False)
@@ -17,8 +20,10 @@ class Contador(Base):
     solicitudes_economicos = Column(Integer, default=0)
     fecha_ultima_solicitud_economico = Column(Date, nullable=True)
 
-    # Permisos por horas (se trackea por quincena en la logica, aqui el acumulado)
-    permisos_horas_q1 = Column(Integer, default=0)  # Quincena actual
+    # Sin uso: los permisos por horas se cuentan solo en ContadorQuincena y los
+    # totales del anio se calculan de ahi (permisos_horas_del_anio). Se conservan
+    # por compatibilidad con BD existentes; la aplicacion ya no las escribe.
+    permisos_horas_q1 = Column(Integer, default=0)
     permisos_horas_q2 = Column(Integer, default=0)
 
     # Prestaciones
@@ -28,4 +33,21 @@ class Contador(Base):
     # JSON para otras prestaciones flexibles
     otras_prestaciones = Column(String, default="{}")
 
+    # Se incrementa en cada actualizacion (control de concurrencia optimista)
+    version = Column(Integer, nullable=False, default=1)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ContadorQuincena(Base):
+    """Permisos por horas de un empleado en una quincena (clave = empleado, anio, mes, quincena)."""
+    __tablename__ = "contadores_quincena"
+
+    empleado_id = Column(Integer, ForeignKey("empleados.id"), primary_key=True)
+    anio = Column(Integer, primary_key=True)
+    mes = Column(Integer, primary_key=True)
+    quincena = Column(Integer, primary_key=True)  # 1 o 2
+
+    permisos_horas = Column(Integer, nullable=False, default=0)
+
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
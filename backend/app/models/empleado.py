@@ -1,11 +1,37 @@
 import enum
+from calendar import monthrange
 from datetime import date
+from functools import lru_cache
 
 from sqlalchemy import Boolean, Column, Date, Enum as SQLEnum, Integer, String
 
 from ..database import Base
 
 
+# 6 meses + 1 dia de antiguedad para acceder a prestaciones
+MESES_ANTIGUEDAD_MINIMA = 6
+
+
+def meses_de_antiguedad(fecha_ingreso: date, hoy: date) -> int:
+    """Meses completos entre la fecha de ingreso y hoy."""
+    meses = (hoy.year - fecha_ingreso.year) * 12 + hoy.month - fecha_ingreso.month
+    if hoy.day < fecha_ingreso.day:
+        meses -= 1
+    return meses
+
+
+@lru_cache(maxsize=8)
+def fecha_corte_antiguedad(hoy: date) -> date:
+    """Ultima fecha de ingreso que ya cumple la antiguedad minima al dia de hoy.
+
+    meses_de_antiguedad(ingreso, hoy) >= MESES_ANTIGUEDAD_MINIMA sii
+    ingreso <= fecha de corte. Se calcula una vez por dia.
+    """
+    anio, mes = divmod(hoy.year * 12 + hoy.month - 1 - MESES_ANTIGUEDAD_MINIMA, 12)
+    mes += 1
+    return date(anio, mes, min(hoy.day, monthrange(anio, mes)[1]))
+
+
 class TipoEmpleado(str, enum.Enum):
     DOCENTE = "Docente"
     APOYO = "Apoyo y Asistencia"
@@ -48,14 +74,9 @@ class Empleado(Base):
 
     @property
     def antiguedad_meses(self) -> int:
-        hoy = date.today()
-        meses = (hoy.year - self.fecha_ingreso.year) * 12
-        meses += hoy.month - self.fecha_ingreso.month
-        if hoy.day < self.fecha_ingreso.day:
-            meses -= 1
-        return meses
+        return meses_de_antiguedad(self.fecha_ingreso, date.today())
 
     @property
     def cumple_antiguedad_minima(self) -> bool:
-        """6 meses + 1 dia de antiguedad."""
-        return self.antiguedad_meses >= 6
+        """Misma condicion que el filtro SQL de elegibilidad (fecha_ingreso <= corte)."""
+        return self.fecha_ingreso <= fecha_corte_antiguedad(date.today())
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Column, Date, DateTime, Enum as SQLEnum, ForeignKey, Integer, String, Time
+from sqlalchemy import Column, Date, DateTime, Enum as SQLEnum, ForeignKey, Index, Integer, String, Time
 
 from ..database import Base
 
@@ -23,6 +23,9 @@ class EstadoJustificante(str, enum.Enum):
 
 class Justificante(Base):
     __tablename__ = "justificantes"
+    __table_args__ = (
+        Index("ix_justificantes_empleado_tipo_fecha", "empleado_id", "tipo", "fecha_inicio"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     empleado_id = Column(Integer, ForeignKey("empleados.id"), nullable=False)
@@ -1,12 +1,15 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text
 
 from ..database import Base
 
 
 class Notificacion(Base):
     __tablename__ = "notificaciones"
+    __table_args__ = (
+        Index("ix_notificaciones_usuario_leida_fecha", "usuario_id", "leida", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -15,3 +18,33 @@ class Notificacion(Base):
     leida = Column(Boolean, default=False)
     enlace = Column(String, nullable=True)  # URL relativa para navegar al recurso
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class EventoNotificacion(Base):
+    """Aviso entre workers de que cambiaron las notificaciones de un usuario."""
+
+    __tablename__ = "eventos_notificacion"
+
+    id = Column(Integer, primary_key=True)
+    usuario_id = Column(Integer, nullable=False)
+    origen = Column(String, nullable=False)  # Worker que hizo el cambio (ya aviso a sus conexiones)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class TicketStreamUsado(Base):
+    """Tickets del stream SSE ya usados (cada ticket sirve para una sola conexion)."""
+
+    __tablename__ = "tickets_stream_usados"
+
+    jti = Column(String, primary_key=True)
+    expira = Column(DateTime, nullable=False, index=True)  # Despues de esta fecha el ticket ya no es valido
+
+
+class ContadorNotificaciones(Base):
+    """Total y no leidas por usuario; se actualizan al crear y al marcar leidas."""
+
+    __tablename__ = "contadores_notificaciones"
+
+    usuario_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    no_leidas = Column(Integer, nullable=False, default=0)
@@ -1,9 +1,10 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Column, Date, DateTime, Enum as SQLEnum, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, Date, DateTime, Enum as SQLEnum, ForeignKey, Index, Integer, String, Text
 
 from ..database import Base
+from .tipos import JSONTexto
 
 
 class TipoPrestacion(str, enum.Enum):
@@ -24,6 +25,10 @@ class EstadoPrestacion(str, enum.Enum):
 
 class Prestacion(Base):
     __tablename__ = "prestaciones"
+    __table_args__ = (
+        # Consultas de traslape por empleado y tipo
+        Index("ix_prestaciones_empleado_tipo_fechas", "empleado_id", "tipo", "fecha_inicio", "fecha_fin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     empleado_id = Column(Integer, ForeignKey("empleados.id"), nullable=False)
@@ -35,7 +40,7 @@ class Prestacion(Base):
     dias_solicitados = Column(Integer, nullable=True)
 
     motivo = Column(Text, nullable=True)
-    documentos_adjuntos = Column(String, nullable=True)  # JSON: lista de paths
+    documentos_adjuntos = Column(JSONTexto, nullable=True)  # Lista de paths
 
     estado = Column(SQLEnum(EstadoPrestacion), default=EstadoPrestacion.PENDIENTE)
     aprobado_por_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -0,0 +1,32 @@
+import json
+
+from sqlalchemy import Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import TypeDecorator
+
+
+class JSONTexto(TypeDecorator):
+    """JSON guardado como texto; en PostgreSQL se guarda como JSONB.
+
+    El codigo sigue leyendo y escribiendo cadenas JSON (json.dumps / json.loads)
+    en cualquier dialecto; en PostgreSQL la columna se puede consultar con los
+    operadores de JSONB.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(Text())
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and dialect.name == "postgresql":
+            return json.loads(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and dialect.name == "postgresql":
+            return json.dumps(value)
+        return value
@@ -1,7 +1,7 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Enum as SQLEnum, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Enum as SQLEnum, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from ..database import Base
@@ -15,12 +15,16 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Destinatarios de notificaciones a RH (admins activos)
+        Index("ix_users_role_active", "role", "active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
     role = Column(SQLEnum(UserRole), nullable=False)
-    empleado_id = Column(Integer, ForeignKey("empleados.id"), nullable=True)
+    empleado_id = Column(Integer, ForeignKey("empleados.id"), nullable=True, index=True)
 
     active = Column(Boolean, default=True)
     password_changed = Column(Boolean, default=False)
@@ -1,28 +1,30 @@
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_async_db, get_db
 from ..models.adeudo import Adeudo, EstadoAdeudo
 from ..models.empleado import Empleado
 from ..models.user import User
 from ..schemas.adeudo import AdeudoCreate, AdeudoResponse, AdeudoUpdate
 from ..services.notificacion_service import crear_notificacion
-from ..utils.dependencies import get_current_admin_user, get_current_user
+from ..utils.dependencies import Principal, get_current_admin_user, get_current_user_async
 from ..utils.helpers import registrar_auditoria
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[AdeudoResponse])
-def listar_adeudos(
+async def listar_adeudos(
     empleado_id: int = Query(None),
-    estado: str = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    estado: EstadoAdeudo = Query(None),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(Adeudo)
+    query = select(Adeudo)
 
     if current_user.role.value == "USUARIO":
         query = query.filter(Adeudo.empleado_id == current_user.empleado_id)
@@ -32,13 +34,14 @@ def listar_adeudos(
     if estado:
         query = query.filter(Adeudo.estado == estado)
 
-    return query.order_by(Adeudo.fecha_marcado.desc()).all()
+    resultado = await db.execute(query.order_by(Adeudo.fecha_marcado.desc()))
+    return resultado.scalars().all()
 
 
 @router.post("/", response_model=AdeudoResponse)
 def crear_adeudo(
     data: AdeudoCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     empleado = db.query(Empleado).filter(Empleado.id == data.empleado_id).first()
@@ -79,7 +82,7 @@ def crear_adeudo(
 def actualizar_adeudo(
     adeudo_id: int,
     data: AdeudoUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     adeudo = db.query(Adeudo).filter(Adeudo.id == adeudo_id).first()
@@ -119,7 +122,7 @@ def actualizar_adeudo(
 @router.delete("/{adeudo_id}")
 def eliminar_adeudo(
     adeudo_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     adeudo = db.query(Adeudo).filter(Adeudo.id == adeudo_id).first()
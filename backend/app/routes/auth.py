@@ -18,7 +18,12 @@ from ..services.auth_service import (
     reset_password,
     update_last_login,
 )
-from ..utils.dependencies import get_current_admin_user, get_current_root_user, get_current_user
+from ..utils.dependencies import (
+    Principal,
+    get_current_admin_user,
+    get_current_root_user,
+    get_current_user_completo,
+)
 from ..utils.helpers import registrar_auditoria
 from ..utils.security import create_access_token
 
@@ -40,10 +45,11 @@ def login(
         )
 
     access_token = create_access_token(data={"sub": user.username})
-    update_last_login(db, user)
 
+    # El registro del login se confirma en el mismo commit que last_login
     ip = request.client.host if request else None
-    registrar_auditoria(db, user.id, user.username, "login", ip_address=ip)
+    registrar_auditoria(db, user.id, user.username, "login", ip_address=ip, en_transaccion=True)
+    update_last_login(db, user)
 
     return LoginResponse(
         access_token=access_token,
@@ -54,7 +60,7 @@ def login(
 @router.post("/change-password")
 def change_password_endpoint(
     data: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_completo),
     db: Session = Depends(get_db),
 ):
     success = change_password(db, current_user, data.current_password, data.new_password)
@@ -71,7 +77,7 @@ def change_password_endpoint(
 @router.post("/reset-password")
 def reset_password_endpoint(
     data: ResetPasswordRequest,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     user = reset_password(db, data.user_id, data.new_password)
@@ -86,13 +92,13 @@ def reset_password_endpoint(
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: User = Depends(get_current_user_completo)):
     return current_user
 
 
 @router.get("/usuarios", response_model=list[UserResponse])
 def list_users(
-    current_user: User = Depends(get_current_root_user),
+    current_user: Principal = Depends(get_current_root_user),
     db: Session = Depends(get_db),
 ):
     return db.query(User).all()
@@ -101,7 +107,7 @@ def list_users(
 @router.post("/usuarios", response_model=UserResponse)
 def create_user_endpoint(
     data: UserCreate,
-    current_user: User = Depends(get_current_root_user),
+    current_user: Principal = Depends(get_current_root_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -119,7 +125,7 @@ def create_user_endpoint(
 @router.delete("/usuarios/{user_id}")
 def delete_user(
     user_id: int,
-    current_user: User = Depends(get_current_root_user),
+    current_user: Principal = Depends(get_current_root_user),
     db: Session = Depends(get_db),
 ):
     user = db.query(User).filter(User.id == user_id).first()
@@ -129,10 +135,9 @@ def delete_user(
         raise HTTPException(status_code=400, detail="No se puede eliminar al usuario ROOT")
 
     user.active = False
-    db.commit()
-
     registrar_auditoria(
         db, current_user.id, current_user.username,
-        f"desactivo usuario {user.username}", "users", user.id,
+        f"desactivo usuario {user.username}", "users", user.id, en_transaccion=True,
     )
+    db.commit()
     return {"message": f"Usuario {user.username} desactivado"}
@@ -0,0 +1,171 @@
+import hashlib
+from datetime import timedelta
+from functools import lru_cache
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import get_db
+from ..models.calendario_laboral import CalendarioLaboral, TipoDia
+from ..schemas.calendario import (
+    CalendarioMesResponse,
+    DiaCalendarioCreate,
+    DiaCalendarioResponse,
+    DiaCalendarioUpdate,
+    DiaMesResponse,
+)
+from ..services.calendario_service import calendario_service
+from ..utils.dependencies import Principal, get_current_admin_user, get_current_user
+from ..utils.helpers import registrar_auditoria
+from ..validators.dia_economico_validator import motivo_bloqueo_calendario
+
+router = APIRouter()
+
+
+@router.get("/", response_model=list[DiaCalendarioResponse])
+def listar_dias(
+    anio: int = Query(None),
+    tipo: TipoDia = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    query = db.query(CalendarioLaboral)
+    if anio:
+        query = query.filter(CalendarioLaboral.anio == anio)
+    if tipo:
+        query = query.filter(CalendarioLaboral.tipo == tipo)
+    return query.order_by(CalendarioLaboral.fecha).all()
+
+
+@lru_cache(maxsize=64)
+def _calendario_mes(anio: int, mes: int, version: int) -> tuple[CalendarioMesResponse, str]:
+    """Mes calculado y su ETag; ``version`` en la llave descarta meses obsoletos."""
+    dias = []
+    for fecha, estado, laboral in calendario_service.dias_del_mes(anio, mes):
+        motivo = motivo_bloqueo_calendario(fecha)
+        dias.append(DiaMesResponse(
+            fecha=fecha,
+            estado=estado,
+            laboral=laboral,
+            bloqueado_dia_economico=motivo is not None,
+            motivo=motivo,
+        ))
+    datos = CalendarioMesResponse(anio=anio, mes=mes, dias=dias)
+    etag = '"' + hashlib.sha1(datos.model_dump_json().encode()).hexdigest() + '"'
+    return datos, etag
+
+
+@router.get("/{anio}/{mes}", response_model=CalendarioMesResponse)
+def obtener_mes(
+    request: Request,
+    response: Response,
+    anio: int = Path(..., ge=1900, le=2999),
+    mes: int = Path(..., ge=1, le=12),
+    current_user: Principal = Depends(get_current_user),
+):
+    """Estado de cada dia del mes (para sombrear el selector de fechas)."""
+    # La version cambia si otro worker modifico el calendario: ETag y cache nuevos
+    calendario_service.revisar_cambios()
+    datos, etag = _calendario_mes(anio, mes, calendario_service.version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return datos
+
+
+@router.post("/", response_model=list[DiaCalendarioResponse])
+def registrar_dias(
+    data: DiaCalendarioCreate,
+    current_user: Principal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Registra un dia (o un rango con fecha_fin); si la fecha ya existe se actualiza."""
+    fecha_fin = data.fecha_fin or data.fecha
+    if data.fecha > fecha_fin:
+        raise HTTPException(status_code=400, detail="La fecha de inicio debe ser anterior a la fecha de fin")
+    if (fecha_fin - data.fecha).days + 1 > settings.CALENDARIO_MAX_DIAS_RANGO:
+        raise HTTPException(
+            status_code=422,
+            detail=f"El rango no puede exceder {settings.CALENDARIO_MAX_DIAS_RANGO} dias",
+        )
+
+    existentes = {
+        dia.fecha: dia
+        for dia in db.query(CalendarioLaboral).filter(
+            CalendarioLaboral.fecha >= data.fecha, CalendarioLaboral.fecha <= fecha_fin
+        )
+    }
+    dias = []
+    fecha = data.fecha
+    while fecha <= fecha_fin:
+        dia = existentes.get(fecha)
+        if dia is None:
+            dia = CalendarioLaboral(fecha=fecha, anio=fecha.year)
+            db.add(dia)
+        dia.tipo = data.tipo
+        dia.descripcion = data.descripcion
+        dias.append(dia)
+        fecha += timedelta(days=1)
+    db.commit()
+
+    for anio in range(data.fecha.year, fecha_fin.year + 1):
+        calendario_service.recargar_anio(db, anio)
+
+    registrar_auditoria(
+        db, current_user.id, current_user.username,
+        f"registro {len(dias)} dia(s) {data.tipo.value} en calendario laboral",
+        "calendario_laboral", dias[0].id,
+    )
+    return dias
+
+
+@router.put("/{dia_id}", response_model=DiaCalendarioResponse)
+def actualizar_dia(
+    dia_id: int,
+    data: DiaCalendarioUpdate,
+    current_user: Principal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    dia = db.query(CalendarioLaboral).filter(CalendarioLaboral.id == dia_id).first()
+    if not dia:
+        raise HTTPException(status_code=404, detail="Dia no encontrado en el calendario")
+
+    if data.tipo:
+        dia.tipo = data.tipo
+    if data.descripcion is not None:
+        dia.descripcion = data.descripcion
+    db.commit()
+    db.refresh(dia)
+
+    calendario_service.recargar_anio(db, dia.anio)
+
+    registrar_auditoria(
+        db, current_user.id, current_user.username,
+        f"actualizo dia {dia.fecha} del calendario laboral", "calendario_laboral", dia.id,
+    )
+    return dia
+
+
+@router.delete("/{dia_id}")
+def eliminar_dia(
+    dia_id: int,
+    current_user: Principal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    dia = db.query(CalendarioLaboral).filter(CalendarioLaboral.id == dia_id).first()
+    if not dia:
+        raise HTTPException(status_code=404, detail="Dia no encontrado en el calendario")
+
+    fecha, anio = dia.fecha, dia.anio
+    db.delete(dia)
+    db.commit()
+
+    calendario_service.recargar_anio(db, anio)
+
+    registrar_auditoria(
+        db, current_user.id, current_user.username,
+        f"elimino dia {fecha} del calendario laboral", "calendario_laboral", dia_id,
+    )
+    return {"message": f"Dia {fecha} eliminado del calendario laboral"}
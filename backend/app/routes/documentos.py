@@ -1,31 +1,34 @@
 import os
 from datetime import datetime
 
+import aiofiles
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..config import settings
-from ..database import get_db
+from ..database import get_async_db, get_db
 from ..models.documento import Documento, EstadoDocumento, OrigenSolicitud
 from ..models.empleado import Empleado
 from ..models.user import User
 from ..schemas.documento import DocumentoCreate, DocumentoResponse, DocumentoUpdateEstado
-from ..services.notificacion_service import crear_notificacion
-from ..utils.dependencies import get_current_admin_user, get_current_user
+from ..services.notificacion_service import crear_notificacion, notificar_admins
+from ..utils.dependencies import Principal, get_current_admin_user, get_current_user, get_current_user_async
 from ..utils.helpers import registrar_auditoria
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[DocumentoResponse])
-def listar_documentos(
+async def listar_documentos(
     empleado_id: int = Query(None),
-    origen: str = Query(None),
-    estado: str = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    origen: OrigenSolicitud = Query(None),
+    estado: EstadoDocumento = Query(None),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(Documento)
+    query = select(Documento)
 
     if current_user.role.value == "USUARIO":
         query = query.filter(Documento.empleado_id == current_user.empleado_id)
@@ -37,13 +40,14 @@ def listar_documentos(
     if estado:
         query = query.filter(Documento.estado == estado)
 
-    return query.order_by(Documento.created_at.desc()).all()
+    resultado = await db.execute(query.order_by(Documento.created_at.desc()))
+    return resultado.scalars().all()
 
 
 @router.post("/solicitar-a-rh", response_model=DocumentoResponse)
 def solicitar_documento_a_rh(
     data: DocumentoCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """Empleado solicita un documento a RH (constancia laboral, etc.)."""
@@ -58,18 +62,17 @@ def solicitar_documento_a_rh(
         solicitado_por_user_id=current_user.id,
     )
     db.add(documento)
-    db.commit()
-    db.refresh(documento)
+    db.flush()
 
-    # Notificar a admins
+    # Notificar a admins (mismo commit que el documento)
     empleado = db.query(Empleado).filter(Empleado.id == current_user.empleado_id).first()
-    admins = db.query(User).filter(User.role.in_(["ROOT", "ADMIN"]), User.active == True).all()
-    for admin in admins:
-        crear_notificacion(
-            db, admin.id, "solicitud_documento",
-            f"{empleado.nombre_completo} solicito: {data.tipo}",
-            enlace=f"/rh/documentos/{documento.id}",
-        )
+    notificar_admins(
+        db, "solicitud_documento",
+        f"{empleado.nombre_completo} solicito: {data.tipo}",
+        enlace=f"/rh/documentos/{documento.id}",
+    )
+    db.commit()
+    db.refresh(documento)
 
     registrar_auditoria(
         db, current_user.id, current_user.username,
@@ -82,7 +85,7 @@ def solicitar_documento_a_rh(
 @router.post("/solicitar-a-empleado", response_model=DocumentoResponse)
 def solicitar_documento_a_empleado(
     data: DocumentoCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     """RH solicita un documento al empleado (CURP actualizado, etc.)."""
@@ -126,7 +129,7 @@ def solicitar_documento_a_empleado(
 def actualizar_estado_documento(
     documento_id: int,
     data: DocumentoUpdateEstado,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     documento = db.query(Documento).filter(Documento.id == documento_id).first()
@@ -162,10 +165,10 @@ def actualizar_estado_documento(
 async def subir_archivo_documento(
     documento_id: int,
     archivo: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    documento = db.query(Documento).filter(Documento.id == documento_id).first()
+    documento = await db.get(Documento, documento_id)
     if not documento:
         raise HTTPException(status_code=404, detail="Documento no encontrado")
 
@@ -182,38 +185,39 @@ async def subir_archivo_documento(
     os.makedirs(upload_dir, exist_ok=True)
     file_path = os.path.join(upload_dir, f"{documento_id}_{archivo.filename}")
 
-    with open(file_path, "wb") as f:
+    async with aiofiles.open(file_path, "wb") as f:
         content = await archivo.read()
-        f.write(content)
+        await f.write(content)
 
     documento.archivo_path = file_path
-    db.commit()
+    await db.run_sync(_registrar_archivo_subido, documento, current_user)
+    await db.commit()
+
+    return {"message": "Archivo subido exitosamente", "path": file_path}
 
+
+def _registrar_archivo_subido(db: Session, documento: Documento, current_user: Principal):
+    """Notificaciones y auditoria de la subida; se confirman con el archivo_path."""
     # Notificar a RH si empleado subio archivo
     if documento.origen == OrigenSolicitud.RH and current_user.role.value == "USUARIO":
-        empleado = db.query(Empleado).filter(Empleado.id == documento.empleado_id).first()
-        admins = db.query(User).filter(
-            User.role.in_(["ROOT", "ADMIN"]), User.active == True
-        ).all()
-        for admin in admins:
-            crear_notificacion(
-                db, admin.id, "documento_subido",
-                f"{empleado.nombre_completo} subio: {documento.tipo}",
-                enlace=f"/rh/documentos/{documento.id}",
-            )
+        empleado = db.get(Empleado, documento.empleado_id)
+        notificar_admins(
+            db, "documento_subido",
+            f"{empleado.nombre_completo} subio: {documento.tipo}",
+            enlace=f"/rh/documentos/{documento.id}",
+        )
 
     registrar_auditoria(
         db, current_user.id, current_user.username,
         f"subio archivo para documento {documento.tipo}", "documentos", documento.id,
+        en_transaccion=True,
     )
 
-    return {"message": "Archivo subido exitosamente", "path": file_path}
-
 
 @router.get("/{documento_id}", response_model=DocumentoResponse)
 def obtener_documento(
     documento_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     documento = db.query(Documento).filter(Documento.id == documento_id).first()
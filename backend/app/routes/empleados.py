@@ -1,39 +1,46 @@
 from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_async_db, get_db
 from ..models.contador import Contador
-from ..models.empleado import Empleado
-from ..models.user import User
+from ..models.empleado import Empleado, TipoEmpleado
 from ..schemas.empleado import ContadorResponse, EmpleadoCreate, EmpleadoResponse, EmpleadoUpdate
-from ..utils.dependencies import get_current_admin_user, get_current_user
+from ..services.contador_service import obtener_o_crear_contador, permisos_horas_del_anio
+from ..services.elegibilidad_service import filtrar_elegibles
+from ..utils.dependencies import Principal, get_current_admin_user, get_current_admin_user_async, get_current_user
 from ..utils.helpers import registrar_auditoria
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[EmpleadoResponse])
-def listar_empleados(
+async def listar_empleados(
     activo: bool = Query(True),
-    tipo: str = Query(None),
+    tipo: TipoEmpleado = Query(None),
     buscar: str = Query(None),
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db),
+    elegible_prestaciones: bool = Query(None),
+    current_user: Principal = Depends(get_current_admin_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(Empleado).filter(Empleado.activo == activo)
+    query = select(Empleado).filter(Empleado.activo == activo)
     if tipo:
         query = query.filter(Empleado.tipo == tipo)
     if buscar:
         query = query.filter(Empleado.nombre_completo.ilike(f"%{buscar}%"))
-    return query.order_by(Empleado.nombre_completo).all()
+    if elegible_prestaciones is not None:
+        query = filtrar_elegibles(query, elegible_prestaciones)
+    resultado = await db.execute(query.order_by(Empleado.nombre_completo))
+    return resultado.scalars().all()
 
 
 @router.get("/{empleado_id}", response_model=EmpleadoResponse)
 def obtener_empleado(
     empleado_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     # Usuarios normales solo pueden ver su propio perfil
@@ -49,7 +56,7 @@ def obtener_empleado(
 @router.post("/", response_model=EmpleadoResponse)
 def crear_empleado(
     data: EmpleadoCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     empleado = Empleado(**data.model_dump())
@@ -73,7 +80,7 @@ def crear_empleado(
 def actualizar_empleado(
     empleado_id: int,
     data: EmpleadoUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     empleado = db.query(Empleado).filter(Empleado.id == empleado_id).first()
@@ -97,7 +104,7 @@ def actualizar_empleado(
 @router.delete("/{empleado_id}")
 def eliminar_empleado(
     empleado_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     empleado = db.query(Empleado).filter(Empleado.id == empleado_id).first()
@@ -118,7 +125,7 @@ def eliminar_empleado(
 def obtener_contadores(
     empleado_id: int,
     anio: int = Query(None),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     if current_user.role.value == "USUARIO" and current_user.empleado_id != empleado_id:
@@ -127,15 +134,12 @@ def obtener_contadores(
     if anio is None:
         anio = date.today().year
 
-    contador = db.query(Contador).filter(
-        Contador.empleado_id == empleado_id, Contador.anio == anio
-    ).first()
-
-    if not contador:
-        # Crear contador si no existe
-        contador = Contador(empleado_id=empleado_id, anio=anio)
-        db.add(contador)
-        db.commit()
-        db.refresh(contador)
+    contador = obtener_o_crear_contador(db, empleado_id, anio)
+    db.commit()
+    db.refresh(contador)
 
-    return contador
+    # Los permisos por horas se llevan por quincena en contadores_quincena
+    q1, q2 = permisos_horas_del_anio(db, empleado_id, anio)
+    return ContadorResponse.model_validate(contador).model_copy(
+        update={"permisos_horas_q1": q1, "permisos_horas_q2": q2}
+    )
@@ -2,32 +2,47 @@ from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..models.contador import Contador
+from ..database import get_async_db, get_db
 from ..models.empleado import Empleado
 from ..models.justificante import Justificante, TipoJustificante
-from ..models.user import User
-from ..schemas.justificante import JustificanteCreate, JustificanteResponse, ValidacionResponse
+from ..schemas.justificante import (
+    FechaDisponible,
+    FechasDisponiblesResponse,
+    JustificanteCreate,
+    JustificanteResponse,
+    ValidacionLoteRequest,
+    ValidacionLoteResultado,
+    ValidacionResponse,
+)
 from ..services.calendario_service import calendario_service
+from ..services.contador_service import ContadorOcupadoError
 from ..services.pdf_service import generar_pdf_justificante, guardar_pdf
-from ..utils.dependencies import get_current_admin_user, get_current_user
+from ..services.validaciones_cache import cache_validaciones
+from ..utils.dependencies import Principal, get_current_admin_user, get_current_user, get_current_user_async
 from ..utils.helpers import registrar_auditoria
-from ..validators.dia_economico_validator import validar_dia_economico
-from ..validators.permiso_horas_validator import validar_permiso_horas
+from ..validators.dia_economico_validator import (
+    proximas_fechas_dia_economico,
+    reservar_dia_economico,
+    validar_dia_economico,
+)
+from ..validators.lote_validator import validar_lote
+from ..validators.permiso_horas_validator import reservar_permiso_horas, validar_permiso_horas
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[JustificanteResponse])
-def listar_justificantes(
+async def listar_justificantes(
     empleado_id: int = Query(None),
-    tipo: str = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    tipo: TipoJustificante = Query(None),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(Justificante)
+    query = select(Justificante)
 
     if current_user.role.value == "USUARIO":
         query = query.filter(Justificante.empleado_id == current_user.empleado_id)
@@ -37,13 +52,14 @@ def listar_justificantes(
     if tipo:
         query = query.filter(Justificante.tipo == tipo)
 
-    return query.order_by(Justificante.created_at.desc()).all()
+    resultado = await db.execute(query.order_by(Justificante.created_at.desc()))
+    return resultado.scalars().all()
 
 
 @router.post("/validar", response_model=ValidacionResponse)
 def validar_justificante(
     data: JustificanteCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     empleado_id = current_user.empleado_id
@@ -51,9 +67,9 @@ def validar_justificante(
         raise HTTPException(status_code=400, detail="Usuario no tiene empleado asociado")
 
     if data.tipo == TipoJustificante.DIA_ECONOMICO:
-        return validar_dia_economico(db, empleado_id, data.fecha_inicio)
+        validar = validar_dia_economico
     elif data.tipo == TipoJustificante.PERMISO_HORAS:
-        return validar_permiso_horas(db, empleado_id, data.fecha_inicio)
+        validar = validar_permiso_horas
     else:
         return ValidacionResponse(
             valido=True,
@@ -61,26 +77,49 @@ def validar_justificante(
             fecha_fin_calculada=data.fecha_fin or data.fecha_inicio,
         )
 
+    # El formulario re-valida los mismos datos mientras se edita
+    return cache_validaciones.obtener(
+        empleado_id,
+        ("justificante", data.tipo, data.fecha_inicio),
+        lambda: validar(db, empleado_id, data.fecha_inicio),
+    )
+
+
+@router.post("/validar-lote", response_model=list[ValidacionLoteResultado])
+def validar_justificantes_lote(
+    data: ValidacionLoteRequest,
+    current_user: Principal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Pre-valida muchas solicitudes (ej. toda una plantilla) en una sola llamada."""
+    return validar_lote(db, data.items)
+
 
 @router.post("/", response_model=JustificanteResponse)
 def crear_justificante(
     data: JustificanteCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     empleado_id = current_user.empleado_id
     if not empleado_id:
         raise HTTPException(status_code=400, detail="Usuario no tiene empleado asociado")
 
-    # Validar primero
+    # Validar y actualizar contadores en el mismo paso (sin perder solicitudes simultaneas)
     if data.tipo == TipoJustificante.DIA_ECONOMICO:
-        validacion = validar_dia_economico(db, empleado_id, data.fecha_inicio)
+        try:
+            validacion = reservar_dia_economico(db, empleado_id, data.fecha_inicio)
+        except ContadorOcupadoError as e:
+            raise HTTPException(status_code=409, detail=str(e))
         if not validacion.valido:
             raise HTTPException(status_code=400, detail="; ".join(validacion.errores))
         fecha_fin = validacion.fecha_fin_calculada
         dias = 3
     elif data.tipo == TipoJustificante.PERMISO_HORAS:
-        validacion = validar_permiso_horas(db, empleado_id, data.fecha_inicio)
+        try:
+            validacion = reservar_permiso_horas(db, empleado_id, data.fecha_inicio)
+        except ContadorOcupadoError as e:
+            raise HTTPException(status_code=409, detail=str(e))
         if not validacion.valido:
             raise HTTPException(status_code=400, detail="; ".join(validacion.errores))
         fecha_fin = data.fecha_inicio
@@ -102,22 +141,6 @@ def crear_justificante(
         created_by_user_id=current_user.id,
     )
     db.add(justificante)
-    db.flush()
-
-    # Actualizar contadores
-    if data.tipo == TipoJustificante.DIA_ECONOMICO:
-        anio = data.fecha_inicio.year
-        contador = db.query(Contador).filter(
-            Contador.empleado_id == empleado_id, Contador.anio == anio
-        ).first()
-        if not contador:
-            contador = Contador(empleado_id=empleado_id, anio=anio)
-            db.add(contador)
-            db.flush()
-        contador.solicitudes_economicos += 1
-        contador.dias_economicos_usados += 3
-        contador.fecha_ultima_solicitud_economico = data.fecha_inicio
-
     db.commit()
     db.refresh(justificante)
 
@@ -134,10 +157,37 @@ def listar_tipos():
     return [{"value": t.value, "label": t.value} for t in TipoJustificante]
 
 
+@router.get("/dias-economicos/fechas-disponibles", response_model=FechasDisponiblesResponse)
+def fechas_disponibles_dia_economico(
+    desde: date = Query(None),
+    cantidad: int = Query(5, ge=1, le=20),
+    empleado_id: int = Query(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Siguientes fechas en que el empleado puede iniciar un dia economico."""
+    if current_user.role.value == "USUARIO" or not empleado_id:
+        empleado_id = current_user.empleado_id
+    if not empleado_id:
+        raise HTTPException(status_code=400, detail="Usuario no tiene empleado asociado")
+
+    fechas = proximas_fechas_dia_economico(db, empleado_id, desde or date.today(), cantidad)
+    return FechasDisponiblesResponse(
+        empleado_id=empleado_id,
+        fechas=[
+            FechaDisponible(
+                fecha_inicio=fecha,
+                fecha_fin=calendario_service.agregar_dias_laborales(fecha, 2),
+            )
+            for fecha in fechas
+        ],
+    )
+
+
 @router.get("/{justificante_id}", response_model=JustificanteResponse)
 def obtener_justificante(
     justificante_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     justificante = db.query(Justificante).filter(Justificante.id == justificante_id).first()
@@ -156,7 +206,7 @@ def obtener_justificante(
 @router.get("/{justificante_id}/pdf")
 def descargar_pdf_justificante(
     justificante_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     justificante = db.query(Justificante).filter(Justificante.id == justificante_id).first()
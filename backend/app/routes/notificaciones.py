@@ -1,53 +1,179 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..config import settings
+from ..database import AsyncSessionLocal, get_async_db
 from ..models.user import User
-from ..schemas.notificacion import NotificacionConteo, NotificacionResponse
+from ..schemas.notificacion import NotificacionConteo, NotificacionResponse, TicketStream
 from ..services.notificacion_service import (
-    contar_no_leidas,
     marcar_leida,
     marcar_todas_leidas,
+    obtener_conteo,
     obtener_notificaciones,
+    ids_notificaciones_creadas_desde,
+    obtener_notificaciones_desde,
+    obtener_notificaciones_recientes,
 )
-from ..utils.dependencies import get_current_user
+from ..services.notificaciones_canal import canal_notificaciones
+from ..utils.dependencies import Principal, get_current_user_async, get_stream_ticket, oauth2_scheme
+from ..utils.security import create_stream_ticket, decode_access_token
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[NotificacionResponse])
-def listar_notificaciones(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def listar_notificaciones(
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return obtener_notificaciones(db, current_user.id)
+    return await db.run_sync(obtener_notificaciones, current_user.id)
 
 
 @router.get("/conteo", response_model=NotificacionConteo)
-def conteo_notificaciones(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def conteo_notificaciones(
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    total = len(obtener_notificaciones(db, current_user.id))
-    no_leidas = contar_no_leidas(db, current_user.id)
+    total, no_leidas = await db.run_sync(obtener_conteo, current_user.id)
     return NotificacionConteo(total=total, no_leidas=no_leidas)
 
 
+@router.post("/stream/ticket", response_model=TicketStream)
+async def ticket_stream(
+    token: str = Depends(oauth2_scheme),
+    current_user: Principal = Depends(get_current_user_async),
+):
+    """Ticket de un solo uso para abrir el stream; el token de acceso no va en la URL."""
+    expira_sesion = decode_access_token(token)["exp"]
+    return TicketStream(
+        ticket=create_stream_ticket(current_user.id, expira_sesion),
+        expira_en=settings.NOTIFICACIONES_TICKET_S,
+    )
+
+
+@router.get("/stream")
+async def stream_notificaciones(
+    desde: int = Query(0, ge=0, description="Ultimo id recibido; 0 envia todas al conectar"),
+    last_event_id: Optional[str] = Header(None),
+    ticket: dict = Depends(get_stream_ticket),
+):
+    """Server-Sent Events: un evento `notificaciones` al conectar y otro con cada cambio.
+
+    Cada evento trae las notificaciones nuevas (`nuevas`, mas recientes
+    primero; al conectar solo las NOTIFICACIONES_STREAM_INICIAL mas
+    recientes) y los conteos. Sin cambios solo se envia un comentario de
+    keepalive. El stream se cierra cuando vence el token con el que se pidio
+    el ticket o cuando el usuario se desactiva (se revisa en cada keepalive).
+    """
+    if last_event_id and last_event_id.isdigit():
+        # Reconexion automatica de EventSource: continuar desde el ultimo evento
+        desde = max(desde, int(last_event_id))
+    return StreamingResponse(
+        _eventos(ticket["usuario_id"], desde, ticket["sesion"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _usuario_activo(db: Session, usuario_id: int) -> bool:
+    usuario = db.get(User, usuario_id)
+    return usuario is not None and bool(usuario.active)
+
+
+async def _sesion_vigente(usuario_id: int, expira_sesion: float) -> bool:
+    if time.time() >= expira_sesion:
+        return False
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(_usuario_activo, usuario_id)
+
+
+def _cambios(
+    db: Session, usuario_id: int, desde_id: int, enviadas: Dict[int, datetime], primera: bool
+) -> Optional[dict]:
+    """Notificaciones que el stream aun no envia y conteos; None si el usuario ya no esta activo.
+
+    `enviadas` (id -> created_at) guarda las enviadas dentro de la ventana:
+    esas se vuelven a consultar por si alguna con id menor se confirmo tarde.
+    """
+    if not _usuario_activo(db, usuario_id):
+        return None
+    ventana = datetime.utcnow() - timedelta(seconds=settings.NOTIFICACIONES_STREAM_VENTANA_S)
+    if primera:
+        if desde_id == 0:
+            nuevas = obtener_notificaciones_recientes(db, usuario_id, settings.NOTIFICACIONES_STREAM_INICIAL)
+        else:
+            # Reconexion: el cliente ya tiene hasta desde_id
+            nuevas = obtener_notificaciones_desde(db, usuario_id, desde_id)
+        enviadas.update(ids_notificaciones_creadas_desde(db, usuario_id, ventana))
+    else:
+        nuevas = [
+            n for n in obtener_notificaciones_desde(db, usuario_id, desde_id, ventana)
+            if n.id not in enviadas
+        ]
+    enviadas.update((n.id, n.created_at) for n in nuevas)
+    for notificacion_id in [i for i, creada in enviadas.items() if creada < ventana]:
+        del enviadas[notificacion_id]
+    total, no_leidas = obtener_conteo(db, usuario_id)
+    return {
+        "nuevas": [NotificacionResponse.model_validate(n).model_dump(mode="json") for n in nuevas],
+        "no_leidas": no_leidas,
+        "total": total,
+    }
+
+
+async def _eventos(usuario_id: int, desde_id: int, expira_sesion: float):
+    """`expira_sesion`: exp del token de acceso (segundos desde epoch)."""
+    # Suscribirse antes de la primera consulta: no se pierde un cambio intermedio
+    cola = canal_notificaciones.suscribir(usuario_id)
+    enviadas: Dict[int, datetime] = {}
+    try:
+        primera = True
+        while time.time() < expira_sesion:
+            async with AsyncSessionLocal() as db:
+                datos = await db.run_sync(_cambios, usuario_id, desde_id, enviadas, primera)
+            if datos is None:
+                return
+            datos["inicial"] = primera and desde_id == 0
+            primera = False
+            # Puede traer una con id menor que se confirmo tarde
+            desde_id = max([desde_id, *(n["id"] for n in datos["nuevas"])])
+            yield f"id: {desde_id}\nevent: notificaciones\ndata: {json.dumps(datos)}\n\n"
+
+            while True:
+                try:
+                    await asyncio.wait_for(cola.get(), settings.NOTIFICACIONES_KEEPALIVE_S)
+                    break
+                except asyncio.TimeoutError:
+                    if not await _sesion_vigente(usuario_id, expira_sesion):
+                        return
+                    yield ": keepalive\n\n"
+    finally:
+        canal_notificaciones.desuscribir(usuario_id, cola)
+
+
 @router.put("/{notificacion_id}/leer")
-def leer_notificacion(
+async def leer_notificacion(
     notificacion_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if not marcar_leida(db, notificacion_id, current_user.id):
+    if not await db.run_sync(marcar_leida, notificacion_id, current_user.id):
         return {"message": "Notificacion no encontrada"}
     return {"message": "Notificacion marcada como leida"}
 
 
 @router.put("/leer-todas")
-def leer_todas(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def leer_todas(
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    count = marcar_todas_leidas(db, current_user.id)
+    count = await db.run_sync(marcar_todas_leidas, current_user.id)
     return {"message": f"{count} notificaciones marcadas como leidas"}
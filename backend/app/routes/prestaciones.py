@@ -1,14 +1,16 @@
 import json
 import os
-from datetime import datetime
+from datetime import date, datetime
 
+import aiofiles
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..config import settings
-from ..database import get_db
-from ..models.contador import Contador
+from ..database import get_async_db, get_db
 from ..models.empleado import Empleado, TipoEmpleado
 from ..models.prestacion import EstadoPrestacion, Prestacion, TipoPrestacion
 from ..models.user import User
@@ -18,14 +20,20 @@ from ..schemas.prestacion import (
     PrestacionResponse,
     PrestacionUpdate,
     PrestacionValidacionResponse,
+    ReglaPrestacionResponse,
 )
 from ..services.calendario_service import calendario_service
-from ..services.notificacion_service import crear_notificacion
+from ..services.contador_service import incrementar_contador
+from ..services.notificacion_service import crear_notificacion, notificar_admins
 from ..services.pdf_service import generar_pdf_prestacion, guardar_pdf
-from ..utils.dependencies import get_current_admin_user, get_current_user
+from ..services.traslapes_service import existe_traslape, indice_prestaciones
+from ..services.validaciones_cache import cache_validaciones, marcar_empleado_modificado
+from ..utils.dependencies import Principal, get_current_admin_user, get_current_user, get_current_user_async
 from ..utils.helpers import registrar_auditoria
 from ..validators.prestacion_validator import (
     CATALOGO_PRESTACIONES,
+    MENSAJE_TRASLAPE,
+    obtener_regla,
     validar_prestacion,
 )
 
@@ -44,20 +52,30 @@ def obtener_catalogo():
                 dias_maximos=info["dias_maximos"],
                 documentos_requeridos=info["documentos_requeridos"],
                 requisitos=info["requisitos"],
+                reglas=[_regla_response(obtener_regla(tipo, t)) for t in TipoEmpleado],
             )
         )
     return catalogo
 
 
+def _regla_response(regla) -> ReglaPrestacionResponse:
+    return ReglaPrestacionResponse(
+        tipo_empleado=regla.tipo_empleado,
+        dias_maximos=regla.dias_maximos,
+        limite_anual=regla.contador_anual is not None,
+        verificaciones=regla.nombres_verificaciones,
+    )
+
+
 @router.get("/", response_model=list[PrestacionResponse])
-def listar_prestaciones(
+async def listar_prestaciones(
     empleado_id: int = Query(None),
-    tipo: str = Query(None),
-    estado: str = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    tipo: TipoPrestacion = Query(None),
+    estado: EstadoPrestacion = Query(None),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    query = db.query(Prestacion)
+    query = select(Prestacion)
 
     if current_user.role.value == "USUARIO":
         query = query.filter(Prestacion.empleado_id == current_user.empleado_id)
@@ -69,39 +87,72 @@ def listar_prestaciones(
     if estado:
         query = query.filter(Prestacion.estado == estado)
 
-    return query.order_by(Prestacion.created_at.desc()).all()
+    resultado = await db.execute(query.order_by(Prestacion.created_at.desc()))
+    return resultado.scalars().all()
+
+
+@router.get("/traslapes", response_model=list[PrestacionResponse])
+def listar_traslapes(
+    fecha_inicio: date = Query(...),
+    fecha_fin: date = Query(...),
+    tipo: TipoPrestacion = Query(None),
+    empleado_id: int = Query(None),
+    current_user: Principal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Prestaciones no rechazadas que traslapan el rango (tablero de RH)."""
+    if empleado_id:
+        ids = indice_prestaciones.traslapes_empleado(db, empleado_id, fecha_inicio, fecha_fin, tipo)
+    else:
+        ids = indice_prestaciones.traslapes(db, fecha_inicio, fecha_fin, tipo)
+    if not ids:
+        return []
+    return (
+        db.query(Prestacion)
+        .filter(Prestacion.id.in_(ids))
+        .order_by(Prestacion.fecha_inicio, Prestacion.empleado_id)
+        .all()
+    )
 
 
 @router.post("/validar", response_model=PrestacionValidacionResponse)
 def validar_prestacion_endpoint(
     data: PrestacionCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     empleado_id = current_user.empleado_id
     if not empleado_id:
         raise HTTPException(status_code=400, detail="Usuario no tiene empleado asociado")
 
-    empleado = db.query(Empleado).filter(Empleado.id == empleado_id).first()
-    if not empleado:
-        raise HTTPException(status_code=404, detail="Empleado no encontrado")
+    def calcular():
+        empleado = db.query(Empleado).filter(Empleado.id == empleado_id).first()
+        if not empleado:
+            raise HTTPException(status_code=404, detail="Empleado no encontrado")
+        return validar_prestacion(
+            db, empleado, data.tipo, data.fecha_inicio, data.fecha_fin, data.dias_solicitados
+        )
 
-    return validar_prestacion(
-        db, empleado, data.tipo, data.fecha_inicio, data.fecha_fin, data.dias_solicitados
+    # El formulario re-valida los mismos datos mientras se edita
+    return cache_validaciones.obtener(
+        empleado_id,
+        ("prestacion", data.tipo, data.fecha_inicio, data.fecha_fin, data.dias_solicitados),
+        calcular,
     )
 
 
 @router.post("/", response_model=PrestacionResponse)
 def crear_prestacion(
     data: PrestacionCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     empleado_id = current_user.empleado_id
     if not empleado_id:
         raise HTTPException(status_code=400, detail="Usuario no tiene empleado asociado")
 
-    empleado = db.query(Empleado).filter(Empleado.id == empleado_id).first()
+    # En PostgreSQL bloquea al empleado: sus solicitudes simultaneas se revisan una tras otra
+    empleado = db.query(Empleado).filter(Empleado.id == empleado_id).with_for_update().first()
     if not empleado:
         raise HTTPException(status_code=404, detail="Empleado no encontrado")
 
@@ -124,17 +175,25 @@ def crear_prestacion(
         created_by_user_id=current_user.id,
     )
     db.add(prestacion)
+    db.flush()
+
+    # El indice en memoria puede no tener lo que confirmaron otros workers: revisar
+    # en la BD (en SQLite el INSERT ya tomo el candado de escritura)
+    if existe_traslape(
+        db, empleado_id, data.tipo, data.fecha_inicio, data.fecha_fin, excluir_id=prestacion.id
+    ):
+        db.rollback()
+        raise HTTPException(status_code=400, detail=MENSAJE_TRASLAPE)
+
+    # Notificar a admins (mismo commit que la prestacion)
+    notificar_admins(
+        db, "nueva_prestacion",
+        f"{empleado.nombre_completo} solicito {data.tipo.value}",
+        enlace=f"/rh/prestaciones/{prestacion.id}",
+    )
     db.commit()
     db.refresh(prestacion)
-
-    # Notificar a admins
-    admins = db.query(User).filter(User.role.in_(["ROOT", "ADMIN"]), User.active == True).all()
-    for admin in admins:
-        crear_notificacion(
-            db, admin.id, "nueva_prestacion",
-            f"{empleado.nombre_completo} solicito {data.tipo.value}",
-            enlace=f"/rh/prestaciones/{prestacion.id}",
-        )
+    indice_prestaciones.registrar(prestacion)
 
     registrar_auditoria(
         db, current_user.id, current_user.username,
@@ -147,7 +206,7 @@ def crear_prestacion(
 @router.put("/{prestacion_id}/aprobar", response_model=PrestacionResponse)
 def aprobar_prestacion(
     prestacion_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     prestacion = db.query(Prestacion).filter(Prestacion.id == prestacion_id).first()
@@ -157,15 +216,29 @@ def aprobar_prestacion(
     if prestacion.estado != EstadoPrestacion.PENDIENTE:
         raise HTTPException(status_code=400, detail="La prestacion ya fue procesada")
 
-    prestacion.estado = EstadoPrestacion.APROBADA
-    prestacion.aprobado_por_user_id = current_user.id
-    prestacion.updated_at = datetime.utcnow()
+    # Cambio de estado condicionado: si dos admins aprueban a la vez solo uno suma al contador
+    aprobadas = (
+        db.query(Prestacion)
+        .filter(Prestacion.id == prestacion.id, Prestacion.estado == EstadoPrestacion.PENDIENTE)
+        .update(
+            {
+                Prestacion.estado: EstadoPrestacion.APROBADA,
+                Prestacion.aprobado_por_user_id: current_user.id,
+                Prestacion.updated_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+    )
+    if not aprobadas:
+        raise HTTPException(status_code=400, detail="La prestacion ya fue procesada")
+    marcar_empleado_modificado(db, prestacion.empleado_id)
 
     # Actualizar contadores
     _actualizar_contadores_prestacion(db, prestacion)
 
     db.commit()
     db.refresh(prestacion)
+    indice_prestaciones.registrar(prestacion)
 
     # Notificar al empleado
     user_empleado = db.query(User).filter(User.empleado_id == prestacion.empleado_id).first()
@@ -188,7 +261,7 @@ def aprobar_prestacion(
 def rechazar_prestacion(
     prestacion_id: int,
     data: PrestacionUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     prestacion = db.query(Prestacion).filter(Prestacion.id == prestacion_id).first()
@@ -203,6 +276,7 @@ def rechazar_prestacion(
     prestacion.updated_at = datetime.utcnow()
     db.commit()
     db.refresh(prestacion)
+    indice_prestaciones.registrar(prestacion)
 
     # Notificar al empleado
     user_empleado = db.query(User).filter(User.empleado_id == prestacion.empleado_id).first()
@@ -226,10 +300,10 @@ def rechazar_prestacion(
 async def subir_documento_prestacion(
     prestacion_id: int,
     archivo: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    prestacion = db.query(Prestacion).filter(Prestacion.id == prestacion_id).first()
+    prestacion = await db.get(Prestacion, prestacion_id)
     if not prestacion:
         raise HTTPException(status_code=404, detail="Prestacion no encontrada")
 
@@ -246,15 +320,15 @@ async def subir_documento_prestacion(
     os.makedirs(upload_dir, exist_ok=True)
     file_path = os.path.join(upload_dir, f"{prestacion_id}_{archivo.filename}")
 
-    with open(file_path, "wb") as f:
+    async with aiofiles.open(file_path, "wb") as f:
         content = await archivo.read()
-        f.write(content)
+        await f.write(content)
 
     # Actualizar lista de documentos
     docs = json.loads(prestacion.documentos_adjuntos or "[]")
     docs.append(file_path)
     prestacion.documentos_adjuntos = json.dumps(docs)
-    db.commit()
+    await db.commit()
 
     return {"message": "Documento subido exitosamente", "path": file_path}
 
@@ -262,7 +336,7 @@ async def subir_documento_prestacion(
 @router.get("/{prestacion_id}", response_model=PrestacionResponse)
 def obtener_prestacion(
     prestacion_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     prestacion = db.query(Prestacion).filter(Prestacion.id == prestacion_id).first()
@@ -281,7 +355,7 @@ def obtener_prestacion(
 @router.get("/{prestacion_id}/pdf")
 def descargar_pdf_prestacion(
     prestacion_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     prestacion = db.query(Prestacion).filter(Prestacion.id == prestacion_id).first()
@@ -320,18 +394,10 @@ def descargar_pdf_prestacion(
 
 def _actualizar_contadores_prestacion(db: Session, prestacion: Prestacion):
     """Actualiza contadores cuando una prestacion es aprobada."""
-    anio = prestacion.fecha_inicio.year
-    contador = db.query(Contador).filter(
-        Contador.empleado_id == prestacion.empleado_id, Contador.anio == anio
-    ).first()
-    if not contador:
-        contador = Contador(empleado_id=prestacion.empleado_id, anio=anio)
-        db.add(contador)
-        db.flush()
+    empleado = db.get(Empleado, prestacion.empleado_id)
+    campo = obtener_regla(prestacion.tipo, empleado.tipo if empleado else None).contador_anual
+    if campo is None:
+        return
 
     dias = prestacion.dias_solicitados or 0
-
-    if prestacion.tipo == TipoPrestacion.CUIDADOS_MATERNOS:
-        contador.cuidados_maternos_usados += dias
-    elif prestacion.tipo == TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES:
-        contador.cuidados_medicos_usados += dias
+    incrementar_contador(db, prestacion.empleado_id, prestacion.fecha_inicio.year, {campo: dias})
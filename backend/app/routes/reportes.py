@@ -1,17 +1,18 @@
 from collections import Counter
 from datetime import date, datetime
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from ..config import settings
 from ..database import get_db
 from ..models.adeudo import Adeudo, EstadoAdeudo
-from ..models.contador import Contador
+from ..models.contador import Contador, ContadorQuincena
 from ..models.empleado import Empleado
 from ..models.justificante import EstadoJustificante, Justificante, TipoJustificante
-from ..models.prestacion import Prestacion
-from ..models.user import User
+from ..models.prestacion import EstadoPrestacion, Prestacion, TipoPrestacion
 from ..schemas.reporte import (
     AdeudoReporteItem,
     AusentismoItem,
@@ -29,7 +30,7 @@ from ..schemas.reporte import (
     ReportePrestacionesResponse,
 )
 from ..services.export_service import generar_excel
-from ..utils.dependencies import get_current_admin_user
+from ..utils.dependencies import Principal, get_current_admin_user
 
 router = APIRouter()
 
@@ -42,16 +43,24 @@ def _formato_periodo(fi: date, ff: date) -> str:
     return f"{fi.isoformat()} a {ff.isoformat()}"
 
 
+def _valor_enum(enum_cls, valor: str):
+    """Filtro de texto del export al Enum de la columna (None = sin filtro)."""
+    if valor is None:
+        return None
+    try:
+        return enum_cls(valor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Valor '{valor}' no valido")
+
+
+def _recorrer(query):
+    """Itera la consulta por lotes; en PostgreSQL usa un cursor del lado del servidor."""
+    return query.yield_per(settings.REPORTES_LOTE_FILAS)
+
+
 # --- 1. Ausentismo ---
 
-@router.get("/ausentismo", response_model=ReporteAusentismoResponse)
-def reporte_ausentismo(
-    fecha_inicio: date = Query(...),
-    fecha_fin: date = Query(...),
-    empleado_id: int = Query(None),
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db),
-):
+def _reporte_ausentismo(db: Session, fecha_inicio: date, fecha_fin: date, empleado_id: int):
     query = db.query(Justificante, Empleado).join(
         Empleado, Justificante.empleado_id == Empleado.id
     ).filter(
@@ -61,7 +70,7 @@ def reporte_ausentismo(
     if empleado_id:
         query = query.filter(Justificante.empleado_id == empleado_id)
 
-    results = query.all()
+    results = _recorrer(query)
 
     # Agrupar por empleado
     agrupado: dict[int, dict] = {}
@@ -95,14 +104,20 @@ def reporte_ausentismo(
     )
 
 
-# --- 2. Dias Economicos ---
-
-@router.get("/dias-economicos", response_model=ReporteDiasEconomicosResponse)
-def reporte_dias_economicos(
-    anio: int = Query(None),
-    current_user: User = Depends(get_current_admin_user),
+@router.get("/ausentismo", response_model=ReporteAusentismoResponse)
+def reporte_ausentismo(
+    fecha_inicio: date = Query(...),
+    fecha_fin: date = Query(...),
+    empleado_id: int = Query(None),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
+    return _reporte_ausentismo(db, fecha_inicio, fecha_fin, empleado_id)
+
+
+# --- 2. Dias Economicos ---
+
+def _reporte_dias_economicos(db: Session, anio: int):
     anio = anio or date.today().year
     empleados = db.query(Empleado).filter(Empleado.activo == True).all()
 
@@ -128,24 +143,39 @@ def reporte_dias_economicos(
     )
 
 
-# --- 3. Permisos por Horas ---
-
-@router.get("/permisos-horas", response_model=ReportePermisosHorasResponse)
-def reporte_permisos_horas(
+@router.get("/dias-economicos", response_model=ReporteDiasEconomicosResponse)
+def reporte_dias_economicos(
     anio: int = Query(None),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
+    return _reporte_dias_economicos(db, anio)
+
+
+# --- 3. Permisos por Horas ---
+
+def _reporte_permisos_horas(db: Session, anio: int):
     anio = anio or date.today().year
     empleados = db.query(Empleado).filter(Empleado.activo == True).all()
 
+    # Totales del anio por empleado y quincena en una sola consulta agrupada
+    totales: Counter = Counter()
+    filas = (
+        db.query(
+            ContadorQuincena.empleado_id,
+            ContadorQuincena.quincena,
+            func.sum(ContadorQuincena.permisos_horas),
+        )
+        .filter(ContadorQuincena.anio == anio)
+        .group_by(ContadorQuincena.empleado_id, ContadorQuincena.quincena)
+    )
+    for empleado_id, quincena, total in filas:
+        totales[(empleado_id, quincena)] = total
+
     datos = []
     for emp in empleados:
-        contador = db.query(Contador).filter(
-            Contador.empleado_id == emp.id, Contador.anio == anio
-        ).first()
-        q1 = contador.permisos_horas_q1 if contador else 0
-        q2 = contador.permisos_horas_q2 if contador else 0
+        q1 = totales[(emp.id, 1)]
+        q2 = totales[(emp.id, 2)]
         datos.append(PermisosHorasItem(
             empleado_id=emp.id,
             nombre_completo=emp.nombre_completo,
@@ -159,16 +189,19 @@ def reporte_permisos_horas(
     )
 
 
+@router.get("/permisos-horas", response_model=ReportePermisosHorasResponse)
+def reporte_permisos_horas(
+    anio: int = Query(None),
+    current_user: Principal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    return _reporte_permisos_horas(db, anio)
+
+
 # --- 4. Prestaciones ---
 
-@router.get("/prestaciones", response_model=ReportePrestacionesResponse)
-def reporte_prestaciones(
-    fecha_inicio: date = Query(...),
-    fecha_fin: date = Query(...),
-    tipo: str = Query(None),
-    estado: str = Query(None),
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db),
+def _reporte_prestaciones(
+    db: Session, fecha_inicio: date, fecha_fin: date, tipo: TipoPrestacion, estado: EstadoPrestacion
 ):
     query = db.query(Prestacion, Empleado).join(
         Empleado, Prestacion.empleado_id == Empleado.id
@@ -181,7 +214,7 @@ def reporte_prestaciones(
     if estado:
         query = query.filter(Prestacion.estado == estado)
 
-    results = query.order_by(Prestacion.fecha_inicio.desc()).all()
+    results = _recorrer(query.order_by(Prestacion.fecha_inicio.desc()))
 
     datos = []
     tipos_count: Counter = Counter()
@@ -209,16 +242,22 @@ def reporte_prestaciones(
     )
 
 
-# --- 5. Justificantes ---
-
-@router.get("/justificantes", response_model=ReporteJustificantesResponse)
-def reporte_justificantes(
+@router.get("/prestaciones", response_model=ReportePrestacionesResponse)
+def reporte_prestaciones(
     fecha_inicio: date = Query(...),
     fecha_fin: date = Query(...),
-    tipo: str = Query(None),
-    empleado_id: int = Query(None),
-    current_user: User = Depends(get_current_admin_user),
+    tipo: TipoPrestacion = Query(None),
+    estado: EstadoPrestacion = Query(None),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
+):
+    return _reporte_prestaciones(db, fecha_inicio, fecha_fin, tipo, estado)
+
+
+# --- 5. Justificantes ---
+
+def _reporte_justificantes(
+    db: Session, fecha_inicio: date, fecha_fin: date, tipo: TipoJustificante, empleado_id: int
 ):
     query = db.query(Justificante, Empleado).join(
         Empleado, Justificante.empleado_id == Empleado.id
@@ -231,7 +270,7 @@ def reporte_justificantes(
     if empleado_id:
         query = query.filter(Justificante.empleado_id == empleado_id)
 
-    results = query.order_by(Justificante.fecha_inicio.desc()).all()
+    results = _recorrer(query.order_by(Justificante.fecha_inicio.desc()))
 
     datos = []
     tipos_count: Counter = Counter()
@@ -259,21 +298,28 @@ def reporte_justificantes(
     )
 
 
-# --- 6. Adeudos ---
-
-@router.get("/adeudos", response_model=ReporteAdeudosResponse)
-def reporte_adeudos(
-    estado: str = Query("Pendiente"),
-    current_user: User = Depends(get_current_admin_user),
+@router.get("/justificantes", response_model=ReporteJustificantesResponse)
+def reporte_justificantes(
+    fecha_inicio: date = Query(...),
+    fecha_fin: date = Query(...),
+    tipo: TipoJustificante = Query(None),
+    empleado_id: int = Query(None),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
+    return _reporte_justificantes(db, fecha_inicio, fecha_fin, tipo, empleado_id)
+
+
+# --- 6. Adeudos ---
+
+def _reporte_adeudos(db: Session, estado: EstadoAdeudo):
     query = db.query(Adeudo, Empleado).join(
         Empleado, Adeudo.empleado_id == Empleado.id
     )
     if estado:
         query = query.filter(Adeudo.estado == estado)
 
-    results = query.order_by(Adeudo.fecha_marcado.desc()).all()
+    results = _recorrer(query.order_by(Adeudo.fecha_marcado.desc()))
 
     datos = []
     total_dias = 0
@@ -299,22 +345,25 @@ def reporte_adeudos(
     )
 
 
-# --- 7. Extemporaneos ---
-
-@router.get("/extemporaneos", response_model=ReporteJustificantesResponse)
-def reporte_extemporaneos(
-    fecha_inicio: date = Query(...),
-    fecha_fin: date = Query(...),
-    current_user: User = Depends(get_current_admin_user),
+@router.get("/adeudos", response_model=ReporteAdeudosResponse)
+def reporte_adeudos(
+    estado: EstadoAdeudo = Query(EstadoAdeudo.PENDIENTE),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
-    results = db.query(Justificante, Empleado).join(
+    return _reporte_adeudos(db, estado)
+
+
+# --- 7. Extemporaneos ---
+
+def _reporte_extemporaneos(db: Session, fecha_inicio: date, fecha_fin: date):
+    results = _recorrer(db.query(Justificante, Empleado).join(
         Empleado, Justificante.empleado_id == Empleado.id
     ).filter(
         Justificante.estado == EstadoJustificante.EXTEMPORANEO,
         Justificante.fecha_inicio >= fecha_inicio,
         Justificante.fecha_fin <= fecha_fin,
-    ).order_by(Justificante.fecha_inicio.desc()).all()
+    ).order_by(Justificante.fecha_inicio.desc()))
 
     datos = []
     tipos_count: Counter = Counter()
@@ -340,25 +389,31 @@ def reporte_extemporaneos(
     )
 
 
-# --- 8. Estadisticas Justificantes ---
-
-@router.get("/estadisticas-justificantes", response_model=ReporteEstadisticasResponse)
-def reporte_estadisticas_justificantes(
+@router.get("/extemporaneos", response_model=ReporteJustificantesResponse)
+def reporte_extemporaneos(
     fecha_inicio: date = Query(...),
     fecha_fin: date = Query(...),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
-    justificantes = db.query(Justificante).filter(
+    return _reporte_extemporaneos(db, fecha_inicio, fecha_fin)
+
+
+# --- 8. Estadisticas Justificantes ---
+
+def _reporte_estadisticas_justificantes(db: Session, fecha_inicio: date, fecha_fin: date):
+    justificantes = _recorrer(db.query(Justificante.tipo, Justificante.estado).filter(
         Justificante.fecha_inicio >= fecha_inicio,
         Justificante.fecha_fin <= fecha_fin,
-    ).all()
+    ))
 
+    total = 0
     tipo_count: Counter = Counter()
     estado_count: Counter = Counter()
-    for j in justificantes:
-        tipo_count[j.tipo.value] += 1
-        estado_count[j.estado.value] += 1
+    for tipo, estado in justificantes:
+        total += 1
+        tipo_count[tipo.value] += 1
+        estado_count[estado.value] += 1
 
     datos = []
     for val, cnt in tipo_count.items():
@@ -368,11 +423,21 @@ def reporte_estadisticas_justificantes(
 
     return ReporteEstadisticasResponse(
         datos=datos,
-        total_justificantes=len(justificantes),
+        total_justificantes=total,
         periodo=_formato_periodo(fecha_inicio, fecha_fin),
     )
 
 
+@router.get("/estadisticas-justificantes", response_model=ReporteEstadisticasResponse)
+def reporte_estadisticas_justificantes(
+    fecha_inicio: date = Query(...),
+    fecha_fin: date = Query(...),
+    current_user: Principal = Depends(get_current_admin_user),
+    db: Session = Depends(get_db),
+):
+    return _reporte_estadisticas_justificantes(db, fecha_inicio, fecha_fin)
+
+
 # --- 9. Export Excel ---
 
 EXPORT_CONFIGS = {
@@ -428,28 +493,34 @@ def exportar_reporte(
     tipo: str = Query(None),
     estado: str = Query(None),
     empleado_id: int = Query(None),
-    current_user: User = Depends(get_current_admin_user),
+    current_user: Principal = Depends(get_current_admin_user),
     db: Session = Depends(get_db),
 ):
     if reporte not in EXPORT_CONFIGS:
-        from fastapi import HTTPException
         raise HTTPException(status_code=400, detail=f"Reporte '{reporte}' no valido")
 
     config = EXPORT_CONFIGS[reporte]
 
-    # Obtener datos llamando al endpoint correspondiente
+    # Obtener datos con la misma consulta que el endpoint correspondiente;
+    # tipo/estado se convierten al Enum del reporte pedido
     handlers = {
-        "ausentismo": lambda: reporte_ausentismo(fecha_inicio, fecha_fin, empleado_id, current_user, db),
-        "dias-economicos": lambda: reporte_dias_economicos(anio, current_user, db),
-        "permisos-horas": lambda: reporte_permisos_horas(anio, current_user, db),
-        "prestaciones": lambda: reporte_prestaciones(fecha_inicio, fecha_fin, tipo, estado, current_user, db),
-        "justificantes": lambda: reporte_justificantes(fecha_inicio, fecha_fin, tipo, empleado_id, current_user, db),
-        "adeudos": lambda: reporte_adeudos(estado, current_user, db),
-        "extemporaneos": lambda: reporte_extemporaneos(fecha_inicio, fecha_fin, current_user, db),
-        "estadisticas-justificantes": lambda: reporte_estadisticas_justificantes(fecha_inicio, fecha_fin, current_user, db),
+        "ausentismo": lambda: (_reporte_ausentismo, fecha_inicio, fecha_fin, empleado_id),
+        "dias-economicos": lambda: (_reporte_dias_economicos, anio),
+        "permisos-horas": lambda: (_reporte_permisos_horas, anio),
+        "prestaciones": lambda: (
+            _reporte_prestaciones, fecha_inicio, fecha_fin,
+            _valor_enum(TipoPrestacion, tipo), _valor_enum(EstadoPrestacion, estado),
+        ),
+        "justificantes": lambda: (
+            _reporte_justificantes, fecha_inicio, fecha_fin, _valor_enum(TipoJustificante, tipo), empleado_id,
+        ),
+        "adeudos": lambda: (_reporte_adeudos, _valor_enum(EstadoAdeudo, estado)),
+        "extemporaneos": lambda: (_reporte_extemporaneos, fecha_inicio, fecha_fin),
+        "estadisticas-justificantes": lambda: (_reporte_estadisticas_justificantes, fecha_inicio, fecha_fin),
     }
 
-    resultado = handlers[reporte]()
+    funcion, *args = handlers[reporte]()
+    resultado = funcion(db, *args)
     items = resultado.datos
 
     # Convertir a filas
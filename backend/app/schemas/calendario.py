@@ -0,0 +1,42 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+from ..models.calendario_laboral import TipoDia
+
+
+class DiaCalendarioCreate(BaseModel):
+    fecha: date
+    fecha_fin: Optional[date] = None  # Para registrar un rango (ej. vacaciones)
+    tipo: TipoDia
+    descripcion: Optional[str] = None
+
+
+class DiaCalendarioUpdate(BaseModel):
+    tipo: Optional[TipoDia] = None
+    descripcion: Optional[str] = None
+
+
+class DiaCalendarioResponse(BaseModel):
+    id: int
+    fecha: date
+    tipo: TipoDia
+    descripcion: Optional[str] = None
+    anio: int
+
+    model_config = {"from_attributes": True}
+
+
+class DiaMesResponse(BaseModel):
+    fecha: date
+    estado: str  # laboral, fin_de_semana, festivo, vacacion, inhabil
+    laboral: bool
+    bloqueado_dia_economico: bool
+    motivo: Optional[str] = None
+
+
+class CalendarioMesResponse(BaseModel):
+    anio: int
+    mes: int
+    dias: list[DiaMesResponse]
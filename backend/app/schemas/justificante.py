@@ -1,7 +1,7 @@
 from datetime import date, datetime, time
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from ..models.justificante import EstadoJustificante, TipoJustificante
 
@@ -41,3 +41,30 @@ class ValidacionResponse(BaseModel):
     advertencias: list[str] = []
     fecha_inicio_calculada: Optional[date] = None
     fecha_fin_calculada: Optional[date] = None
+
+
+class FechaDisponible(BaseModel):
+    fecha_inicio: date
+    fecha_fin: date
+
+
+class FechasDisponiblesResponse(BaseModel):
+    empleado_id: int
+    fechas: list[FechaDisponible] = []
+
+
+class ValidacionLoteItem(BaseModel):
+    empleado_id: int
+    fecha: date
+    tipo: TipoJustificante
+
+
+class ValidacionLoteRequest(BaseModel):
+    items: list[ValidacionLoteItem] = Field(..., max_length=1000)
+
+
+class ValidacionLoteResultado(BaseModel):
+    empleado_id: int
+    fecha: date
+    tipo: TipoJustificante
+    resultado: ValidacionResponse
@@ -19,3 +19,8 @@ class NotificacionResponse(BaseModel):
 class NotificacionConteo(BaseModel):
     total: int
     no_leidas: int
+
+
+class TicketStream(BaseModel):
+    ticket: str
+    expira_en: int  # Segundos
@@ -3,6 +3,7 @@ from typing import Optional
 
 from pydantic import BaseModel
 
+from ..models.empleado import TipoEmpleado
 from ..models.prestacion import EstadoPrestacion, TipoPrestacion
 
 
@@ -46,6 +47,13 @@ class PrestacionValidacionResponse(BaseModel):
     dias_maximos: Optional[int] = None
 
 
+class ReglaPrestacionResponse(BaseModel):
+    tipo_empleado: TipoEmpleado
+    dias_maximos: Optional[int] = None
+    limite_anual: bool = False
+    verificaciones: list[str] = []
+
+
 class CatalogoPrestacion(BaseModel):
     tipo: TipoPrestacion
     nombre: str
@@ -53,3 +61,4 @@ class CatalogoPrestacion(BaseModel):
     dias_maximos: Optional[int] = None
     documentos_requeridos: list[str]
     requisitos: list[str]
+    reglas: list[ReglaPrestacionResponse] = []
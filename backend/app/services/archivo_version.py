@@ -0,0 +1,152 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from ..config import settings
+
+
+class ArchivoVersion:
+    """Archivo cuya fecha de modificacion avisa a los demas workers de un cambio.
+
+    Quien confirma un cambio en datos que los workers guardan en memoria
+    llama publicar(); cada worker llama cambio() antes de usar su copia (un
+    stat, mucho mas barato que volver a consultar la BD) y la descarta si
+    regresa True. Con ``ruta=None`` no hace nada (un solo proceso, pruebas).
+    """
+
+    def __init__(self, ruta: Optional[str]):
+        self.ruta = ruta
+        self._vista = self._leer()
+
+    def _leer(self) -> Tuple[int, int]:
+        # La fecha tiene la resolucion del reloj del kernel (milisegundos):
+        # publicar() crea un archivo nuevo, el inodo distingue dos cambios seguidos
+        if self.ruta is None:
+            return 0, 0
+        try:
+            estado = os.stat(self.ruta)
+        except FileNotFoundError:
+            return 0, 0
+        return estado.st_mtime_ns, estado.st_ino
+
+    def cambio(self) -> bool:
+        """True si alguien publico desde la ultima vez que se reviso."""
+        version = self._leer()
+        if version == self._vista:
+            return False
+        self._vista = version
+        return True
+
+    def publicar(self):
+        # No se actualiza _vista: si otro worker escribio al mismo tiempo su
+        # cambio no se pierde (este proceso descarta su copia una vez mas)
+        if self.ruta is None:
+            return
+        directorio = os.path.dirname(self.ruta) or "."
+        os.makedirs(directorio, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix=".version-")
+        with os.fdopen(descriptor, "w") as f:
+            f.write(str(time.time_ns()))
+        os.replace(temporal, self.ruta)
+
+
+class VersionesPorClave:
+    """Un archivo por clave (p. ej. empleado_id) en `directorio`: avisa cambios a los demas workers.
+
+    Quien confirma un cambio llama publicar(claves); version(clave) regresa la
+    (fecha, inodo) del archivo de esa clave, y cada worker compara con la que
+    tenia para descartar solo lo de esa clave. Una lectura se reutiliza
+    durante `intervalo_revision_ms`; lo que publica este proceso se ve al
+    momento. Con ``directorio=None`` las versiones son contadores en memoria.
+    """
+
+    def __init__(self, directorio: Optional[str], intervalo_revision_ms: int = 0):
+        self.directorio = directorio
+        self.intervalo = intervalo_revision_ms / 1000
+        # clave -> (version, time.monotonic() de la lectura)
+        self._vistas: Dict[int, Tuple[Tuple[int, int], float]] = {}
+        # clave -> (version antes, version despues) de la ultima publicacion de este proceso
+        self._publicadas: Dict[int, Tuple[Tuple[int, int], Tuple[int, int]]] = {}
+        self._publicaciones = 0
+        self._lock = threading.Lock()
+
+    def _ruta(self, clave: int) -> str:
+        return os.path.join(self.directorio, str(clave))
+
+    def _leer(self, clave: int) -> Tuple[int, int]:
+        if self.directorio is None:
+            vista = self._vistas.get(clave)
+            return vista[0] if vista else (0, 0)
+        try:
+            estado = os.stat(self._ruta(clave))
+        except FileNotFoundError:
+            return 0, 0
+        return estado.st_mtime_ns, estado.st_ino
+
+    def version(self, clave: int) -> Tuple[int, int]:
+        ahora = time.monotonic()
+        with self._lock:
+            vista = self._vistas.get(clave)
+            if vista is not None and (self.directorio is None or ahora - vista[1] < self.intervalo):
+                return vista[0]
+            publicaciones = self._publicaciones
+        version = self._leer(clave)
+        with self._lock:
+            # Si este proceso publico durante la lectura, la version leida ya es vieja
+            if publicaciones == self._publicaciones:
+                self._vistas[clave] = (version, ahora)
+            return self._vistas.get(clave, (version, ahora))[0]
+
+    def todas(self) -> Dict[int, Tuple[int, int]]:
+        """Version de cada clave publicada alguna vez (un recorrido del directorio)."""
+        if self.directorio is None:
+            with self._lock:
+                return {clave: vista[0] for clave, vista in self._vistas.items()}
+        ahora = time.monotonic()
+        with self._lock:
+            publicaciones = self._publicaciones
+        versiones = {}
+        try:
+            with os.scandir(self.directorio) as entradas:
+                for entrada in entradas:
+                    if entrada.name.isdigit():
+                        estado = entrada.stat()
+                        versiones[int(entrada.name)] = (estado.st_mtime_ns, estado.st_ino)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            if publicaciones == self._publicaciones:
+                self._vistas.update((clave, (version, ahora)) for clave, version in versiones.items())
+        return versiones
+
+    def publicar(self, claves: Iterable[int]):
+        if self.directorio is not None:
+            os.makedirs(self.directorio, exist_ok=True)
+        for clave in claves:
+            with self._lock:
+                self._publicaciones += 1
+                if self.directorio is None:
+                    anterior = self._leer(clave)
+                    self._vistas[clave] = ((anterior[0] + 1, 0), time.monotonic())
+                    self._publicadas[clave] = (anterior, self._vistas[clave][0])
+                    continue
+            anterior = self._leer(clave)
+            descriptor, temporal = tempfile.mkstemp(dir=self.directorio, prefix=".version-")
+            with os.fdopen(descriptor, "w") as f:
+                f.write(str(time.time_ns()))
+            os.replace(temporal, self._ruta(clave))
+            nueva = self._leer(clave)
+            with self._lock:
+                self._publicaciones += 1
+                self._vistas[clave] = (nueva, time.monotonic())
+                self._publicadas[clave] = (anterior, nueva)
+
+    def ultima_publicacion(self, clave: int) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """(version antes, version despues) de lo ultimo que publico este proceso para la clave."""
+        with self._lock:
+            return self._publicadas.get(clave)
+
+
+versiones_empleados = VersionesPorClave(settings.EMPLEADOS_VERSION_DIR, settings.EMPLEADOS_REVISION_MS)
@@ -0,0 +1,143 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import List
+
+from ..config import settings
+from ..database import engine
+from ..models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class _Vaciar:
+    """Marca en la cola: escribir lo pendiente y avisar (y terminar si `detener`)."""
+
+    def __init__(self, detener: bool = False):
+        self.detener = detener
+        self.listo = threading.Event()
+
+
+class EscritorAuditoria:
+    """Escribe audit_log fuera de la transaccion del request.
+
+    Modo "diferido": los eventos van a una cola acotada y un hilo los escribe
+    con executemany cada `lote` eventos o a los `intervalo_ms` del primero
+    pendiente. Si la cola se llena, quien registra espera (no se descartan
+    eventos). detener() escribe lo pendiente; se llama al apagar la app y
+    con atexit. Modo "sincrono": cada evento se escribe al registrarlo.
+    """
+
+    def __init__(self, modo: str, lote: int, intervalo_ms: int, maximo_cola: int):
+        self.modo = modo
+        self.lote = lote
+        self.intervalo = intervalo_ms / 1000
+        self._cola: queue.Queue = queue.Queue(maxsize=maximo_cola)
+        self._hilo: threading.Thread = None
+        self._lock = threading.Lock()
+        self.registrados = 0
+        self.escritos = 0
+        self.lotes = 0
+        self.errores = 0
+
+    def registrar(self, fila: dict):
+        self.registrados += 1
+        if self.modo == "sincrono":
+            self._insertar([fila])
+            return
+        self._iniciar()
+        self._cola.put(fila)
+
+    def vaciar(self, timeout: float = None):
+        """Espera a que se escriba todo lo registrado hasta ahora."""
+        self._enviar(_Vaciar(), timeout)
+
+    def detener(self, timeout: float = 10):
+        self._enviar(_Vaciar(detener=True), timeout)
+
+    def estadisticas(self) -> dict:
+        return {
+            "modo": self.modo,
+            # Incluye el lote que el hilo tiene en memoria
+            "pendientes": self.registrados - self.escritos,
+            "escritos": self.escritos,
+            "lotes": self.lotes,
+            "errores": self.errores,
+        }
+
+    def _enviar(self, marca: _Vaciar, timeout: float):
+        with self._lock:
+            hilo = self._hilo
+            if hilo is None or not hilo.is_alive():
+                return
+            if marca.detener:
+                self._hilo = None
+        self._cola.put(marca)
+        marca.listo.wait(timeout)
+        if marca.detener:
+            hilo.join(timeout)
+
+    def _iniciar(self):
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._hilo = threading.Thread(target=self._trabajar, name="escritor-auditoria", daemon=True)
+            self._hilo.start()
+        # Un solo registro aunque el hilo se reinicie despues de detener()
+        atexit.unregister(self.detener)
+        atexit.register(self.detener)
+
+    def _insertar(self, filas: List[dict]):
+        with engine.begin() as conn:
+            conn.execute(AuditLog.__table__.insert(), filas)
+        self.escritos += len(filas)
+        self.lotes += 1
+
+    def _trabajar(self):
+        pendientes: List[dict] = []
+        limite = 0.0
+        while True:
+            espera = max(0.0, limite - time.monotonic()) if pendientes else None
+            if len(pendientes) >= self.lote:
+                # Fallo la escritura de un lote lleno: no tomar mas de la cola
+                # hasta reintentar, asi la cola acotada frena a los productores
+                time.sleep(espera)
+                item = None
+            else:
+                try:
+                    item = self._cola.get(timeout=espera)
+                except queue.Empty:
+                    item = None
+
+            marca = item if isinstance(item, _Vaciar) else None
+            if item is not None and marca is None:
+                if not pendientes:
+                    limite = time.monotonic() + self.intervalo
+                pendientes.append(item)
+
+            if pendientes and (marca or len(pendientes) >= self.lote or time.monotonic() >= limite):
+                try:
+                    self._insertar(pendientes)
+                    pendientes = []
+                except Exception:
+                    # Se conservan las filas y se reintenta en el siguiente intervalo
+                    self.errores += 1
+                    logger.exception("No se pudieron escribir %d registros de auditoria", len(pendientes))
+                    limite = time.monotonic() + self.intervalo
+
+            if marca:
+                marca.listo.set()
+                if marca.detener:
+                    if pendientes:
+                        logger.error("Se perdieron %d registros de auditoria al detener", len(pendientes))
+                    return
+
+
+escritor_auditoria = EscritorAuditoria(
+    settings.AUDITORIA_MODO,
+    settings.AUDITORIA_LOTE,
+    settings.AUDITORIA_INTERVALO_MS,
+    settings.AUDITORIA_COLA_MAX,
+)
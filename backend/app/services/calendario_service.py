@@ -1,20 +1,183 @@
+import threading
+import time
+from bisect import bisect_right
+from calendar import isleap
+from collections import OrderedDict
 from datetime import date, timedelta
-from typing import List, Tuple
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
 
 from ..config import settings
+from ..database import SessionLocal
+from ..models.calendario_laboral import CalendarioLaboral, TipoDia
+from .archivo_version import ArchivoVersion
+
+
+class _IndiceAnual:
+    """Bitmap de dias laborales de un anio con su suma acumulada.
+
+    ``acumulado[i]`` es el numero de dias laborales desde el 1 de enero hasta
+    el dia ``i - 1`` del anio (inclusivo), de modo que contar los dias
+    laborales de cualquier rango dentro del anio son dos lecturas.
+    ``posiciones[k]`` es el inverso: el dia del anio del (k + 1)-esimo dia
+    laboral, para sumar o restar N dias laborales con una sola lectura.
+    """
+
+    __slots__ = ("anio", "inicio", "laborales", "vacaciones", "acumulado", "posiciones")
+
+    def __init__(self, anio: int, laborales: bytearray, vacaciones: bytearray):
+        self.anio = anio
+        self.inicio = date(anio, 1, 1)
+        self.laborales = laborales
+        self.vacaciones = vacaciones
+        acumulado = [0] * (len(laborales) + 1)
+        posiciones = []
+        total = 0
+        for i, laboral in enumerate(laborales):
+            if laboral:
+                total += 1
+                posiciones.append(i)
+            acumulado[i + 1] = total
+        self.acumulado = acumulado
+        self.posiciones = posiciones
+
+    @property
+    def total(self) -> int:
+        return self.acumulado[-1]
+
+    def ordinal(self, fecha: date) -> int:
+        return (fecha - self.inicio).days
+
+    def fecha_laboral(self, k: int) -> date:
+        """Fecha del k-esimo dia laboral del anio (k empieza en 1)."""
+        return self.inicio + timedelta(days=self.posiciones[k - 1])
+
+
+class _IntervalosBloqueo:
+    """Intervalos de fechas bloqueadas, ordenados y disjuntos, con su motivo.
+
+    Los intervalos se reciben en orden de prioridad: si dos se traslapan, la
+    fecha conserva el motivo del primero, igual que el recorrido original.
+    """
+
+    __slots__ = ("inicios", "fines", "motivos")
+
+    def __init__(self, intervalos: Iterable[Tuple[date, date, str]]):
+        intervalos = [(i, f, m) for i, f, m in intervalos if i <= f]
+        cortes = sorted(
+            {inicio for inicio, _, _ in intervalos}
+            | {fin + timedelta(days=1) for _, fin, _ in intervalos}
+        )
+        self.inicios: List[date] = []
+        self.fines: List[date] = []
+        self.motivos: List[str] = []
+        for desde, siguiente in zip(cortes, cortes[1:]):
+            motivo = next(
+                (m for inicio, fin, m in intervalos if inicio <= desde <= fin), None
+            )
+            if motivo is None:
+                continue
+            hasta = siguiente - timedelta(days=1)
+            if (
+                self.motivos
+                and self.motivos[-1] == motivo
+                and self.fines[-1] + timedelta(days=1) == desde
+            ):
+                self.fines[-1] = hasta
+            else:
+                self.inicios.append(desde)
+                self.fines.append(hasta)
+                self.motivos.append(motivo)
+
+    def buscar(self, fecha: date) -> Optional[str]:
+        i = bisect_right(self.inicios, fecha) - 1
+        if i >= 0 and fecha <= self.fines[i]:
+            return self.motivos[i]
+        return None
+
+
+_FALTANTE = object()
+
+
+class _CacheLRU:
+    """Diccionario acotado que descarta la entrada usada hace mas tiempo.
+
+    Se comparte entre los hilos del threadpool: cada operacion toma el lock,
+    asi una lectura no choca con un desalojo o una invalidacion simultanea.
+    """
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self._datos: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def get(self, clave, default=None):
+        with self._lock:
+            valor = self._datos.get(clave, _FALTANTE)
+            if valor is _FALTANTE:
+                return default
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar_si(self, clave, valor, condicion: Callable[[], bool]):
+        """Guarda solo si ``condicion()`` se cumple, evaluada dentro del lock."""
+        with self._lock:
+            if condicion():
+                self._datos[clave] = valor
+                self._datos.move_to_end(clave)
+                if len(self._datos) > self.maximo:
+                    self._datos.popitem(last=False)
+
+    def descartar(self, condicion: Callable[[Any], bool]):
+        """Quita las entradas cuya llave cumple ``condicion``."""
+        with self._lock:
+            for clave in [c for c in self._datos if condicion(c)]:
+                del self._datos[clave]
 
 
 class CalendarioService:
-    """Servicio para manejo de calendario laboral."""
+    """Servicio para manejo de calendario laboral.
+
+    Los indices de cada anio se construyen la primera vez que se consultan y
+    se guardan en caches LRU acotadas, de modo que un reporte de un anio
+    pasado solo carga los ciclos escolares que lo tocan.
+
+    Las recargas reemplazan los datos completos (no los modifican en sitio) y
+    cambian ``version`` antes de descartar indices; un indice calculado con
+    datos anteriores a la recarga ya no se guarda.
 
-    def __init__(self):
-        self._festivos_cache: dict[int, List[date]] = {}
-        self._vacaciones_cache: List[Tuple[date, date]] = []
-        self._cargar_vacaciones()
+    Con ``archivo_version`` los cambios se comparten entre workers: quien
+    recarga un anio actualiza el archivo y los demas, al ver que cambio
+    (un stat cada ``intervalo_revision_ms`` como maximo), vuelven a leer
+    calendario_laboral completo antes de usar sus indices.
+    """
+
+    def __init__(self, archivo_version: Optional[str] = None, intervalo_revision_ms: int = 0):
+        self._ciclos_cache: dict[str, List[Tuple[date, date]]] = {}
+        self._vacaciones_db: List[Tuple[date, date]] = []
+        self._dias_db: dict[int, dict[date, TipoDia]] = {}
+        self._busdaycal: Optional[Tuple[Tuple[int, int, int], np.busdaycalendar]] = None
+        self.version = 0
+        self._lock = threading.RLock()
+        self.archivo_version = ArchivoVersion(archivo_version)
+        self.intervalo_revision = intervalo_revision_ms / 1000
+        self._proxima_revision = 0.0
+        self.invalidar_indices()
+
+    def _guardar(self, cache: _CacheLRU, clave, valor, version: int):
+        """Guarda el valor si no hubo una recarga mientras se calculaba."""
+        cache.guardar_si(clave, valor, lambda: self.version == version)
 
     def _cargar_festivos(self, anio: int) -> List[date]:
-        if anio in self._festivos_cache:
-            return self._festivos_cache[anio]
+        festivos = self._festivos_cache.get(anio)
+        if festivos is not None:
+            return festivos
+        version = self.version
 
         if anio == 2026:
             festivos = [date(2026, m, d) for m, d in settings.FESTIVOS_2026]
@@ -62,15 +225,171 @@ class CalendarioService:
                 d += timedelta(days=1)
             festivos.append(d)
 
-        self._festivos_cache[anio] = festivos
+        # Ajustes capturados en la tabla calendario_laboral
+        dias_db = self._dias_db.get(anio)
+        if dias_db:
+            festivos = [f for f in festivos if dias_db.get(f) != TipoDia.LABORAL]
+            festivos += sorted(
+                f for f, tipo in dias_db.items()
+                if tipo == TipoDia.FESTIVO and f not in festivos
+            )
+
+        self._guardar(self._festivos_cache, anio, festivos, version)
         return festivos
 
-    def _cargar_vacaciones(self):
-        self._vacaciones_cache = []
-        for inicio_str, fin_str in settings.VACACIONES_2026:
-            inicio = date.fromisoformat(inicio_str)
-            fin = date.fromisoformat(fin_str)
-            self._vacaciones_cache.append((inicio, fin))
+    def _periodos_ciclo(self, ciclo: str) -> List[Tuple[date, date]]:
+        periodos = self._ciclos_cache.get(ciclo)
+        if periodos is None:
+            periodos = [
+                (date.fromisoformat(inicio_str), date.fromisoformat(fin_str))
+                for inicio_str, fin_str in settings.VACACIONES_POR_CICLO[ciclo]
+            ]
+            self._ciclos_cache[ciclo] = periodos
+        return periodos
+
+    def _vacaciones_entre(self, primer_anio: int, ultimo_anio: int) -> List[Tuple[date, date]]:
+        """Periodos de vacaciones que tocan los anios dados, en orden de prioridad.
+
+        Solo se leen los ciclos escolares ("2025-2026") que incluyen alguno de
+        esos anios; despues van los periodos capturados en calendario_laboral.
+        """
+        desde, hasta = date(primer_anio, 1, 1), date(ultimo_anio, 12, 31)
+        periodos = []
+        for ciclo in sorted(settings.VACACIONES_POR_CICLO):
+            anio_inicio, anio_fin = (int(a) for a in ciclo.split("-"))
+            if anio_fin < primer_anio or anio_inicio > ultimo_anio:
+                continue
+            periodos += [
+                (inicio, fin) for inicio, fin in self._periodos_ciclo(ciclo)
+                if fin >= desde and inicio <= hasta
+            ]
+        periodos += [
+            (inicio, fin) for inicio, fin in self._vacaciones_db
+            if fin >= desde and inicio <= hasta
+        ]
+        return periodos
+
+    def _periodos_vacaciones_db(self) -> List[Tuple[date, date]]:
+        """Agrupa los dias VACACION capturados en BD en periodos consecutivos."""
+        fechas = sorted(
+            fecha
+            for dias in self._dias_db.values()
+            for fecha, tipo in dias.items()
+            if tipo == TipoDia.VACACION
+        )
+        periodos: List[Tuple[date, date]] = []
+        for fecha in fechas:
+            if periodos and periodos[-1][1] + timedelta(days=1) == fecha:
+                periodos[-1] = (periodos[-1][0], fecha)
+            else:
+                periodos.append((fecha, fecha))
+        return periodos
+
+    def cargar_desde_db(self, db: Session):
+        """Carga todos los ajustes de calendario_laboral (se llama al iniciar)."""
+        dias_db: dict[int, dict[date, TipoDia]] = {}
+        for dia in db.query(CalendarioLaboral).all():
+            dias_db.setdefault(dia.anio, {})[dia.fecha] = dia.tipo
+        with self._lock:
+            self._dias_db = dias_db
+            self._vacaciones_db = self._periodos_vacaciones_db()
+            self.invalidar_indices()
+
+    def recargar_anio(self, db: Session, anio: int):
+        """Vuelve a leer un anio de calendario_laboral y reconstruye solo ese anio.
+
+        Se llama despues de confirmar el cambio; avisa a los demas workers.
+        """
+        dias = db.query(CalendarioLaboral).filter(CalendarioLaboral.anio == anio).all()
+        with self._lock:
+            dias_db = dict(self._dias_db)
+            if dias:
+                dias_db[anio] = {dia.fecha: dia.tipo for dia in dias}
+            else:
+                dias_db.pop(anio, None)
+            self._dias_db = dias_db
+            self._vacaciones_db = self._periodos_vacaciones_db()
+            self.invalidar_indices(anio)
+        self.archivo_version.publicar()
+
+    def revisar_cambios(self):
+        """Recarga desde la BD si otro worker publico cambios en el calendario."""
+        if self.archivo_version.ruta is None:
+            return
+        ahora = time.monotonic()
+        if ahora < self._proxima_revision:
+            return
+        self._proxima_revision = ahora + self.intervalo_revision
+        if not self.archivo_version.cambio():
+            return
+        db = SessionLocal()
+        try:
+            self.cargar_desde_db(db)
+        finally:
+            db.close()
+
+    def invalidar_indices(self, anio: Optional[int] = None):
+        """Descarta los indices precalculados; se reconstruyen al siguiente uso.
+
+        Debe llamarse siempre que cambien festivos o vacaciones. Con ``anio``
+        solo se descarta ese anio y los bloqueos de los anios vecinos, cuyas
+        ventanas de dias laborales pueden cruzar hacia el.
+        """
+        with self._lock:
+            self.version += 1
+            if anio is None:
+                maximo = settings.CALENDARIO_ANIOS_EN_CACHE
+                self._ciclos_cache = {}
+                self._festivos_cache = _CacheLRU(maximo)
+                self._indices = _CacheLRU(maximo)
+                self._bloqueos_vacaciones = _CacheLRU(maximo)
+                self._bloqueos_festivos = _CacheLRU(maximo)
+                self._mascaras = _CacheLRU(maximo)
+            else:
+                self._festivos_cache.descartar(lambda c: c == anio)
+                self._indices.descartar(lambda c: c == anio)
+                self._bloqueos_vacaciones.descartar(lambda c: abs(c[0] - anio) <= 1)
+                self._bloqueos_festivos.descartar(lambda c: abs(c - anio) <= 1)
+                self._mascaras.descartar(lambda c: abs(c[0] - anio) <= 1)
+
+    def _indice(self, anio: int) -> _IndiceAnual:
+        """Construye (una sola vez por anio) el bitmap de dias laborales."""
+        self.revisar_cambios()
+        indice = self._indices.get(anio)
+        if indice is not None:
+            return indice
+        version = self.version
+
+        inicio = date(anio, 1, 1)
+        num_dias = 366 if isleap(anio) else 365
+        laborales = bytearray(num_dias)
+        festivos = set(self._cargar_festivos(anio))
+        for i in range(num_dias):
+            fecha = inicio + timedelta(days=i)
+            if fecha.weekday() < 5 and fecha not in festivos:
+                laborales[i] = 1
+
+        fin = inicio + timedelta(days=num_dias - 1)
+        vacaciones = bytearray(num_dias)
+        for inicio_vac, fin_vac in self._vacaciones_entre(anio, anio):
+            desde = (max(inicio_vac, inicio) - inicio).days
+            hasta = (min(fin_vac, fin) - inicio).days
+            laborales[desde:hasta + 1] = bytes(hasta - desde + 1)
+            vacaciones[desde:hasta + 1] = b"\x01" * (hasta - desde + 1)
+
+        # LABORAL solo reabre dias entre semana; INHABIL cierra cualquier dia
+        for fecha, tipo in self._dias_db.get(anio, {}).items():
+            i = (fecha - inicio).days
+            if tipo == TipoDia.INHABIL:
+                laborales[i] = 0
+            elif tipo == TipoDia.LABORAL:
+                vacaciones[i] = 0
+                if fecha.weekday() < 5:
+                    laborales[i] = 1
+
+        indice = _IndiceAnual(anio, laborales, vacaciones)
+        self._guardar(self._indices, anio, indice, version)
+        return indice
 
     def es_fin_de_semana(self, fecha: date) -> bool:
         return fecha.weekday() >= 5
@@ -80,89 +399,278 @@ class CalendarioService:
         return fecha in festivos
 
     def esta_en_vacaciones(self, fecha: date) -> bool:
-        for inicio, fin in self._vacaciones_cache:
-            if inicio <= fecha <= fin:
-                return True
-        return False
+        indice = self._indice(fecha.year)
+        return indice.vacaciones[indice.ordinal(fecha)] == 1
 
     def es_dia_laboral(self, fecha: date) -> bool:
-        if self.es_fin_de_semana(fecha):
-            return False
-        if self.es_festivo(fecha):
-            return False
-        if self.esta_en_vacaciones(fecha):
-            return False
-        return True
+        indice = self._indice(fecha.year)
+        return indice.laborales[indice.ordinal(fecha)] == 1
 
     def calcular_dias_laborales(self, fecha_inicio: date, fecha_fin: date) -> int:
         """Cuenta dias laborales entre dos fechas (inclusivo)."""
         if fecha_inicio > fecha_fin:
             return 0
-        dias = 0
-        fecha_actual = fecha_inicio
-        while fecha_actual <= fecha_fin:
-            if self.es_dia_laboral(fecha_actual):
-                dias += 1
-            fecha_actual += timedelta(days=1)
+        indice_inicio = self._indice(fecha_inicio.year)
+        desde = indice_inicio.ordinal(fecha_inicio)
+        if fecha_inicio.year == fecha_fin.year:
+            hasta = indice_inicio.ordinal(fecha_fin)
+            return indice_inicio.acumulado[hasta + 1] - indice_inicio.acumulado[desde]
+
+        # Rango que cruza anios: resto del primero + anios completos + inicio del ultimo
+        dias = indice_inicio.total - indice_inicio.acumulado[desde]
+        for anio in range(fecha_inicio.year + 1, fecha_fin.year):
+            dias += self._indice(anio).total
+        indice_fin = self._indice(fecha_fin.year)
+        dias += indice_fin.acumulado[indice_fin.ordinal(fecha_fin) + 1]
         return dias
 
     def agregar_dias_laborales(self, fecha_inicio: date, num_dias: int) -> date:
         """Suma N dias laborales a una fecha."""
-        fecha_actual = fecha_inicio
-        dias_contados = 0
-        while dias_contados < num_dias:
-            fecha_actual += timedelta(days=1)
-            if self.es_dia_laboral(fecha_actual):
-                dias_contados += 1
-        return fecha_actual
+        if num_dias <= 0:
+            return fecha_inicio
+        indice = self._indice(fecha_inicio.year)
+        objetivo = indice.acumulado[indice.ordinal(fecha_inicio) + 1] + num_dias
+        while objetivo > indice.total:
+            objetivo -= indice.total
+            indice = self._indice(indice.anio + 1)
+        return indice.fecha_laboral(objetivo)
 
     def restar_dias_laborales(self, fecha_inicio: date, num_dias: int) -> date:
         """Resta N dias laborales a una fecha."""
-        fecha_actual = fecha_inicio
-        dias_contados = 0
-        while dias_contados < num_dias:
-            fecha_actual -= timedelta(days=1)
-            if self.es_dia_laboral(fecha_actual):
-                dias_contados += 1
-        return fecha_actual
+        if num_dias <= 0:
+            return fecha_inicio
+        indice = self._indice(fecha_inicio.year)
+        objetivo = indice.acumulado[indice.ordinal(fecha_inicio)] - num_dias + 1
+        while objetivo < 1:
+            indice = self._indice(indice.anio - 1)
+            objetivo += indice.total
+        return indice.fecha_laboral(objetivo)
 
     def obtener_siguiente_dia_laboral(self, fecha: date) -> date:
-        fecha_actual = fecha + timedelta(days=1)
-        while not self.es_dia_laboral(fecha_actual):
-            fecha_actual += timedelta(days=1)
-        return fecha_actual
+        return self.agregar_dias_laborales(fecha, 1)
+
+    def _limites_anio(self, anio: int) -> Tuple[date, date]:
+        return date(anio, 1, 1), date(anio, 12, 31)
+
+    def _indice_bloqueo_vacaciones(
+        self, anio: int, dias_antes: int, dias_despues: int
+    ) -> _IntervalosBloqueo:
+        clave = (anio, dias_antes, dias_despues)
+        bloqueos = self._bloqueos_vacaciones.get(clave)
+        if bloqueos is not None:
+            return bloqueos
+        version = self.version
+
+        primer_dia, ultimo_dia = self._limites_anio(anio)
+        intervalos = []
+        for inicio_vac, fin_vac in self._vacaciones_entre(anio - 1, anio + 1):
+            fecha_bloqueo_inicio = self.restar_dias_laborales(inicio_vac, dias_antes)
+            fecha_bloqueo_fin = self.agregar_dias_laborales(fin_vac, dias_despues)
+            intervalos.append((
+                max(fecha_bloqueo_inicio, primer_dia),
+                min(inicio_vac, ultimo_dia),
+                f"Bloqueado: {dias_antes} dias laborales antes de vacaciones ({inicio_vac})",
+            ))
+            intervalos.append((
+                max(fin_vac, primer_dia),
+                min(fecha_bloqueo_fin, ultimo_dia),
+                f"Bloqueado: {dias_despues} dias laborales despues de vacaciones ({fin_vac})",
+            ))
+
+        bloqueos = _IntervalosBloqueo(intervalos)
+        self._guardar(self._bloqueos_vacaciones, clave, bloqueos, version)
+        return bloqueos
+
+    def _indice_bloqueo_festivos(self, anio: int) -> _IntervalosBloqueo:
+        bloqueos = self._bloqueos_festivos.get(anio)
+        if bloqueos is not None:
+            return bloqueos
+        version = self.version
+
+        # Solo cuentan los festivos del mismo anio que la fecha consultada
+        intervalos = []
+        for festivo in self._cargar_festivos(anio):
+            dia_antes = self.restar_dias_laborales(festivo, 1)
+            dia_despues = self.agregar_dias_laborales(festivo, 1)
+            if dia_antes.year == anio:
+                intervalos.append((
+                    dia_antes, dia_antes,
+                    f"Bloqueado: 1 dia laboral antes de festivo ({festivo})",
+                ))
+            if dia_despues.year == anio:
+                intervalos.append((
+                    dia_despues, dia_despues,
+                    f"Bloqueado: 1 dia laboral despues de festivo ({festivo})",
+                ))
+
+        bloqueos = _IntervalosBloqueo(intervalos)
+        self._guardar(self._bloqueos_festivos, anio, bloqueos, version)
+        return bloqueos
 
     def esta_en_periodo_bloqueado_vacaciones(
         self, fecha: date, dias_antes: int = 15, dias_despues: int = 15
     ) -> Tuple[bool, str]:
         """Verifica si una fecha esta en periodo bloqueado alrededor de vacaciones."""
-        for inicio_vac, fin_vac in self._vacaciones_cache:
-            fecha_bloqueo_inicio = self.restar_dias_laborales(inicio_vac, dias_antes)
-            fecha_bloqueo_fin = self.agregar_dias_laborales(fin_vac, dias_despues)
-
-            if fecha_bloqueo_inicio <= fecha <= inicio_vac:
-                return True, f"Bloqueado: {dias_antes} dias laborales antes de vacaciones ({inicio_vac})"
-            if fin_vac <= fecha <= fecha_bloqueo_fin:
-                return True, f"Bloqueado: {dias_despues} dias laborales despues de vacaciones ({fin_vac})"
+        motivo = self._indice_bloqueo_vacaciones(fecha.year, dias_antes, dias_despues).buscar(fecha)
+        if motivo:
+            return True, motivo
         return False, ""
 
     def esta_cerca_de_festivo(self, fecha: date) -> Tuple[bool, str]:
         """Verifica si la fecha es 1 dia laboral antes o despues de un festivo."""
-        festivos = self._cargar_festivos(fecha.year)
-        for festivo in festivos:
-            dia_antes = self.restar_dias_laborales(festivo, 1)
-            dia_despues = self.agregar_dias_laborales(festivo, 1)
-            if fecha == dia_antes:
-                return True, f"Bloqueado: 1 dia laboral antes de festivo ({festivo})"
-            if fecha == dia_despues:
-                return True, f"Bloqueado: 1 dia laboral despues de festivo ({festivo})"
+        motivo = self._indice_bloqueo_festivos(fecha.year).buscar(fecha)
+        if motivo:
+            return True, motivo
         return False, ""
 
+    def mascara_dias_libres(
+        self,
+        anio: int,
+        dias_antes: int = 15,
+        dias_despues: int = 15,
+        dias_semana: Tuple[int, ...] = (0, 1, 2, 3, 4),
+    ) -> bytearray:
+        """Bitmap del anio: 1 si el dia es laboral, cae en ``dias_semana`` y no
+        esta bloqueado por vacaciones ni por cercania a festivo.
+
+        Sirve para buscar fechas validas con ``bytearray.find`` en lugar de
+        evaluar cada fecha candidata por separado.
+        """
+        clave = (anio, dias_antes, dias_despues, dias_semana)
+        mascara = self._mascaras.get(clave)
+        if mascara is not None:
+            return mascara
+        version = self.version
+
+        indice = self._indice(anio)
+        mascara = bytearray(indice.laborales)
+        for i in range(len(mascara)):
+            if (indice.inicio + timedelta(days=i)).weekday() not in dias_semana:
+                mascara[i] = 0
+        for bloqueos in (
+            self._indice_bloqueo_vacaciones(anio, dias_antes, dias_despues),
+            self._indice_bloqueo_festivos(anio),
+        ):
+            for inicio, fin in zip(bloqueos.inicios, bloqueos.fines):
+                desde, hasta = indice.ordinal(inicio), indice.ordinal(fin)
+                mascara[desde:hasta + 1] = bytes(hasta - desde + 1)
+
+        self._guardar(self._mascaras, clave, mascara, version)
+        return mascara
+
+    def dias_del_mes(self, anio: int, mes: int) -> List[Tuple[date, str, bool]]:
+        """(fecha, estado, es_laboral) de cada dia del mes, leidos del indice anual.
+
+        Estados: laboral, fin_de_semana, festivo, vacacion, inhabil (mismo orden
+        de prioridad que validar_fecha_laboral).
+        """
+        indice = self._indice(anio)
+        festivos = set(self._cargar_festivos(anio))
+        primero = date(anio, mes, 1)
+        ultimo = date(anio + 1, 1, 1) if mes == 12 else date(anio, mes + 1, 1)
+
+        dias = []
+        for i in range(indice.ordinal(primero), indice.ordinal(ultimo)):
+            fecha = indice.inicio + timedelta(days=i)
+            if indice.laborales[i]:
+                estado = "laboral"
+            elif fecha.weekday() >= 5:
+                estado = "fin_de_semana"
+            elif fecha in festivos:
+                estado = "festivo"
+            elif indice.vacaciones[i]:
+                estado = "vacacion"
+            else:
+                estado = "inhabil"
+            dias.append((fecha, estado, estado == "laboral"))
+        return dias
+
+    # --- Operaciones vectorizadas (numpy) ---
+
+    def _calendario_numpy(self, primer_anio: int, ultimo_anio: int) -> np.busdaycalendar:
+        """busdaycalendar equivalente a los indices anuales para esos anios.
+
+        Los festivos, vacaciones y dias inhabiles entre semana se pasan como
+        ``holidays``, tomados directamente de los bitmaps para que los
+        resultados coincidan con los metodos escalares.
+        """
+        clave = (primer_anio, ultimo_anio, self.version)
+        if self._busdaycal is not None and self._busdaycal[0] == clave:
+            return self._busdaycal[1]
+
+        no_laborales = []
+        for anio in range(primer_anio, ultimo_anio + 1):
+            indice = self._indice(anio)
+            for i, laboral in enumerate(indice.laborales):
+                fecha = indice.inicio + timedelta(days=i)
+                if not laboral and fecha.weekday() < 5:
+                    no_laborales.append(fecha)
+        calendario = np.busdaycalendar(
+            weekmask="1111100", holidays=np.array(no_laborales, dtype="datetime64[D]")
+        )
+        self._busdaycal = (clave, calendario)
+        return calendario
+
+    @staticmethod
+    def _anios(fechas: np.ndarray) -> Tuple[int, int]:
+        anios = fechas.astype("datetime64[Y]").astype(int) + 1970
+        return int(anios.min()), int(anios.max())
+
+    def calcular_dias_laborales_lote(
+        self, fechas_inicio: Sequence[date], fechas_fin: Sequence[date]
+    ) -> np.ndarray:
+        """Version vectorizada de calcular_dias_laborales para muchos rangos."""
+        inicios = np.asarray(fechas_inicio, dtype="datetime64[D]")
+        fines = np.asarray(fechas_fin, dtype="datetime64[D]")
+        if inicios.size == 0:
+            return np.zeros(0, dtype=int)
+
+        primer_anio, ultimo_anio = self._anios(np.concatenate([inicios, fines]))
+        calendario = self._calendario_numpy(primer_anio, ultimo_anio)
+        conteos = np.busday_count(inicios, fines + 1, busdaycal=calendario)
+        return np.where(inicios > fines, 0, conteos)
+
+    def agregar_dias_laborales_lote(
+        self, fechas: Sequence[date], num_dias: Sequence[int]
+    ) -> np.ndarray:
+        """Version vectorizada de agregar/restar_dias_laborales.
+
+        ``num_dias`` positivo equivale a agregar_dias_laborales y negativo a
+        restar_dias_laborales; con 0 se regresa la misma fecha.
+        """
+        fechas = np.asarray(fechas, dtype="datetime64[D]")
+        num_dias = np.broadcast_to(np.asarray(num_dias, dtype=int), fechas.shape)
+        if fechas.size == 0:
+            return fechas.copy()
+
+        # Margen de anios para cubrir el desplazamiento mas largo (>= 150 dias laborales/anio)
+        margen = int(np.abs(num_dias).max()) // 150 + 1
+        primer_anio, ultimo_anio = self._anios(fechas)
+        calendario = self._calendario_numpy(primer_anio - margen, ultimo_anio + margen)
+
+        resultado = fechas.copy()
+        adelante = num_dias > 0
+        atras = num_dias < 0
+        # Si la fecha no es laboral se ajusta al dia laboral previo (o siguiente al
+        # restar); asi el N-esimo dia laboral cuenta a partir de la fecha original.
+        resultado[adelante] = np.busday_offset(
+            fechas[adelante], num_dias[adelante], roll="backward", busdaycal=calendario
+        )
+        resultado[atras] = np.busday_offset(
+            fechas[atras], num_dias[atras], roll="forward", busdaycal=calendario
+        )
+        return resultado
+
     def obtener_festivos(self, anio: int) -> List[date]:
         return self._cargar_festivos(anio)
 
-    def obtener_vacaciones(self) -> List[Tuple[date, date]]:
-        return self._vacaciones_cache
+    def obtener_vacaciones(self, anio: Optional[int] = None) -> List[Tuple[date, date]]:
+        if anio is not None:
+            return self._vacaciones_entre(anio, anio)
+        periodos = []
+        for ciclo in sorted(settings.VACACIONES_POR_CICLO):
+            periodos += self._periodos_ciclo(ciclo)
+        return periodos + self._vacaciones_db
 
 
-calendario_service = CalendarioService()
+calendario_service = CalendarioService(settings.CALENDARIO_VERSION_ARCHIVO, settings.CALENDARIO_REVISION_MS)
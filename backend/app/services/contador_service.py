@@ -0,0 +1,137 @@
+from datetime import date, datetime
+from typing import Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..database import abrir_transaccion
+from ..models.contador import Contador, ContadorQuincena
+from ..utils.helpers import obtener_quincena
+from .validaciones_cache import marcar_empleado_modificado
+
+
+class ContadorOcupadoError(Exception):
+    """El contador cambio en cada reintento (demasiadas solicitudes simultaneas)."""
+
+
+def obtener_o_crear_contador(db: Session, empleado_id: int, anio: int) -> Contador:
+    """Contador del empleado y anio; lo crea si no existe.
+
+    Si otra solicitud lo crea al mismo tiempo, la restriccion unica
+    (empleado_id, anio) rechaza el segundo INSERT y se usa el existente.
+    El contador nuevo se confirma con el commit del llamador.
+    """
+    query = db.query(Contador).filter(
+        Contador.empleado_id == empleado_id, Contador.anio == anio
+    )
+    contador = query.first()
+    if contador:
+        return contador
+    abrir_transaccion(db)
+    try:
+        with db.begin_nested():
+            contador = Contador(empleado_id=empleado_id, anio=anio)
+            db.add(contador)
+    except IntegrityError:
+        contador = query.one()
+    return contador
+
+
+def actualizar_contador(
+    db: Session,
+    contador: Contador,
+    incrementos: dict,
+    valores: dict = None,
+) -> bool:
+    """UPDATE atomico del contador solo si sigue en la version leida.
+
+    Retorna False si otra solicitud lo modifico desde que se leyo; en ese
+    caso hay que volver a leerlo y validar de nuevo.
+    """
+    cambios = {getattr(Contador, campo): getattr(Contador, campo) + n for campo, n in incrementos.items()}
+    cambios.update({getattr(Contador, campo): valor for campo, valor in (valores or {}).items()})
+    cambios[Contador.version] = Contador.version + 1
+    cambios[Contador.updated_at] = datetime.utcnow()
+
+    marcar_empleado_modificado(db, contador.empleado_id)
+    actualizadas = (
+        db.query(Contador)
+        .filter(Contador.id == contador.id, Contador.version == contador.version)
+        .update(cambios, synchronize_session=False)
+    )
+    # Forzar relectura: con exito para ver los nuevos valores, sin exito para reintentar
+    db.expire(contador)
+    return actualizadas == 1
+
+
+def incrementar_contador(db: Session, empleado_id: int, anio: int, incrementos: dict):
+    """Suma valores al contador sin condicion de version (no hay regla que validar)."""
+    contador = obtener_o_crear_contador(db, empleado_id, anio)
+    cambios = {getattr(Contador, campo): getattr(Contador, campo) + n for campo, n in incrementos.items()}
+    cambios[Contador.version] = Contador.version + 1
+    cambios[Contador.updated_at] = datetime.utcnow()
+    marcar_empleado_modificado(db, empleado_id)
+    db.query(Contador).filter(Contador.id == contador.id).update(cambios, synchronize_session=False)
+    db.expire(contador)
+
+
+def permisos_en_quincena(db: Session, empleado_id: int, fecha: date) -> int:
+    """Permisos por horas del empleado en la quincena de la fecha (lectura por PK)."""
+    permisos = (
+        db.query(ContadorQuincena.permisos_horas)
+        .filter_by(
+            empleado_id=empleado_id,
+            anio=fecha.year,
+            mes=fecha.month,
+            quincena=obtener_quincena(fecha),
+        )
+        .scalar()
+    )
+    return permisos or 0
+
+
+def permisos_horas_del_anio(db: Session, empleado_id: int, anio: int) -> Tuple[int, int]:
+    """(primeras quincenas, segundas quincenas): permisos por horas del anio."""
+    totales = dict(
+        db.query(ContadorQuincena.quincena, func.sum(ContadorQuincena.permisos_horas))
+        .filter_by(empleado_id=empleado_id, anio=anio)
+        .group_by(ContadorQuincena.quincena)
+        .all()
+    )
+    return totales.get(1) or 0, totales.get(2) or 0
+
+
+def registrar_permiso_horas(db: Session, empleado_id: int, fecha: date, maximo: int) -> bool:
+    """Suma un permiso por horas si la quincena no ha llegado al maximo.
+
+    El limite se comprueba en el mismo UPDATE, asi dos solicitudes
+    simultaneas no pueden pasar ambas del maximo. No hace commit: se
+    confirma junto con el justificante. contadores_quincena es el unico
+    registro de permisos por horas (los totales del anio salen de ahi).
+    """
+    quincena = obtener_quincena(fecha)
+    clave = dict(empleado_id=empleado_id, anio=fecha.year, mes=fecha.month, quincena=quincena)
+    marcar_empleado_modificado(db, empleado_id)
+
+    def _incrementar() -> bool:
+        return (
+            db.query(ContadorQuincena)
+            .filter_by(**clave)
+            .filter(ContadorQuincena.permisos_horas < maximo)
+            .update(
+                {ContadorQuincena.permisos_horas: ContadorQuincena.permisos_horas + 1},
+                synchronize_session=False,
+            )
+        ) == 1
+
+    registrado = _incrementar()
+    if not registrado and maximo > 0 and not permisos_en_quincena(db, empleado_id, fecha):
+        try:
+            with db.begin_nested():
+                db.add(ContadorQuincena(**clave, permisos_horas=1))
+            registrado = True
+        except IntegrityError:
+            # Otra solicitud creo la fila primero
+            registrado = _incrementar()
+    return registrado
@@ -0,0 +1,37 @@
+from datetime import date
+
+from sqlalchemy import and_, not_, or_
+
+from ..models.empleado import MESES_ANTIGUEDAD_MINIMA, Empleado, TipoNombramiento, fecha_corte_antiguedad
+
+__all__ = [
+    "MESES_ANTIGUEDAD_MINIMA", "NOMBRAMIENTOS_EXCLUIDOS",
+    "condicion_elegible", "fecha_corte_antiguedad", "filtrar_elegibles",
+]
+
+# Nombramientos que NO pueden acceder a prestaciones
+NOMBRAMIENTOS_EXCLUIDOS = {
+    TipoNombramiento.INTERINO,
+    TipoNombramiento.LIMITADO,
+    TipoNombramiento.GRAVIDEZ,
+    TipoNombramiento.PREJUBILATORIO,
+    TipoNombramiento.HONORARIOS,
+}
+
+
+def condicion_elegible(hoy: date = None):
+    """Condicion SQL: empleado con antiguedad minima y nombramiento con prestaciones."""
+    corte = fecha_corte_antiguedad(hoy or date.today())
+    return and_(
+        Empleado.fecha_ingreso <= corte,
+        or_(
+            Empleado.nombramiento.is_(None),
+            Empleado.nombramiento.notin_(NOMBRAMIENTOS_EXCLUIDOS),
+        ),
+    )
+
+
+def filtrar_elegibles(query, elegible: bool = True, hoy: date = None):
+    """Aplica el filtro de elegibilidad a prestaciones en la consulta (lo evalua la BD)."""
+    condicion = condicion_elegible(hoy)
+    return query.filter(condicion if elegible else not_(condicion))
@@ -1,6 +1,15 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from ..models.notificacion import Notificacion
+from ..database import abrir_transaccion
+from ..models.notificacion import ContadorNotificaciones, Notificacion
+from ..models.user import User, UserRole
+from .notificaciones_canal import marcar_usuarios_notificados
+from .principales_cache import cache_principales
 
 
 def crear_notificacion(
@@ -17,11 +26,46 @@ def crear_notificacion(
         enlace=enlace,
     )
     db.add(notif)
+    db.flush()
+    _sumar_a_contadores(db, [usuario_id], total=1, no_leidas=1)
     db.commit()
     db.refresh(notif)
     return notif
 
 
+def crear_notificaciones_masivas(
+    db: Session,
+    usuario_ids: Iterable[int],
+    tipo: str,
+    mensaje: str,
+    enlace: str = None,
+) -> int:
+    """Una notificacion por usuario en un solo INSERT; se confirma con el commit del llamador."""
+    usuario_ids = list(dict.fromkeys(usuario_ids))
+    ahora = datetime.utcnow()
+    filas = [
+        dict(usuario_id=usuario_id, tipo=tipo, mensaje=mensaje, enlace=enlace, leida=False, created_at=ahora)
+        for usuario_id in usuario_ids
+    ]
+    if filas:
+        db.execute(insert(Notificacion), filas)
+        _sumar_a_contadores(db, usuario_ids, total=1, no_leidas=1)
+        marcar_usuarios_notificados(db, usuario_ids)
+    return len(filas)
+
+
+def ids_admins_activos(db: Session) -> Tuple[int, ...]:
+    return cache_principales.admins_activos(lambda: tuple(
+        user_id for (user_id,) in db.query(User.id)
+        .filter(User.role.in_([UserRole.ROOT, UserRole.ADMIN]), User.active == True)
+        .order_by(User.id)
+    ))
+
+
+def notificar_admins(db: Session, tipo: str, mensaje: str, enlace: str = None) -> int:
+    return crear_notificaciones_masivas(db, ids_admins_activos(db), tipo, mensaje, enlace)
+
+
 def obtener_notificaciones(db: Session, usuario_id: int, solo_no_leidas: bool = False):
     query = db.query(Notificacion).filter(Notificacion.usuario_id == usuario_id)
     if solo_no_leidas:
@@ -29,23 +73,78 @@ def obtener_notificaciones(db: Session, usuario_id: int, solo_no_leidas: bool =
     return query.order_by(Notificacion.created_at.desc()).all()
 
 
-def contar_no_leidas(db: Session, usuario_id: int) -> int:
+def obtener_notificaciones_desde(
+    db: Session, usuario_id: int, desde_id: int, creadas_desde: Optional[datetime] = None
+):
+    """Notificaciones con id mayor a `desde_id` (las nuevas para /stream), mas recientes primero.
+
+    Con `creadas_desde` incluye tambien las creadas a partir de esa fecha
+    aunque tengan id menor: los ids no se confirman en orden y una puede
+    aparecer despues de otra con id mayor. El llamador descarta las que ya
+    envio.
+    """
+    condicion = Notificacion.id > desde_id
+    if creadas_desde is not None:
+        condicion = or_(condicion, Notificacion.created_at >= creadas_desde)
     return (
         db.query(Notificacion)
-        .filter(Notificacion.usuario_id == usuario_id, Notificacion.leida == False)
-        .count()
+        .filter(Notificacion.usuario_id == usuario_id, condicion)
+        .order_by(Notificacion.id.desc())
+        .all()
+    )
+
+
+def obtener_notificaciones_recientes(db: Session, usuario_id: int, limite: int):
+    return (
+        db.query(Notificacion)
+        .filter(Notificacion.usuario_id == usuario_id)
+        .order_by(Notificacion.id.desc())
+        .limit(limite)
+        .all()
     )
 
 
+def ids_notificaciones_creadas_desde(
+    db: Session, usuario_id: int, creadas_desde: datetime
+) -> List[Tuple[int, datetime]]:
+    return db.query(Notificacion.id, Notificacion.created_at).filter(
+        Notificacion.usuario_id == usuario_id, Notificacion.created_at >= creadas_desde
+    ).all()
+
+
+def obtener_conteo(db: Session, usuario_id: int) -> Tuple[int, int]:
+    """(total, no_leidas) del usuario con una lectura por llave primaria.
+
+    Si el usuario aun no tiene contador (BD anteriores a la tabla) se
+    calcula desde notificaciones sin guardarlo: la consulta no escribe. El
+    contador se crea con la siguiente notificacion del usuario o al
+    marcar una leida.
+    """
+    contador = db.get(ContadorNotificaciones, usuario_id)
+    if contador is None:
+        return _contar_notificaciones(db, usuario_id)
+    return contador.total, contador.no_leidas
+
+
 def marcar_leida(db: Session, notificacion_id: int, usuario_id: int) -> bool:
-    notif = (
+    # Condicion leida == False en el mismo UPDATE: dos pestanas no descuentan dos veces
+    actualizadas = (
         db.query(Notificacion)
-        .filter(Notificacion.id == notificacion_id, Notificacion.usuario_id == usuario_id)
-        .first()
+        .filter(
+            Notificacion.id == notificacion_id,
+            Notificacion.usuario_id == usuario_id,
+            Notificacion.leida == False,
+        )
+        .update({"leida": True}, synchronize_session=False)
     )
-    if not notif:
-        return False
-    notif.leida = True
+    if not actualizadas:
+        return db.query(
+            db.query(Notificacion)
+            .filter(Notificacion.id == notificacion_id, Notificacion.usuario_id == usuario_id)
+            .exists()
+        ).scalar()
+    _sumar_a_contadores(db, [usuario_id], no_leidas=-1)
+    marcar_usuarios_notificados(db, [usuario_id])
     db.commit()
     return True
 
@@ -56,5 +155,64 @@ def marcar_todas_leidas(db: Session, usuario_id: int) -> int:
         .filter(Notificacion.usuario_id == usuario_id, Notificacion.leida == False)
         .update({"leida": True})
     )
+    if count:
+        _sumar_a_contadores(db, [usuario_id], no_leidas=-count)
+        marcar_usuarios_notificados(db, [usuario_id])
     db.commit()
     return count
+
+
+def _sumar_a_contadores(db: Session, usuario_ids: Iterable[int], total: int = 0, no_leidas: int = 0):
+    """UPDATE atomico de los contadores; los que no existen se crean desde notificaciones.
+
+    Se llama despues de escribir las notificaciones en la misma transaccion,
+    asi el calculo de un contador nuevo ya las incluye.
+    """
+    usuario_ids = sorted(set(usuario_ids))
+    sumar = (
+        update(ContadorNotificaciones)
+        .values(
+            total=ContadorNotificaciones.total + total,
+            no_leidas=ContadorNotificaciones.no_leidas + no_leidas,
+        )
+        .returning(ContadorNotificaciones.usuario_id)
+        .execution_options(synchronize_session=False)
+    )
+    # RETURNING dice exactamente cuales se actualizaron (un SELECT aparte
+    # veria tambien los que otra transaccion creo despues del UPDATE)
+    actualizados = set(db.execute(
+        sumar.where(ContadorNotificaciones.usuario_id.in_(usuario_ids))
+    ).scalars())
+    for usuario_id in usuario_ids:
+        if usuario_id not in actualizados and _crear_contador(db, usuario_id) is None:
+            # Otra transaccion lo creo primero (sin estos cambios): sumarlos
+            db.execute(sumar.where(ContadorNotificaciones.usuario_id == usuario_id))
+
+
+def _contar_notificaciones(db: Session, usuario_id: int) -> Tuple[int, int]:
+    total, no_leidas = (
+        db.query(
+            func.count(Notificacion.id),
+            func.coalesce(func.sum(case((Notificacion.leida == False, 1), else_=0)), 0),
+        )
+        .filter(Notificacion.usuario_id == usuario_id)
+        .one()
+    )
+    return total, no_leidas
+
+
+def _crear_contador(db: Session, usuario_id: int):
+    """Crea el contador contando las notificaciones del usuario.
+
+    Retorna None si otra transaccion lo creo al mismo tiempo (la llave
+    primaria rechaza el segundo INSERT).
+    """
+    total, no_leidas = _contar_notificaciones(db, usuario_id)
+    abrir_transaccion(db)
+    try:
+        with db.begin_nested():
+            contador = ContadorNotificaciones(usuario_id=usuario_id, total=total, no_leidas=no_leidas)
+            db.add(contador)
+    except IntegrityError:
+        return None
+    return contador
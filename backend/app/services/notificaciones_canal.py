@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import async_engine
+from ..models.notificacion import EventoNotificacion, Notificacion
+
+logger = logging.getLogger(__name__)
+
+# Clave en Session.info con los usuarios cuyas notificaciones cambiaron en la transaccion
+_USUARIOS_NOTIFICADOS = "usuarios_notificados"
+
+# Identifica a este worker en eventos_notificacion
+_ORIGEN = uuid.uuid4().hex
+
+
+class CanalNotificaciones:
+    """Pub/sub en proceso: usuario_id -> conexiones SSE abiertas.
+
+    Cada conexion tiene una cola de un elemento: varios avisos seguidos se
+    juntan en uno y la conexion consulta los cambios una sola vez.
+    avisar() se puede llamar desde cualquier hilo.
+    """
+
+    def __init__(self):
+        self._suscriptores: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+        self.avisos = 0
+
+    def suscribir(self, usuario_id: int) -> asyncio.Queue:
+        cola = asyncio.Queue(maxsize=1)
+        with self._lock:
+            self._suscriptores.setdefault(usuario_id, set()).add((asyncio.get_running_loop(), cola))
+        return cola
+
+    def desuscribir(self, usuario_id: int, cola: asyncio.Queue):
+        with self._lock:
+            conexiones = self._suscriptores.get(usuario_id, set())
+            conexiones.difference_update([c for c in conexiones if c[1] is cola])
+            if not conexiones:
+                self._suscriptores.pop(usuario_id, None)
+
+    def avisar(self, usuario_ids: Iterable[int]):
+        with self._lock:
+            conexiones = [c for u in usuario_ids for c in self._suscriptores.get(u, ())]
+        for loop, cola in conexiones:
+            try:
+                loop.call_soon_threadsafe(_senalar, cola)
+            except RuntimeError:
+                # El loop de la conexion ya cerro
+                pass
+        self.avisos += len(conexiones)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "usuarios": len(self._suscriptores),
+                "conexiones": sum(len(c) for c in self._suscriptores.values()),
+                "avisos": self.avisos,
+            }
+
+
+def _senalar(cola: asyncio.Queue):
+    if cola.empty():
+        cola.put_nowait(None)
+
+
+class BackendLocal:
+    """Un solo worker: basta con avisar a las conexiones de este proceso."""
+
+    nombre = "local"
+
+    def registrar(self, db: Session, usuario_ids: Iterable[int]):
+        pass
+
+    async def iniciar(self):
+        pass
+
+    async def detener(self):
+        pass
+
+
+class BackendSondeo:
+    """Varios workers: cada cambio deja una fila en eventos_notificacion.
+
+    La fila se escribe en la misma transaccion que la notificacion. Cada
+    worker consulta las filas nuevas de los demas cada `intervalo_ms` (una
+    consulta por la llave primaria, sin importar cuantas conexiones tenga)
+    y avisa a sus conexiones. Las filas viejas se borran periodicamente.
+
+    Los ids no se confirman en orden (en PostgreSQL una transaccion que tomo
+    el id 10 puede confirmar despues de la que tomo el 11): los ids que se
+    saltan quedan como huecos y se vuelven a buscar en cada consulta hasta
+    que aparecen o pasa `espera_huecos` (transaccion revertida).
+    """
+
+    nombre = "sondeo"
+    retencion = timedelta(minutes=10)
+    espera_huecos = timedelta(minutes=2)
+    maximo_huecos = 1000
+
+    def __init__(self, canal: CanalNotificaciones, intervalo_ms: int):
+        self.canal = canal
+        self.intervalo = intervalo_ms / 1000
+        self._tarea: asyncio.Task = None
+
+    def registrar(self, db: Session, usuario_ids: Iterable[int]):
+        filas = [{"usuario_id": u, "origen": _ORIGEN} for u in usuario_ids]
+        if filas:
+            db.connection().execute(insert(EventoNotificacion.__table__), filas)
+
+    async def iniciar(self):
+        async with async_engine.connect() as conn:
+            ultimo = (await conn.execute(select(func.max(EventoNotificacion.id)))).scalar() or 0
+        self._tarea = asyncio.create_task(self._sondear(ultimo))
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            await asyncio.gather(self._tarea, return_exceptions=True)
+            self._tarea = None
+
+    async def _sondear(self, ultimo: int):
+        huecos: Dict[int, float] = {}  # id faltante -> time.monotonic() al detectarlo
+        vueltas = 0
+        while True:
+            await asyncio.sleep(self.intervalo)
+            condicion = EventoNotificacion.id > ultimo
+            if huecos:
+                condicion = or_(condicion, EventoNotificacion.id.in_(list(huecos)))
+            try:
+                async with async_engine.begin() as conn:
+                    filas = (await conn.execute(
+                        select(EventoNotificacion.id, EventoNotificacion.usuario_id, EventoNotificacion.origen)
+                        .where(condicion)
+                        .order_by(EventoNotificacion.id)
+                    )).all()
+                    vueltas += 1
+                    if vueltas * self.intervalo >= self.retencion.total_seconds():
+                        vueltas = 0
+                        await conn.execute(delete(EventoNotificacion).where(
+                            EventoNotificacion.created_at < datetime.utcnow() - self.retencion
+                        ))
+            except Exception:
+                logger.exception("No se pudieron consultar los eventos de notificaciones")
+                continue
+            ultimo = self._actualizar_huecos(huecos, ultimo, [f.id for f in filas])
+            if filas:
+                self.canal.avisar({f.usuario_id for f in filas if f.origen != _ORIGEN})
+
+    def _actualizar_huecos(self, huecos: Dict[int, float], ultimo: int, ids: List[int]) -> int:
+        """Quita de `huecos` los ids leidos, agrega los saltados y regresa el nuevo ultimo id."""
+        ahora = time.monotonic()
+        for id_ in ids:
+            huecos.pop(id_, None)
+            if id_ > ultimo:
+                huecos.update(dict.fromkeys(range(max(ultimo + 1, id_ - self.maximo_huecos), id_), ahora))
+                ultimo = id_
+        limite = ahora - self.espera_huecos.total_seconds()
+        for id_ in [i for i, detectado in huecos.items() if detectado < limite]:
+            del huecos[id_]
+        for id_ in sorted(huecos)[:max(0, len(huecos) - self.maximo_huecos)]:
+            del huecos[id_]
+        return ultimo
+
+
+canal_notificaciones = CanalNotificaciones()
+
+if settings.NOTIFICACIONES_BACKEND == "sondeo":
+    backend_notificaciones = BackendSondeo(canal_notificaciones, settings.NOTIFICACIONES_SONDEO_MS)
+else:
+    backend_notificaciones = BackendLocal()
+
+
+def marcar_usuarios_notificados(db: Session, usuario_ids: Iterable[int]):
+    """Para INSERT/UPDATE masivos de notificaciones que no pasan por el flush del ORM."""
+    usuario_ids = set(usuario_ids)
+    db.info.setdefault(_USUARIOS_NOTIFICADOS, set()).update(usuario_ids)
+    backend_notificaciones.registrar(db, usuario_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_usuarios_notificados(session, flush_context):
+    usuario_ids = {
+        obj.usuario_id for obj in chain(session.new, session.dirty, session.deleted)
+        if isinstance(obj, Notificacion)
+    }
+    if usuario_ids:
+        marcar_usuarios_notificados(session, usuario_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _avisar_al_confirmar(session):
+    usuario_ids = session.info.pop(_USUARIOS_NOTIFICADOS, None)
+    if usuario_ids:
+        canal_notificaciones.avisar(usuario_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_al_revertir(session, previous_transaction):
+    # Un SAVEPOINT revertido no descarta lo pendiente de la transaccion externa
+    if not previous_transaction.nested:
+        session.info.pop(_USUARIOS_NOTIFICADOS, None)
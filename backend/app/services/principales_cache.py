@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.user import User, UserRole
+from .archivo_version import ArchivoVersion
+
+# Clave en Session.info con los usuarios modificados en la transaccion en curso
+_USUARIOS_MODIFICADOS = "usuarios_modificados"
+
+# Cambios en estas columnas invalidan al usuario (last_login, por ejemplo, no)
+_CAMPOS_PRINCIPAL = ("username", "role", "empleado_id", "active", "password_hash")
+
+
+class Principal(NamedTuple):
+    """Usuario autenticado tal como lo usan las rutas (inmutable)."""
+
+    id: int
+    username: str
+    role: UserRole
+    empleado_id: Optional[int]
+    active: bool
+
+    @classmethod
+    def desde_usuario(cls, user: User) -> "Principal":
+        return cls(user.id, user.username, user.role, user.empleado_id, bool(user.active))
+
+
+class CachePrincipales:
+    """Token -> Principal por un tiempo limitado.
+
+    Evita decodificar el JWT y consultar users en cada request. Una entrada
+    vence a los `ttl` segundos o cuando vence el token, lo que ocurra primero.
+    Los cambios confirmados en users invalidan al usuario en este proceso y
+    actualizan `archivo_version`; los demas workers vacian su cache al ver
+    que el archivo cambio. Guarda tambien los ids de los admins activos
+    (destinatarios de notificaciones), con el mismo ttl e invalidacion.
+    """
+
+    def __init__(self, ttl: int, maximo: int, archivo_version: str):
+        self.ttl = ttl
+        self.maximo = maximo
+        self.archivo_version = ArchivoVersion(archivo_version)
+        self._entradas: OrderedDict = OrderedDict()
+        self._tokens_por_usuario: Dict[int, Set[str]] = {}
+        self._admins: Optional[Tuple[Tuple[int, ...], float]] = None
+        self._generacion = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, token: str) -> Optional[Principal]:
+        self._revisar_archivo()
+        with self._lock:
+            entrada = self._entradas.get(token)
+            if entrada is not None and entrada[1] > time.monotonic():
+                self._entradas.move_to_end(token)
+                self.aciertos += 1
+                return entrada[0]
+            if entrada is not None:
+                self._quitar(token)
+            self.fallos += 1
+            return None
+
+    def guardar(self, token: str, principal: Principal, expira_token: Optional[float] = None):
+        """`expira_token`: claim exp del JWT (segundos desde epoch)."""
+        vigencia = self.ttl
+        if expira_token is not None:
+            vigencia = min(vigencia, expira_token - time.time())
+        if vigencia <= 0:
+            return
+        with self._lock:
+            if token in self._entradas:
+                self._quitar(token)
+            self._entradas[token] = (principal, time.monotonic() + vigencia)
+            self._tokens_por_usuario.setdefault(principal.id, set()).add(token)
+            while len(self._entradas) > self.maximo:
+                self._quitar(next(iter(self._entradas)))
+
+    def admins_activos(self, cargar: Callable[[], Tuple[int, ...]]) -> Tuple[int, ...]:
+        """Ids de admins activos; `cargar` consulta la BD cuando no hay copia vigente."""
+        self._revisar_archivo()
+        with self._lock:
+            if self._admins is not None and self._admins[1] > time.monotonic():
+                return self._admins[0]
+            generacion = self._generacion
+        ids = cargar()
+        with self._lock:
+            # Si hubo una invalidacion durante la consulta el resultado ya es viejo
+            if generacion == self._generacion:
+                self._admins = (ids, time.monotonic() + self.ttl)
+        return ids
+
+    def invalidar_usuarios(self, user_ids: Iterable[int]):
+        with self._lock:
+            self._admins = None
+            self._generacion += 1
+            for user_id in user_ids:
+                for token in self._tokens_por_usuario.pop(user_id, ()):
+                    self._entradas.pop(token, None)
+        self.archivo_version.publicar()
+
+    def limpiar(self):
+        with self._lock:
+            self._admins = None
+            self._generacion += 1
+            self._entradas.clear()
+            self._tokens_por_usuario.clear()
+
+    def estadisticas(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+            "entradas": len(self._entradas),
+            "admins_en_cache": self._admins is not None,
+            "maximo": self.maximo,
+            "ttl": self.ttl,
+        }
+
+    def _quitar(self, token: str):
+        principal, _ = self._entradas.pop(token)
+        tokens = self._tokens_por_usuario.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_por_usuario[principal.id]
+
+    def _revisar_archivo(self):
+        # Un stat por request: mucho mas barato que la consulta a users
+        if self.archivo_version.cambio():
+            self.limpiar()
+
+
+cache_principales = CachePrincipales(
+    settings.PRINCIPAL_CACHE_TTL, settings.PRINCIPAL_CACHE_MAX, settings.PRINCIPAL_CACHE_ARCHIVO
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_usuarios_modificados(session, flush_context):
+    # Los usuarios nuevos no tienen tokens, pero pueden cambiar los admins activos
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, User):
+            continue
+        estado = inspect(obj)
+        if obj in session.new or obj in session.deleted or any(estado.attrs[c].history.has_changes() for c in _CAMPOS_PRINCIPAL):
+            session.info.setdefault(_USUARIOS_MODIFICADOS, set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_al_confirmar(session):
+    user_ids = session.info.pop(_USUARIOS_MODIFICADOS, None)
+    if user_ids:
+        cache_principales.invalidar_usuarios(user_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_al_revertir(session, previous_transaction):
+    # Un SAVEPOINT revertido no descarta lo pendiente de la transaccion externa
+    if not previous_transaction.nested:
+        session.info.pop(_USUARIOS_MODIFICADOS, None)
@@ -0,0 +1,214 @@
+import threading
+import time
+from bisect import bisect_right, insort
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models.prestacion import EstadoPrestacion, Prestacion, TipoPrestacion
+from .archivo_version import VersionesPorClave, versiones_empleados
+
+
+class _IntervalosEmpleado:
+    """Prestaciones no rechazadas de un empleado, ordenadas por fecha de inicio por tipo."""
+
+    def __init__(self):
+        self.por_tipo: Dict[TipoPrestacion, List[Tuple[date, date, int]]] = {}
+
+    def agregar(self, tipo: TipoPrestacion, inicio: date, fin: date, prestacion_id: int):
+        intervalos = self.por_tipo.setdefault(tipo, [])
+        if not any(i[2] == prestacion_id for i in intervalos):
+            insort(intervalos, (inicio, fin, prestacion_id))
+
+    def quitar(self, tipo: TipoPrestacion, prestacion_id: int):
+        intervalos = self.por_tipo.get(tipo, [])
+        self.por_tipo[tipo] = [i for i in intervalos if i[2] != prestacion_id]
+
+    def traslapes(self, tipo: Optional[TipoPrestacion], inicio: date, fin: date) -> List[int]:
+        tipos = [tipo] if tipo else list(self.por_tipo)
+        ids = []
+        for t in tipos:
+            intervalos = self.por_tipo.get(t, [])
+            # Solo los que inician a mas tardar en `fin` pueden traslapar
+            limite = bisect_right(intervalos, (fin, date.max, float("inf")))
+            ids.extend(i[2] for i in intervalos[:limite] if i[1] >= inicio)
+        return ids
+
+
+class IndicePrestaciones:
+    """Indice en memoria de prestaciones no rechazadas para detectar traslapes.
+
+    Cada empleado se carga de la BD la primera vez que se consulta (consulta
+    indexada por empleado_id) y despues se mantiene al crear, aprobar o
+    rechazar. Se guarda con la version del empleado en `versiones`: si otro
+    worker la cambia, solo ese empleado se vuelve a cargar. La consulta de
+    todos los empleados revisa los cambios recorriendo las versiones a lo
+    mas cada `versiones.intervalo`.
+
+    Solo lo usan las consultas (/validar, /traslapes): al crear una
+    prestacion el traslape se comprueba en la BD con existe_traslape().
+    """
+
+    # Con mas empleados cambiados que esto se recarga todo en una consulta
+    maximo_recargas = 50
+
+    def __init__(self, versiones: VersionesPorClave):
+        self.versiones = versiones
+        self._empleados: Dict[int, _IntervalosEmpleado] = {}
+        # Version de cada empleado con la que se cargaron sus intervalos
+        self._versiones: Dict[int, Tuple[int, int]] = {}
+        self._completo = False
+        self._ultima_revision = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _cargar(self, db: Session, empleado_id: Optional[int] = None) -> Dict[int, _IntervalosEmpleado]:
+        # La version se lee antes de la consulta: un cambio a la mitad obliga a recargar
+        if empleado_id is None:
+            versiones = self.versiones.todas()
+        else:
+            versiones = {empleado_id: self.versiones.version(empleado_id)}
+        with self._lock:
+            version = self._version
+
+        query = db.query(
+            Prestacion.id, Prestacion.empleado_id, Prestacion.tipo,
+            Prestacion.fecha_inicio, Prestacion.fecha_fin,
+        ).filter(Prestacion.estado != EstadoPrestacion.RECHAZADA)
+        if empleado_id is not None:
+            query = query.filter(Prestacion.empleado_id == empleado_id)
+
+        cargados: Dict[int, _IntervalosEmpleado] = {}
+        if empleado_id is not None:
+            cargados[empleado_id] = _IntervalosEmpleado()
+        for prestacion_id, emp_id, tipo, inicio, fin in query:
+            cargados.setdefault(emp_id, _IntervalosEmpleado()).agregar(tipo, inicio, fin, prestacion_id)
+
+        with self._lock:
+            # Si hubo cambios durante la consulta los datos pueden estar viejos: no guardarlos
+            if version == self._version:
+                if empleado_id is None:
+                    self._empleados = cargados
+                    self._versiones = versiones
+                    self._completo = True
+                    self._ultima_revision = time.monotonic()
+                else:
+                    self._empleados.update(cargados)
+                    self._versiones.update(versiones)
+        return cargados
+
+    def _revisar_cambios(self, db: Session):
+        """Recarga los empleados que cambiaron en otros workers (todo el indice cargado)."""
+        if time.monotonic() - self._ultima_revision < self.versiones.intervalo:
+            return
+        self._ultima_revision = time.monotonic()
+        cambiados = [
+            empleado_id for empleado_id, version in self.versiones.todas().items()
+            if self._versiones.get(empleado_id, (0, 0)) != version
+        ]
+        if len(cambiados) > self.maximo_recargas:
+            self.invalidar()
+            return
+        for empleado_id in cambiados:
+            self._cargar(db, empleado_id)
+
+    def _empleado(self, db: Session, empleado_id: int) -> _IntervalosEmpleado:
+        version = self.versiones.version(empleado_id)
+        with self._lock:
+            intervalos = self._empleados.get(empleado_id)
+            vigente = self._versiones.get(empleado_id, (0, 0)) == version
+        if intervalos is None or not vigente:
+            intervalos = self._cargar(db, empleado_id)[empleado_id]
+        return intervalos
+
+    def traslapes_empleado(
+        self,
+        db: Session,
+        empleado_id: int,
+        inicio: date,
+        fin: date,
+        tipo: TipoPrestacion = None,
+    ) -> List[int]:
+        """IDs de prestaciones no rechazadas del empleado que traslapan [inicio, fin]."""
+        return self._empleado(db, empleado_id).traslapes(tipo, inicio, fin)
+
+    def hay_traslape(
+        self, db: Session, empleado_id: int, tipo: TipoPrestacion, inicio: date, fin: date
+    ) -> bool:
+        return bool(self.traslapes_empleado(db, empleado_id, inicio, fin, tipo))
+
+    def traslapes(self, db: Session, inicio: date, fin: date, tipo: TipoPrestacion = None) -> List[int]:
+        """IDs de prestaciones no rechazadas de todos los empleados que traslapan [inicio, fin]."""
+        if self._completo:
+            self._revisar_cambios(db)
+        empleados = self._empleados if self._completo else self._cargar(db)
+        ids = []
+        for intervalos in list(empleados.values()):
+            ids.extend(intervalos.traslapes(tipo, inicio, fin))
+        return ids
+
+    def registrar(self, prestacion: Prestacion):
+        """Agrega (o quita si fue rechazada) la prestacion ya confirmada en la BD.
+
+        Al confirmar, validaciones_cache ya publico la version nueva del
+        empleado: si el indice tenia la version anterior, el cambio se aplica
+        aqui y se registra la nueva (este worker no recarga lo que el mismo
+        escribio). Si no, otro worker tambien lo cambio y se recarga de la BD.
+        """
+        empleado_id = prestacion.empleado_id
+        publicacion = self.versiones.ultima_publicacion(empleado_id)
+        with self._lock:
+            self._version += 1
+            intervalos = self._empleados.get(empleado_id)
+            anterior = self._versiones.get(empleado_id, (0, 0))
+            if publicacion is None or anterior != publicacion[0]:
+                # Version que nunca coincide: la siguiente consulta lo recarga
+                self._versiones[empleado_id] = (-1, -1)
+                return
+            if intervalos is None:
+                if not self._completo:
+                    return  # Se cargara desde la BD en la siguiente consulta
+                intervalos = self._empleados[empleado_id] = _IntervalosEmpleado()
+            if prestacion.estado == EstadoPrestacion.RECHAZADA:
+                intervalos.quitar(prestacion.tipo, prestacion.id)
+            else:
+                intervalos.agregar(
+                    prestacion.tipo, prestacion.fecha_inicio, prestacion.fecha_fin, prestacion.id
+                )
+            self._versiones[empleado_id] = publicacion[1]
+
+    def invalidar(self):
+        with self._lock:
+            self._version += 1
+            self._empleados = {}
+            self._versiones = {}
+            self._completo = False
+
+
+def existe_traslape(
+    db: Session,
+    empleado_id: int,
+    tipo: TipoPrestacion,
+    inicio: date,
+    fin: date,
+    excluir_id: Optional[int] = None,
+) -> bool:
+    """Traslape con otra prestacion no rechazada, consultado en la BD.
+
+    Usa el indice (empleado_id, tipo, fecha_inicio, fecha_fin); a diferencia
+    de IndicePrestaciones ve lo que confirmaron los demas workers.
+    """
+    query = db.query(Prestacion.id).filter(
+        Prestacion.empleado_id == empleado_id,
+        Prestacion.tipo == tipo,
+        Prestacion.fecha_inicio <= fin,
+        Prestacion.fecha_fin >= inicio,
+        Prestacion.estado != EstadoPrestacion.RECHAZADA,
+    )
+    if excluir_id is not None:
+        query = query.filter(Prestacion.id != excluir_id)
+    return db.query(query.exists()).scalar()
+
+
+indice_prestaciones = IndicePrestaciones(versiones_empleados)
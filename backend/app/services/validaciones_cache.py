@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from itertools import chain
+from typing import Callable, Iterable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.contador import Contador, ContadorQuincena
+from ..models.empleado import Empleado
+from ..models.justificante import Justificante
+from ..models.prestacion import Prestacion
+from .archivo_version import VersionesPorClave, versiones_empleados
+from .calendario_service import calendario_service
+
+T = TypeVar("T")
+
+# Clave en Session.info con los empleados modificados en la transaccion en curso
+_EMPLEADOS_MODIFICADOS = "empleados_modificados"
+
+# Tablas cuyo cambio afecta las validaciones del empleado (por empleado_id)
+_MODELOS_POR_EMPLEADO = (Contador, ContadorQuincena, Justificante, Prestacion)
+
+
+class CacheValidaciones:
+    """LRU de resultados de /validar por empleado.
+
+    La clave incluye la version del empleado (cambia al confirmar cualquier
+    escritura en sus contadores, justificantes, prestaciones o en su
+    registro), la version del calendario y la fecha de hoy. Un cambio vuelve
+    inalcanzables los resultados anteriores de ese empleado, que salen por
+    LRU. Las versiones se comparten entre workers con `versiones`.
+    """
+
+    def __init__(self, maximo: int, versiones: VersionesPorClave):
+        self.maximo = maximo
+        self.versiones = versiones
+        self._resultados: OrderedDict = OrderedDict()
+        self._generacion = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, empleado_id: int, clave: tuple, calcular: Callable[[], T]) -> T:
+        # Las versiones se leen antes de consultar la BD: si hay una escritura
+        # a la mitad, el resultado queda guardado con una version ya vieja
+        calendario_service.revisar_cambios()
+        version = self.versiones.version(empleado_id)
+        with self._lock:
+            clave = (
+                empleado_id, version, self._generacion,
+                calendario_service.version, date.today(), *clave,
+            )
+            resultado = self._resultados.get(clave)
+            if resultado is not None:
+                self._resultados.move_to_end(clave)
+                self.aciertos += 1
+                return resultado
+            self.fallos += 1
+
+        resultado = calcular()
+        with self._lock:
+            self._resultados[clave] = resultado
+            while len(self._resultados) > self.maximo:
+                self._resultados.popitem(last=False)
+        return resultado
+
+    def invalidar_empleados(self, empleado_ids: Iterable[int]):
+        self.versiones.publicar(empleado_ids)
+
+    def limpiar(self):
+        """Descarta todo; la generacion en la clave deja fuera los calculos en curso."""
+        with self._lock:
+            self._generacion += 1
+            self._resultados.clear()
+
+    def estadisticas(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+            "entradas": len(self._resultados),
+            "maximo": self.maximo,
+        }
+
+
+cache_validaciones = CacheValidaciones(settings.VALIDACIONES_CACHE_MAX, versiones_empleados)
+
+
+def marcar_empleado_modificado(db: Session, empleado_id: int):
+    """Para UPDATE masivos (query.update) que no pasan por el flush del ORM."""
+    db.info.setdefault(_EMPLEADOS_MODIFICADOS, set()).add(empleado_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_empleados_modificados(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, _MODELOS_POR_EMPLEADO):
+            marcar_empleado_modificado(session, obj.empleado_id)
+        elif isinstance(obj, Empleado):
+            marcar_empleado_modificado(session, obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_al_confirmar(session):
+    empleado_ids = session.info.pop(_EMPLEADOS_MODIFICADOS, None)
+    if empleado_ids:
+        cache_validaciones.invalidar_empleados(empleado_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _descartar_al_revertir(session, previous_transaction):
+    # Un SAVEPOINT revertido no descarta lo pendiente de la transaccion externa
+    if not previous_transaction.nested:
+        session.info.pop(_EMPLEADOS_MODIFICADOS, None)
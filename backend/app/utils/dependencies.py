@@ -1,44 +1,112 @@
-from fastapi import Depends, HTTPException, status
+from datetime import datetime
+
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import get_async_db, get_db
+from ..models.notificacion import TicketStreamUsado
 from ..models.user import User, UserRole
-from .security import decode_access_token
+from ..services.principales_cache import Principal, cache_principales
+from .security import decode_access_token, decode_stream_ticket
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="No se pudieron validar las credenciales",
+    headers={"WWW-Authenticate": "Bearer"},
+)
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="No se pudieron validar las credenciales",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
 
+def _payload_del_token(token: str) -> dict:
     payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
 
-    username: str = payload.get("sub")
-    if username is None:
+    if payload.get("sub") is None:
         raise credentials_exception
+    return payload
+
 
-    user = db.query(User).filter(User.username == username).first()
+def _guardar_principal(token: str, payload: dict, user: User) -> Principal:
     if user is None:
         raise credentials_exception
+    principal = Principal.desde_usuario(user)
+    cache_principales.guardar(token, principal, payload.get("exp"))
+    return principal
 
-    if not user.active:
+
+def _verificar_activo(principal: Principal) -> Principal:
+    if not principal.active:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
+    return principal
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    principal = cache_principales.obtener(token)
+    if principal is None:
+        payload = _payload_del_token(token)
+        user = db.query(User).filter(User.username == payload["sub"]).first()
+        principal = _guardar_principal(token, payload, user)
+    return _verificar_activo(principal)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """Igual que get_current_user, para rutas que usan la sesion asincrona."""
+    principal = cache_principales.obtener(token)
+    if principal is None:
+        payload = _payload_del_token(token)
+        resultado = await db.execute(select(User).where(User.username == payload["sub"]))
+        principal = _guardar_principal(token, payload, resultado.scalars().first())
+    return _verificar_activo(principal)
 
+
+async def get_stream_ticket(
+    ticket: str = Query(..., description="Ticket de POST /api/notificaciones/stream/ticket"),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    """Ticket en la URL, para EventSource (no puede enviar el header Authorization).
+
+    Cada ticket se acepta una sola vez, en cualquier worker: el jti usado
+    queda en tickets_stream_usados hasta que el ticket vence.
+    """
+    payload = decode_stream_ticket(ticket)
+    if payload is None:
+        raise credentials_exception
+    ahora = datetime.utcnow()
+    await db.execute(delete(TicketStreamUsado).where(TicketStreamUsado.expira < ahora))
+    db.add(TicketStreamUsado(jti=payload["jti"], expira=datetime.utcfromtimestamp(payload["exp"])))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise credentials_exception
+    return payload
+
+
+def get_current_user_completo(
+    principal: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> User:
+    """Registro completo de users, para las rutas que lo modifican o lo devuelven."""
+    user = db.get(User, principal.id)
+    if user is None:
+        raise credentials_exception
     return user
 
 
-def require_role(required_roles: list[UserRole]):
-    def role_checker(current_user: User = Depends(get_current_user)):
+def require_role(required_roles: list[UserRole], usuario_actual=get_current_user):
+    def role_checker(current_user: Principal = Depends(usuario_actual)):
         if current_user.role not in required_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -49,12 +117,18 @@ def require_role(required_roles: list[UserRole]):
 
 
 def get_current_admin_user(
-    current_user: User = Depends(require_role([UserRole.ROOT, UserRole.ADMIN])),
+    current_user: Principal = Depends(require_role([UserRole.ROOT, UserRole.ADMIN])),
+):
+    return current_user
+
+
+def get_current_admin_user_async(
+    current_user: Principal = Depends(require_role([UserRole.ROOT, UserRole.ADMIN], get_current_user_async)),
 ):
     return current_user
 
 
 def get_current_root_user(
-    current_user: User = Depends(require_role([UserRole.ROOT])),
+    current_user: Principal = Depends(require_role([UserRole.ROOT])),
 ):
     return current_user
@@ -4,6 +4,7 @@ from datetime import date, datetime
 from sqlalchemy.orm import Session
 
 from ..models.audit_log import AuditLog
+from ..services.auditoria_service import escritor_auditoria
 
 
 def registrar_auditoria(
@@ -16,8 +17,15 @@ def registrar_auditoria(
     datos_anteriores: dict = None,
     datos_nuevos: dict = None,
     ip_address: str = None,
+    en_transaccion: bool = False,
 ):
-    log = AuditLog(
+    """Registra un evento de auditoria.
+
+    Por defecto lo escribe el escritor de auditoria (en lote, fuera de la
+    transaccion del request). Con `en_transaccion=True` se agrega a la sesion
+    y se confirma junto con el siguiente commit del llamador.
+    """
+    fila = dict(
         user_id=user_id,
         username=username,
         accion=accion,
@@ -26,9 +34,12 @@ def registrar_auditoria(
         datos_anteriores=json.dumps(datos_anteriores, default=str) if datos_anteriores else None,
         datos_nuevos=json.dumps(datos_nuevos, default=str) if datos_nuevos else None,
         ip_address=ip_address,
+        timestamp=datetime.utcnow(),
     )
-    db.add(log)
-    db.commit()
+    if en_transaccion:
+        db.add(AuditLog(**fila))
+    else:
+        escritor_auditoria.registrar(fila)
 
 
 def obtener_quincena(fecha: date = None) -> int:
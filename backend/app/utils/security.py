@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -27,6 +28,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
+def create_stream_ticket(usuario_id: int, expira_sesion: float) -> str:
+    """Ticket corto para abrir el stream SSE sin poner el token de acceso en la URL.
+
+    No tiene `sub`: no sirve como token de acceso. `sesion` es el exp del
+    token con el que se pidio; el stream se cierra cuando vence.
+    """
+    return jwt.encode({
+        "tipo": "stream",
+        "usuario_id": usuario_id,
+        "sesion": expira_sesion,
+        "jti": uuid.uuid4().hex,
+        "exp": datetime.utcnow() + timedelta(seconds=settings.NOTIFICACIONES_TICKET_S),
+    }, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def decode_stream_ticket(ticket: str) -> Optional[dict]:
+    payload = decode_access_token(ticket)
+    if payload is None or payload.get("tipo") != "stream":
+        return None
+    return payload
+
+
 def decode_access_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
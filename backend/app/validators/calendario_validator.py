@@ -11,4 +11,5 @@ def validar_fecha_laboral(fecha: date) -> tuple[bool, str]:
             return False, "La fecha es dia festivo oficial"
         if calendario_service.esta_en_vacaciones(fecha):
             return False, "La fecha cae en periodo de vacaciones"
+        return False, "La fecha es dia inhabil segun el calendario laboral"
     return True, ""
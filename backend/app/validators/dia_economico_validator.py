@@ -1,4 +1,5 @@
-from datetime import date
+from datetime import date, timedelta
+from typing import Optional
 
 from sqlalchemy.orm import Session
 
@@ -6,6 +7,31 @@ from ..config import settings
 from ..models.contador import Contador
 from ..schemas.justificante import ValidacionResponse
 from ..services.calendario_service import calendario_service
+from ..services.contador_service import (
+    ContadorOcupadoError,
+    actualizar_contador,
+    obtener_o_crear_contador,
+)
+
+ERROR_DIA_NO_LABORAL = "La fecha de inicio debe ser un dia laboral"
+ERROR_DIA_SEMANA = "El dia economico solo puede iniciar en Lunes, Martes o Miercoles"
+
+
+def motivo_bloqueo_calendario(fecha: date) -> Optional[str]:
+    """Primera regla de calendario (sin contadores) que impide iniciar en la fecha."""
+    if not calendario_service.es_dia_laboral(fecha):
+        return ERROR_DIA_NO_LABORAL
+    if fecha.weekday() > 2:
+        return ERROR_DIA_SEMANA
+    bloqueado, msg_vac = calendario_service.esta_en_periodo_bloqueado_vacaciones(
+        fecha, dias_antes=settings.DIAS_ECONOMICOS_BLOQUEO_VACACIONES
+    )
+    if bloqueado:
+        return msg_vac
+    cerca_festivo, msg_fest = calendario_service.esta_cerca_de_festivo(fecha)
+    if cerca_festivo:
+        return msg_fest
+    return None
 
 
 def validar_dia_economico(
@@ -14,25 +40,33 @@ def validar_dia_economico(
     fecha_inicio: date,
     anio: int = None,
 ) -> ValidacionResponse:
-    errores = []
-    advertencias = []
     if anio is None:
         anio = fecha_inicio.year
 
+    contador = db.query(Contador).filter(
+        Contador.empleado_id == empleado_id, Contador.anio == anio
+    ).first()
+    return evaluar_dia_economico(contador, fecha_inicio)
+
+
+def evaluar_dia_economico(
+    contador: Optional[Contador],
+    fecha_inicio: date,
+) -> ValidacionResponse:
+    """Reglas de dia economico sobre un contador ya cargado (o None si no existe)."""
+    errores = []
+    advertencias = []
+
     # 1. Verificar que sea dia laboral
     if not calendario_service.es_dia_laboral(fecha_inicio):
-        errores.append("La fecha de inicio debe ser un dia laboral")
+        errores.append(ERROR_DIA_NO_LABORAL)
 
     # 2. Verificar que NO inicie en viernes (jueves o viernes no permitidos, solo Lun-Mie)
     dia_semana = fecha_inicio.weekday()  # 0=Lun ... 4=Vie
     if dia_semana > 2:  # Solo Lun(0), Mar(1), Mie(2)
-        errores.append("El dia economico solo puede iniciar en Lunes, Martes o Miercoles")
+        errores.append(ERROR_DIA_SEMANA)
 
     # 3. Verificar contadores
-    contador = db.query(Contador).filter(
-        Contador.empleado_id == empleado_id, Contador.anio == anio
-    ).first()
-
     if contador:
         if contador.solicitudes_economicos >= settings.DIAS_ECONOMICOS_MAX_SOLICITUDES:
             errores.append(
@@ -76,3 +110,78 @@ def validar_dia_economico(
         fecha_inicio_calculada=fecha_inicio,
         fecha_fin_calculada=fecha_fin,
     )
+
+
+def reservar_dia_economico(
+    db: Session,
+    empleado_id: int,
+    fecha_inicio: date,
+) -> ValidacionResponse:
+    """Valida y descuenta el dia economico del contador en un solo UPDATE.
+
+    Si otra solicitud cambia el contador entre la lectura y la escritura, se
+    relee y se valida de nuevo. No hace commit.
+    """
+    for _ in range(settings.CONTADOR_MAX_REINTENTOS):
+        contador = obtener_o_crear_contador(db, empleado_id, fecha_inicio.year)
+        validacion = evaluar_dia_economico(contador, fecha_inicio)
+        if not validacion.valido:
+            return validacion
+        if actualizar_contador(
+            db,
+            contador,
+            {
+                "solicitudes_economicos": 1,
+                "dias_economicos_usados": settings.DIAS_ECONOMICOS_DIAS_POR_SOLICITUD,
+            },
+            {"fecha_ultima_solicitud_economico": fecha_inicio},
+        ):
+            return validacion
+    raise ContadorOcupadoError("El contador de dias economicos esta siendo actualizado, intenta de nuevo")
+
+
+def proximas_fechas_dia_economico(
+    db: Session,
+    empleado_id: int,
+    desde: date,
+    cantidad: int = 5,
+) -> list[date]:
+    """Siguientes ``cantidad`` fechas (a partir de ``desde``) en las que
+    validar_dia_economico aceptaria iniciar un dia economico.
+
+    Combina el contador del empleado con la mascara de dias libres del
+    calendario; busca como maximo hasta el fin del anio siguiente.
+    """
+    fechas: list[date] = []
+    for anio in (desde.year, desde.year + 1):
+        if len(fechas) >= cantidad:
+            break
+        contador = db.query(Contador).filter(
+            Contador.empleado_id == empleado_id, Contador.anio == anio
+        ).first()
+
+        inicio = max(desde, date(anio, 1, 1))
+        if contador:
+            if contador.solicitudes_economicos >= settings.DIAS_ECONOMICOS_MAX_SOLICITUDES:
+                continue
+            ultima = contador.fecha_ultima_solicitud_economico
+            if ultima:
+                # Primer dia con N dias laborales contados desde la ultima (inclusivo)
+                separacion = settings.DIAS_ECONOMICOS_SEPARACION_DIAS
+                if calendario_service.es_dia_laboral(ultima):
+                    separacion -= 1
+                inicio = max(inicio, calendario_service.agregar_dias_laborales(ultima, separacion))
+        if inicio.year != anio:
+            continue
+
+        mascara = calendario_service.mascara_dias_libres(
+            anio,
+            dias_antes=settings.DIAS_ECONOMICOS_BLOQUEO_VACACIONES,
+            dias_semana=(0, 1, 2),
+        )
+        primer_dia = date(anio, 1, 1)
+        i = mascara.find(1, (inicio - primer_dia).days)
+        while i != -1 and len(fechas) < cantidad:
+            fechas.append(primer_dia + timedelta(days=i))
+            i = mascara.find(1, i + 1)
+    return fechas
@@ -0,0 +1,73 @@
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from ..models.contador import Contador, ContadorQuincena
+from ..models.justificante import TipoJustificante
+from ..schemas.justificante import ValidacionLoteItem, ValidacionLoteResultado, ValidacionResponse
+from .dia_economico_validator import evaluar_dia_economico
+from .permiso_horas_validator import evaluar_permiso_horas, limites_quincena
+
+
+def validar_lote(db: Session, items: list[ValidacionLoteItem]) -> list[ValidacionLoteResultado]:
+    """Valida muchas solicitudes (empleado, fecha, tipo) con dos consultas.
+
+    Los contadores anuales y los de quincena se precargan una sola vez para
+    todo el lote en lugar de una consulta por solicitud.
+    """
+    economicos = [i for i in items if i.tipo == TipoJustificante.DIA_ECONOMICO]
+    permisos = [i for i in items if i.tipo == TipoJustificante.PERMISO_HORAS]
+
+    # 1. Contadores de todos los (empleado, anio) del lote
+    contadores: dict[tuple[int, int], Contador] = {}
+    if economicos:
+        filas = db.query(Contador).filter(
+            Contador.empleado_id.in_({i.empleado_id for i in economicos}),
+            Contador.anio.in_({i.fecha.year for i in economicos}),
+        )
+        for contador in filas:
+            contadores[(contador.empleado_id, contador.anio)] = contador
+
+    # 2. Contadores de quincena de todos los (empleado, anio, mes, quincena) del lote
+    quincenas = {i.fecha: limites_quincena(i.fecha) for i in permisos}
+    conteos: dict[tuple[int, int, int, int], int] = {}
+    if permisos:
+        claves = {
+            (i.empleado_id, i.fecha.year, i.fecha.month, quincenas[i.fecha][0])
+            for i in permisos
+        }
+        filas = db.query(ContadorQuincena).filter(
+            tuple_(
+                ContadorQuincena.empleado_id,
+                ContadorQuincena.anio,
+                ContadorQuincena.mes,
+                ContadorQuincena.quincena,
+            ).in_(claves)
+        )
+        for fila in filas:
+            conteos[(fila.empleado_id, fila.anio, fila.mes, fila.quincena)] = fila.permisos_horas
+
+    resultados = []
+    for item in items:
+        if item.tipo == TipoJustificante.DIA_ECONOMICO:
+            resultado = evaluar_dia_economico(
+                contadores.get((item.empleado_id, item.fecha.year)), item.fecha
+            )
+        elif item.tipo == TipoJustificante.PERMISO_HORAS:
+            quincena = quincenas[item.fecha][0]
+            resultado = evaluar_permiso_horas(
+                conteos.get((item.empleado_id, item.fecha.year, item.fecha.month, quincena), 0),
+                item.fecha,
+            )
+        else:
+            resultado = ValidacionResponse(
+                valido=True,
+                fecha_inicio_calculada=item.fecha,
+                fecha_fin_calculada=item.fecha,
+            )
+        resultados.append(ValidacionLoteResultado(
+            empleado_id=item.empleado_id,
+            fecha=item.fecha,
+            tipo=item.tipo,
+            resultado=resultado,
+        ))
+    return resultados
@@ -1,27 +1,16 @@
-from datetime import date
+from datetime import date, timedelta
 
 from sqlalchemy.orm import Session
 
 from ..config import settings
-from ..models.justificante import Justificante, TipoJustificante
 from ..schemas.justificante import ValidacionResponse
 from ..services.calendario_service import calendario_service
+from ..services.contador_service import ContadorOcupadoError, permisos_en_quincena, registrar_permiso_horas
 from ..utils.helpers import obtener_quincena
 
 
-def validar_permiso_horas(
-    db: Session,
-    empleado_id: int,
-    fecha: date,
-) -> ValidacionResponse:
-    errores = []
-    advertencias = []
-
-    # 1. Verificar dia laboral
-    if not calendario_service.es_dia_laboral(fecha):
-        errores.append("La fecha debe ser un dia laboral")
-
-    # 2. Contar permisos en la quincena actual
+def limites_quincena(fecha: date) -> tuple[int, date, date]:
+    """(quincena, primer dia, ultimo dia) de la quincena que contiene la fecha."""
     quincena = obtener_quincena(fecha)
     if quincena == 1:
         inicio_q = date(fecha.year, fecha.month, 1)
@@ -33,21 +22,51 @@ def validar_permiso_horas(
             fin_q = date(fecha.year, 12, 31)
         else:
             fin_q = date(fecha.year, fecha.month + 1, 1)
-            from datetime import timedelta
             fin_q -= timedelta(days=1)
+    return quincena, inicio_q, fin_q
 
-    permisos_quincena = (
-        db.query(Justificante)
-        .filter(
-            Justificante.empleado_id == empleado_id,
-            Justificante.tipo == TipoJustificante.PERMISO_HORAS,
-            Justificante.fecha_inicio >= inicio_q,
-            Justificante.fecha_inicio <= fin_q,
-        )
-        .count()
-    )
 
+def validar_permiso_horas(
+    db: Session,
+    empleado_id: int,
+    fecha: date,
+) -> ValidacionResponse:
+    permisos_quincena = permisos_en_quincena(db, empleado_id, fecha)
+    return evaluar_permiso_horas(permisos_quincena, fecha)
+
+
+def reservar_permiso_horas(
+    db: Session,
+    empleado_id: int,
+    fecha: date,
+) -> ValidacionResponse:
+    """Valida y suma el permiso al contador de la quincena. No hace commit.
+
+    Si el UPDATE no registra el permiso (otra solicitud ocupo el ultimo de
+    la quincena, o creo la fila al mismo tiempo) se valida de nuevo: con
+    permisos disponibles se reintenta, sin ellos se regresa el error.
+    """
+    for _ in range(settings.CONTADOR_MAX_REINTENTOS):
+        validacion = validar_permiso_horas(db, empleado_id, fecha)
+        if not validacion.valido:
+            return validacion
+        if registrar_permiso_horas(db, empleado_id, fecha, settings.PERMISOS_HORAS_MAX_POR_QUINCENA):
+            return validacion
+    raise ContadorOcupadoError("El contador de permisos por horas esta siendo actualizado, intenta de nuevo")
+
+
+def evaluar_permiso_horas(permisos_quincena: int, fecha: date) -> ValidacionResponse:
+    """Reglas de permiso por horas con el conteo de la quincena ya calculado."""
+    errores = []
+    advertencias = []
+
+    # 1. Verificar dia laboral
+    if not calendario_service.es_dia_laboral(fecha):
+        errores.append("La fecha debe ser un dia laboral")
+
+    # 2. Verificar limite de permisos de la quincena
     if permisos_quincena >= settings.PERMISOS_HORAS_MAX_POR_QUINCENA:
+        quincena, inicio_q, fin_q = limites_quincena(fecha)
         errores.append(
             f"Ya se usaron los {settings.PERMISOS_HORAS_MAX_POR_QUINCENA} "
             f"permisos por horas de la quincena {quincena} "
@@ -1,21 +1,28 @@
 from datetime import date
+from typing import Callable, Optional
 
 from sqlalchemy.orm import Session
 
 from ..models.contador import Contador
-from ..models.empleado import Empleado, TipoEmpleado, TipoNombramiento
-from ..models.prestacion import Prestacion, TipoPrestacion, EstadoPrestacion
+from ..models.empleado import Empleado, TipoEmpleado
+from ..models.prestacion import TipoPrestacion
 from ..schemas.prestacion import PrestacionValidacionResponse
 from ..services.calendario_service import calendario_service
+from ..services.elegibilidad_service import MESES_ANTIGUEDAD_MINIMA, NOMBRAMIENTOS_EXCLUIDOS
+from ..services.traslapes_service import indice_prestaciones
 
-# Catalogo de prestaciones con sus reglas
+REQUISITO_ANTIGUEDAD = f"Antiguedad minima de {MESES_ANTIGUEDAD_MINIMA} meses + 1 dia"
+
+# Catalogo de prestaciones con sus reglas.
+# - dias_maximos_por_tipo_empleado: sobreescribe dias_maximos para ese tipo de empleado
+# - contador_anual: campo de Contador donde se acumulan los dias; el tope anual es dias_maximos
 CATALOGO_PRESTACIONES = {
     TipoPrestacion.LICENCIA_MEDICA: {
         "nombre": "Licencia Medica",
         "descripcion": "Licencia por enfermedad con dictamen medico del ISSTEP",
         "dias_maximos": None,  # Segun dictamen
         "documentos_requeridos": ["Dictamen medico ISSTEP"],
-        "requisitos": ["Antiguedad minima de 6 meses + 1 dia"],
+        "requisitos": [REQUISITO_ANTIGUEDAD],
     },
     TipoPrestacion.CUIDADOS_MATERNOS: {
         "nombre": "Cuidados Maternos/Paternos",
@@ -27,29 +34,33 @@ CATALOGO_PRESTACIONES = {
             "Carnet ISSTEP",
         ],
         "requisitos": [
-            "Antiguedad minima de 6 meses + 1 dia",
+            REQUISITO_ANTIGUEDAD,
             "Hijos hasta 8 anios 11 meses",
             "Maximo 7 dias habiles por anio natural",
         ],
+        "contador_anual": "cuidados_maternos_usados",
     },
     TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES: {
         "nombre": "Cuidados Medicos Familiares",
         "descripcion": "Para conyuge, padres o hijos dependientes economicamente",
-        "dias_maximos": 14,  # Docente=14, Apoyo=12, se ajusta en validacion
+        "dias_maximos": 14,
+        "dias_maximos_por_tipo_empleado": {TipoEmpleado.APOYO: 12},
         "documentos_requeridos": [
             "Dictamen medico ISSTEP",
             "Comprobante de parentesco",
         ],
         "requisitos": [
-            "Antiguedad minima de 6 meses + 1 dia",
+            REQUISITO_ANTIGUEDAD,
             "Apoyo/Asistencia: max 12 dias habiles/anio",
             "Docente: max 14 dias habiles/anio",
         ],
+        "contador_anual": "cuidados_medicos_usados",
     },
     TipoPrestacion.FALLECIMIENTO_FAMILIAR: {
         "nombre": "Permiso por Fallecimiento de Familiar",
         "descripcion": "Para hijos, conyuge, padres o hermanos",
-        "dias_maximos": 6,  # Basica=5, Media/Superior=6
+        "dias_maximos": 6,
+        "dias_maximos_por_tipo_empleado": {TipoEmpleado.APOYO: 5},
         "documentos_requeridos": ["Acta de defuncion"],
         "requisitos": [
             "Familiar: Hijos, Conyuge, Padres, Hermanos",
@@ -77,7 +88,7 @@ CATALOGO_PRESTACIONES = {
         "descripcion": "5 dias habiles con goce de sueldo",
         "dias_maximos": 5,
         "documentos_requeridos": ["Acta de matrimonio"],
-        "requisitos": ["Antiguedad minima de 6 meses + 1 dia"],
+        "requisitos": [REQUISITO_ANTIGUEDAD],
     },
     TipoPrestacion.LICENCIA_PATERNIDAD: {
         "nombre": "Licencia por Paternidad",
@@ -87,18 +98,135 @@ CATALOGO_PRESTACIONES = {
             "Constancia de concubinato o alumbramiento",
             "Acta de nacimiento o adopcion",
         ],
-        "requisitos": ["Antiguedad minima de 6 meses + 1 dia"],
+        "requisitos": [REQUISITO_ANTIGUEDAD],
     },
 }
 
-# Nombramientos que NO pueden acceder a prestaciones
-NOMBRAMIENTOS_EXCLUIDOS = {
-    TipoNombramiento.INTERINO,
-    TipoNombramiento.LIMITADO,
-    TipoNombramiento.GRAVIDEZ,
-    TipoNombramiento.PREJUBILATORIO,
-    TipoNombramiento.HONORARIOS,
-}
+
+class _Solicitud:
+    """Datos de una solicitud de prestacion que reciben las verificaciones."""
+
+    def __init__(self, db, empleado, tipo, fecha_inicio, fecha_fin, dias_lab):
+        self.db = db
+        self.empleado = empleado
+        self.tipo = tipo
+        self.fecha_inicio = fecha_inicio
+        self.fecha_fin = fecha_fin
+        self.dias_lab = dias_lab
+
+
+Verificacion = Callable[[_Solicitud], Optional[str]]
+
+
+def _verificar_nombramiento(s: _Solicitud) -> Optional[str]:
+    if s.empleado.nombramiento in NOMBRAMIENTOS_EXCLUIDOS:
+        return f"No aplica para empleados con nombramiento: {s.empleado.nombramiento.value}"
+    return None
+
+
+def _verificar_antiguedad(s: _Solicitud) -> Optional[str]:
+    if not s.empleado.cumple_antiguedad_minima:
+        return (
+            f"Antiguedad insuficiente ({s.empleado.antiguedad_meses} meses). "
+            f"Se requieren {MESES_ANTIGUEDAD_MINIMA} meses + 1 dia."
+        )
+    return None
+
+
+def _verificar_fechas(s: _Solicitud) -> Optional[str]:
+    if s.fecha_inicio > s.fecha_fin:
+        return "La fecha de inicio debe ser anterior a la fecha de fin"
+    return None
+
+
+def _verificar_dias_maximos(dias_max: int) -> Verificacion:
+    def verificar(s: _Solicitud) -> Optional[str]:
+        if s.dias_lab > dias_max:
+            return f"Excede el maximo de {dias_max} dias habiles para este tipo de prestacion"
+        return None
+    return verificar
+
+
+def _verificar_limite_anual(campo: str, limite: int) -> Verificacion:
+    def verificar(s: _Solicitud) -> Optional[str]:
+        contador = s.db.query(Contador).filter(
+            Contador.empleado_id == s.empleado.id, Contador.anio == s.fecha_inicio.year
+        ).first()
+        if not contador:
+            return None
+        usado = getattr(contador, campo)
+        if usado + s.dias_lab > limite:
+            return (
+                f"Excede el limite anual. Usado: {usado} dias, "
+                f"solicitando: {s.dias_lab}, maximo: {limite}"
+            )
+        return None
+    return verificar
+
+
+MENSAJE_TRASLAPE = "Ya existe una prestacion del mismo tipo en este periodo"
+
+
+def _verificar_traslape(s: _Solicitud) -> Optional[str]:
+    if indice_prestaciones.hay_traslape(s.db, s.empleado.id, s.tipo, s.fecha_inicio, s.fecha_fin):
+        return MENSAJE_TRASLAPE
+    return None
+
+
+class ReglaPrestacion:
+    """Reglas de un tipo de prestacion para un tipo de empleado.
+
+    Se compila una vez a partir de CATALOGO_PRESTACIONES: solo incluye las
+    verificaciones que aplican a la combinacion (tipo, tipo de empleado), en
+    el mismo orden en que se reportan los errores.
+    """
+
+    def __init__(self, tipo: TipoPrestacion, tipo_empleado: Optional[TipoEmpleado], info: dict):
+        self.tipo = tipo
+        self.tipo_empleado = tipo_empleado
+        self.dias_maximos = info.get("dias_maximos_por_tipo_empleado", {}).get(
+            tipo_empleado, info.get("dias_maximos")
+        )
+        self.contador_anual = info.get("contador_anual")
+        self.documentos_requeridos = info.get("documentos_requeridos", [])
+
+        self.verificaciones: list[tuple[str, Verificacion]] = [
+            ("nombramiento", _verificar_nombramiento),
+            ("antiguedad", _verificar_antiguedad),
+            ("fechas", _verificar_fechas),
+        ]
+        if self.dias_maximos:
+            self.verificaciones.append(
+                ("dias_maximos", _verificar_dias_maximos(self.dias_maximos))
+            )
+            if self.contador_anual:
+                self.verificaciones.append(
+                    ("limite_anual", _verificar_limite_anual(self.contador_anual, self.dias_maximos))
+                )
+        self.verificaciones.append(("traslape", _verificar_traslape))
+
+    @property
+    def nombres_verificaciones(self) -> list[str]:
+        return [nombre for nombre, _ in self.verificaciones]
+
+
+def compilar_reglas(catalogo: dict) -> dict:
+    """Reglas compiladas por (tipo de prestacion, tipo de empleado)."""
+    return {
+        (tipo, tipo_empleado): ReglaPrestacion(tipo, tipo_empleado, info)
+        for tipo, info in catalogo.items()
+        for tipo_empleado in TipoEmpleado
+    }
+
+
+REGLAS_PRESTACIONES = compilar_reglas(CATALOGO_PRESTACIONES)
+
+
+def obtener_regla(tipo: TipoPrestacion, tipo_empleado: Optional[TipoEmpleado]) -> ReglaPrestacion:
+    regla = REGLAS_PRESTACIONES.get((tipo, tipo_empleado))
+    if regla is None:
+        regla = ReglaPrestacion(tipo, tipo_empleado, CATALOGO_PRESTACIONES.get(tipo, {}))
+    return regla
 
 
 def validar_prestacion(
@@ -109,85 +237,26 @@ def validar_prestacion(
     fecha_fin: date,
     dias_solicitados: int = None,
 ) -> PrestacionValidacionResponse:
-    errores = []
+    regla = obtener_regla(tipo, empleado.tipo)
     advertencias = []
-    catalogo = CATALOGO_PRESTACIONES.get(tipo, {})
 
-    # 1. Validar nombramiento
-    if empleado.nombramiento in NOMBRAMIENTOS_EXCLUIDOS:
-        errores.append(
-            f"No aplica para empleados con nombramiento: {empleado.nombramiento.value}"
-        )
-
-    # 2. Validar antiguedad
-    if not empleado.cumple_antiguedad_minima:
-        errores.append(
-            f"Antiguedad insuficiente ({empleado.antiguedad_meses} meses). "
-            "Se requieren 6 meses + 1 dia."
-        )
-
-    # 3. Validar fechas
-    if fecha_inicio > fecha_fin:
-        errores.append("La fecha de inicio debe ser anterior a la fecha de fin")
-
-    # 4. Calcular dias laborales
     dias_lab = calendario_service.calcular_dias_laborales(fecha_inicio, fecha_fin)
     if dias_solicitados and dias_solicitados != dias_lab:
         advertencias.append(
             f"Dias solicitados ({dias_solicitados}) difiere de dias laborales calculados ({dias_lab})"
         )
 
-    # 5. Validar dias maximos segun tipo
-    dias_max = catalogo.get("dias_maximos")
-    if tipo == TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES:
-        dias_max = 12 if empleado.tipo == TipoEmpleado.APOYO else 14
-
-    if tipo == TipoPrestacion.FALLECIMIENTO_FAMILIAR:
-        dias_max = 5 if empleado.tipo == TipoEmpleado.APOYO else 6
-
-    if dias_max and dias_lab > dias_max:
-        errores.append(f"Excede el maximo de {dias_max} dias habiles para este tipo de prestacion")
-
-    # 6. Validar contadores anuales para tipos acumulables
-    anio = fecha_inicio.year
-    contador = db.query(Contador).filter(
-        Contador.empleado_id == empleado.id, Contador.anio == anio
-    ).first()
-
-    if tipo == TipoPrestacion.CUIDADOS_MATERNOS and contador:
-        usado = contador.cuidados_maternos_usados
-        if usado + dias_lab > 7:
-            errores.append(
-                f"Excede el limite anual. Usado: {usado} dias, solicitando: {dias_lab}, maximo: 7"
-            )
-
-    if tipo == TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES and contador:
-        usado = contador.cuidados_medicos_usados
-        limite = 12 if empleado.tipo == TipoEmpleado.APOYO else 14
-        if usado + dias_lab > limite:
-            errores.append(
-                f"Excede el limite anual. Usado: {usado} dias, solicitando: {dias_lab}, maximo: {limite}"
-            )
-
-    # 7. Verificar si ya tiene prestacion activa del mismo tipo en el periodo
-    prestacion_existente = (
-        db.query(Prestacion)
-        .filter(
-            Prestacion.empleado_id == empleado.id,
-            Prestacion.tipo == tipo,
-            Prestacion.estado != EstadoPrestacion.RECHAZADA,
-            Prestacion.fecha_inicio <= fecha_fin,
-            Prestacion.fecha_fin >= fecha_inicio,
-        )
-        .first()
-    )
-    if prestacion_existente:
-        errores.append("Ya existe una prestacion del mismo tipo en este periodo")
+    solicitud = _Solicitud(db, empleado, tipo, fecha_inicio, fecha_fin, dias_lab)
+    errores = []
+    for _, verificar in regla.verificaciones:
+        error = verificar(solicitud)
+        if error:
+            errores.append(error)
 
     return PrestacionValidacionResponse(
         valido=len(errores) == 0,
         errores=errores,
         advertencias=advertencias,
-        documentos_requeridos=catalogo.get("documentos_requeridos", []),
-        dias_maximos=dias_max,
+        documentos_requeridos=regla.documentos_requeridos,
+        dias_maximos=regla.dias_maximos,
     )
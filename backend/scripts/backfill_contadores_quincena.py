@@ -0,0 +1,43 @@
+"""Reconstruye contadores_quincena a partir de los justificantes.
+
+Necesario una vez en bases de datos con permisos por horas anteriores a la
+tabla de contadores por quincena. Se puede ejecutar de nuevo sin duplicar.
+
+contadores_quincena es el unico registro de permisos por horas: las columnas
+contadores.permisos_horas_q1/q2 ya no se usan (los totales del anio se
+calculan de contadores_quincena) y este script no las toca.
+"""
+import sys
+from collections import Counter
+sys.path.insert(0, ".")
+
+from app.database import SessionLocal, create_tables
+from app.models.contador import ContadorQuincena
+from app.models.justificante import Justificante, TipoJustificante
+from app.utils.helpers import obtener_quincena
+
+create_tables()
+
+db = SessionLocal()
+
+try:
+    quincenas: Counter = Counter()
+    fechas = db.query(Justificante.empleado_id, Justificante.fecha_inicio).filter(
+        Justificante.tipo == TipoJustificante.PERMISO_HORAS
+    )
+    for empleado_id, fecha in fechas:
+        quincenas[(empleado_id, fecha.year, fecha.month, obtener_quincena(fecha))] += 1
+
+    db.query(ContadorQuincena).delete()
+    for (empleado_id, anio, mes, quincena), total in quincenas.items():
+        db.add(ContadorQuincena(
+            empleado_id=empleado_id, anio=anio, mes=mes, quincena=quincena, permisos_horas=total,
+        ))
+
+    db.commit()
+    print(f"Contadores de quincena reconstruidos: {len(quincenas)} quincenas, {sum(quincenas.values())} permisos")
+except Exception as e:
+    print(f"Error: {e}")
+    db.rollback()
+finally:
+    db.close()
@@ -0,0 +1,75 @@
+"""Implementacion de referencia dia por dia del calendario laboral.
+
+Reproduce el algoritmo original (recorrer fecha por fecha) usando solo las
+listas publicas de festivos y vacaciones, para comparar contra los indices
+precalculados de CalendarioService.
+"""
+from datetime import date, timedelta
+from typing import Tuple
+
+from app.services.calendario_service import CalendarioService
+
+
+class CalendarioReferencia:
+    def __init__(self, calendario: CalendarioService):
+        self.calendario = calendario
+        self.vacaciones = calendario.obtener_vacaciones()
+
+    def es_dia_laboral(self, fecha: date) -> bool:
+        if fecha.weekday() >= 5:
+            return False
+        if fecha in self.calendario.obtener_festivos(fecha.year):
+            return False
+        for inicio, fin in self.vacaciones:
+            if inicio <= fecha <= fin:
+                return False
+        return True
+
+    def calcular_dias_laborales(self, fecha_inicio: date, fecha_fin: date) -> int:
+        dias = 0
+        fecha_actual = fecha_inicio
+        while fecha_actual <= fecha_fin:
+            if self.es_dia_laboral(fecha_actual):
+                dias += 1
+            fecha_actual += timedelta(days=1)
+        return dias
+
+    def agregar_dias_laborales(self, fecha_inicio: date, num_dias: int) -> date:
+        fecha_actual = fecha_inicio
+        dias_contados = 0
+        while dias_contados < num_dias:
+            fecha_actual += timedelta(days=1)
+            if self.es_dia_laboral(fecha_actual):
+                dias_contados += 1
+        return fecha_actual
+
+    def restar_dias_laborales(self, fecha_inicio: date, num_dias: int) -> date:
+        fecha_actual = fecha_inicio
+        dias_contados = 0
+        while dias_contados < num_dias:
+            fecha_actual -= timedelta(days=1)
+            if self.es_dia_laboral(fecha_actual):
+                dias_contados += 1
+        return fecha_actual
+
+    def esta_en_periodo_bloqueado_vacaciones(
+        self, fecha: date, dias_antes: int = 15, dias_despues: int = 15
+    ) -> Tuple[bool, str]:
+        for inicio_vac, fin_vac in self.vacaciones:
+            fecha_bloqueo_inicio = self.restar_dias_laborales(inicio_vac, dias_antes)
+            fecha_bloqueo_fin = self.agregar_dias_laborales(fin_vac, dias_despues)
+            if fecha_bloqueo_inicio <= fecha <= inicio_vac:
+                return True, f"Bloqueado: {dias_antes} dias laborales antes de vacaciones ({inicio_vac})"
+            if fin_vac <= fecha <= fecha_bloqueo_fin:
+                return True, f"Bloqueado: {dias_despues} dias laborales despues de vacaciones ({fin_vac})"
+        return False, ""
+
+    def esta_cerca_de_festivo(self, fecha: date) -> Tuple[bool, str]:
+        for festivo in self.calendario.obtener_festivos(fecha.year):
+            dia_antes = self.restar_dias_laborales(festivo, 1)
+            dia_despues = self.agregar_dias_laborales(festivo, 1)
+            if fecha == dia_antes:
+                return True, f"Bloqueado: 1 dia laboral antes de festivo ({festivo})"
+            if fecha == dia_despues:
+                return True, f"Bloqueado: 1 dia laboral despues de festivo ({festivo})"
+        return False, ""
@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+import pytest
+
+# La configuracion se lee al importar la app: usar una BD temporal en las pruebas.
+# TEST_DATABASE_URL corre la suite contra otra BD desechable (p. ej. PostgreSQL)
+_temporal = tempfile.mkdtemp()
+if os.environ.get("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+else:
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{_temporal}/test.db")
+os.environ.setdefault("PRINCIPAL_CACHE_ARCHIVO", f"{_temporal}/.version_usuarios")
+os.environ.setdefault("CALENDARIO_VERSION_ARCHIVO", f"{_temporal}/.version_calendario")
+os.environ.setdefault("EMPLEADOS_VERSION_DIR", f"{_temporal}/versiones_empleados")
+# Las pruebas leen audit_log justo despues de la accion
+os.environ.setdefault("AUDITORIA_MODO", "sincrono")
+
+from app import models  # noqa: E402,F401
+from app.config import settings  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+from app.services.calendario_service import CalendarioService  # noqa: E402
+
+if os.environ.get("TEST_DATABASE_URL"):
+    # La BD de pruebas es desechable: empezar cada corrida con tablas vacias
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def calendario():
+    """CalendarioService nuevo, sin ajustes de BD, con las vacaciones configuradas."""
+    return CalendarioService()
+
+
+@pytest.fixture
+def calendario_multiciclo(monkeypatch):
+    """CalendarioService con vacaciones en dos ciclos escolares y periodos traslapados."""
+    monkeypatch.setattr(settings, "VACACIONES_POR_CICLO", {
+        "2025-2026": [
+            ("2026-07-17", "2026-08-18"),
+            ("2025-12-22", "2026-01-06"),
+            ("2026-04-06", "2026-04-17"),
+            ("2026-03-02", "2026-03-06"),
+            ("2026-03-20", "2026-03-27"),
+        ],
+        "2026-2027": [
+            ("2026-12-21", "2027-01-08"),
+            ("2027-03-22", "2027-04-02"),
+        ],
+    })
+    return CalendarioService()
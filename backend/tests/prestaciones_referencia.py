@@ -0,0 +1,97 @@
+"""Implementacion de referencia de validar_prestacion con las ramas por tipo.
+
+Reproduce el validador anterior a las reglas compiladas (un if por tipo de
+prestacion y de empleado, limites escritos a mano) para comparar contra
+REGLAS_PRESTACIONES.
+"""
+from datetime import date
+
+from app.models import Contador, Empleado, EstadoPrestacion, Prestacion, TipoEmpleado, TipoPrestacion
+from app.services.calendario_service import calendario_service
+from app.services.elegibilidad_service import NOMBRAMIENTOS_EXCLUIDOS
+from app.validators.prestacion_validator import CATALOGO_PRESTACIONES
+
+DIAS_MAXIMOS = {
+    TipoPrestacion.LICENCIA_MEDICA: None,
+    TipoPrestacion.CUIDADOS_MATERNOS: 7,
+    TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES: 14,
+    TipoPrestacion.FALLECIMIENTO_FAMILIAR: 6,
+    TipoPrestacion.MEDIA_HORA_TOLERANCIA: None,
+    TipoPrestacion.LICENCIA_NUPCIAS: 5,
+    TipoPrestacion.LICENCIA_PATERNIDAD: 6,
+}
+
+
+def campo_contador_aprobacion(tipo: TipoPrestacion):
+    """Campo de Contador que sumaba la aprobacion antes de las reglas compiladas."""
+    if tipo == TipoPrestacion.CUIDADOS_MATERNOS:
+        return "cuidados_maternos_usados"
+    if tipo == TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES:
+        return "cuidados_medicos_usados"
+    return None
+
+
+def validar_prestacion_referencia(
+    db, empleado: Empleado, tipo: TipoPrestacion, fecha_inicio: date, fecha_fin: date, dias_solicitados=None,
+) -> dict:
+    errores = []
+    advertencias = []
+
+    if empleado.nombramiento in NOMBRAMIENTOS_EXCLUIDOS:
+        errores.append(f"No aplica para empleados con nombramiento: {empleado.nombramiento.value}")
+
+    if not empleado.cumple_antiguedad_minima:
+        errores.append(
+            f"Antiguedad insuficiente ({empleado.antiguedad_meses} meses). "
+            "Se requieren 6 meses + 1 dia."
+        )
+
+    if fecha_inicio > fecha_fin:
+        errores.append("La fecha de inicio debe ser anterior a la fecha de fin")
+
+    dias_lab = calendario_service.calcular_dias_laborales(fecha_inicio, fecha_fin)
+    if dias_solicitados and dias_solicitados != dias_lab:
+        advertencias.append(
+            f"Dias solicitados ({dias_solicitados}) difiere de dias laborales calculados ({dias_lab})"
+        )
+
+    dias_max = DIAS_MAXIMOS[tipo]
+    if tipo == TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES:
+        dias_max = 12 if empleado.tipo == TipoEmpleado.APOYO else 14
+    if tipo == TipoPrestacion.FALLECIMIENTO_FAMILIAR:
+        dias_max = 5 if empleado.tipo == TipoEmpleado.APOYO else 6
+    if dias_max and dias_lab > dias_max:
+        errores.append(f"Excede el maximo de {dias_max} dias habiles para este tipo de prestacion")
+
+    contador = db.query(Contador).filter(
+        Contador.empleado_id == empleado.id, Contador.anio == fecha_inicio.year
+    ).first()
+    if tipo == TipoPrestacion.CUIDADOS_MATERNOS and contador:
+        usado = contador.cuidados_maternos_usados
+        if usado + dias_lab > 7:
+            errores.append(f"Excede el limite anual. Usado: {usado} dias, solicitando: {dias_lab}, maximo: 7")
+    if tipo == TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES and contador:
+        usado = contador.cuidados_medicos_usados
+        limite = 12 if empleado.tipo == TipoEmpleado.APOYO else 14
+        if usado + dias_lab > limite:
+            errores.append(
+                f"Excede el limite anual. Usado: {usado} dias, solicitando: {dias_lab}, maximo: {limite}"
+            )
+
+    existente = db.query(Prestacion).filter(
+        Prestacion.empleado_id == empleado.id,
+        Prestacion.tipo == tipo,
+        Prestacion.estado != EstadoPrestacion.RECHAZADA,
+        Prestacion.fecha_inicio <= fecha_fin,
+        Prestacion.fecha_fin >= fecha_inicio,
+    ).first()
+    if existente:
+        errores.append("Ya existe una prestacion del mismo tipo en este periodo")
+
+    return {
+        "valido": not errores,
+        "errores": errores,
+        "advertencias": advertencias,
+        "documentos_requeridos": CATALOGO_PRESTACIONES[tipo]["documentos_requeridos"],
+        "dias_maximos": dias_max,
+    }
@@ -0,0 +1,90 @@
+"""Escritor de auditoria en modo diferido (la suite usa el modo sincrono)."""
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.main import app  # noqa: F401  (crea las tablas)
+from app.models import AuditLog
+from app.services.auditoria_service import EscritorAuditoria
+
+
+def _fila(accion):
+    return dict(
+        user_id=1, username="auditor", accion=accion, tabla_afectada=None, registro_id=None,
+        datos_anteriores=None, datos_nuevos=None, ip_address=None, timestamp=datetime.utcnow(),
+    )
+
+
+def _contar(prefijo):
+    db = SessionLocal()
+    try:
+        return db.query(AuditLog).filter(AuditLog.accion.startswith(prefijo)).count()
+    finally:
+        db.close()
+
+
+def test_escribe_en_lotes():
+    inserts = []
+
+    def registrar(conn, clauseelement, multiparams, params, execution_options):
+        if getattr(clauseelement, "table", None) is AuditLog.__table__:
+            inserts.append(len(multiparams))
+
+    escritor = EscritorAuditoria("diferido", lote=10, intervalo_ms=60_000, maximo_cola=100)
+    event.listen(engine, "before_execute", registrar)
+    try:
+        for i in range(25):
+            escritor.registrar(_fila(f"lote {i}"))
+        escritor.vaciar(timeout=10)
+    finally:
+        event.remove(engine, "before_execute", registrar)
+        escritor.detener()
+
+    assert _contar("lote ") == 25
+    assert inserts == [10, 10, 5]
+    assert escritor.estadisticas()["escritos"] == 25
+
+
+def test_escribe_por_intervalo_sin_vaciar():
+    escritor = EscritorAuditoria("diferido", lote=1000, intervalo_ms=50, maximo_cola=100)
+    try:
+        escritor.registrar(_fila("intervalo"))
+        for _ in range(100):
+            if escritor.estadisticas()["escritos"]:
+                break
+            escritor._hilo.join(0.05)
+        assert _contar("intervalo") == 1
+    finally:
+        escritor.detener()
+
+
+def test_detener_escribe_lo_pendiente():
+    escritor = EscritorAuditoria("diferido", lote=1000, intervalo_ms=60_000, maximo_cola=5)
+    # La cola es menor que los eventos: registrar espera en vez de descartar
+    for i in range(20):
+        escritor.registrar(_fila(f"apagado {i}"))
+    escritor.detener()
+    assert _contar("apagado ") == 20
+    assert escritor.estadisticas()["pendientes"] == 0
+
+
+def test_reintenta_si_falla_la_escritura():
+    escritor = EscritorAuditoria("diferido", lote=2, intervalo_ms=20, maximo_cola=2)
+    insertar = escritor._insertar
+    fallos = []
+
+    def insertar_con_fallo(filas):
+        if len(fallos) < 3:
+            fallos.append(len(filas))
+            raise RuntimeError("BD no disponible")
+        insertar(filas)
+
+    escritor._insertar = insertar_con_fallo
+    for i in range(10):
+        escritor.registrar(_fila(f"reintento {i}"))
+    escritor.detener()
+
+    assert fallos == [2, 2, 2]
+    assert _contar("reintento ") == 10
+    assert escritor.estadisticas()["errores"] == 3
@@ -0,0 +1,55 @@
+"""Benchmarks de los metodos calientes del calendario (pytest-benchmark).
+
+Ejecutar solo los benchmarks: ``pytest tests/test_calendario_benchmark.py --benchmark-only``
+"""
+from datetime import date
+
+import pytest
+
+RANGOS = {
+    "1_dia": (date(2026, 3, 10), date(2026, 3, 10)),
+    "10_dias": (date(2026, 3, 10), date(2026, 3, 19)),
+    "365_dias": (date(2026, 2, 1), date(2027, 1, 31)),
+    "cruce_de_anio": (date(2025, 12, 15), date(2026, 1, 20)),
+}
+
+
+@pytest.fixture
+def calendario_caliente(calendario):
+    # Construir los indices antes de medir: el benchmark mide la consulta, no la carga
+    calendario.calcular_dias_laborales(date(2024, 1, 1), date(2028, 12, 31))
+    calendario.esta_en_periodo_bloqueado_vacaciones(date(2026, 1, 1))
+    calendario.esta_cerca_de_festivo(date(2026, 1, 1))
+    return calendario
+
+
+@pytest.mark.parametrize("rango", RANGOS)
+def test_bench_calcular_dias_laborales(benchmark, calendario_caliente, rango):
+    inicio, fin = RANGOS[rango]
+    benchmark(calendario_caliente.calcular_dias_laborales, inicio, fin)
+
+
+@pytest.mark.parametrize("num_dias", [1, 10, 365])
+def test_bench_agregar_dias_laborales(benchmark, calendario_caliente, num_dias):
+    benchmark(calendario_caliente.agregar_dias_laborales, date(2026, 12, 20), num_dias)
+
+
+@pytest.mark.parametrize("num_dias", [1, 10, 365])
+def test_bench_restar_dias_laborales(benchmark, calendario_caliente, num_dias):
+    benchmark(calendario_caliente.restar_dias_laborales, date(2026, 1, 12), num_dias)
+
+
+@pytest.mark.parametrize("fecha", [date(2026, 1, 14), date(2026, 6, 30), date(2026, 8, 20)])
+def test_bench_periodo_bloqueado_vacaciones(benchmark, calendario_caliente, fecha):
+    benchmark(calendario_caliente.esta_en_periodo_bloqueado_vacaciones, fecha, 15)
+
+
+@pytest.mark.parametrize("fecha", [date(2026, 1, 2), date(2026, 3, 17), date(2026, 7, 1)])
+def test_bench_cerca_de_festivo(benchmark, calendario_caliente, fecha):
+    benchmark(calendario_caliente.esta_cerca_de_festivo, fecha)
+
+
+def test_bench_lote_1000_rangos(benchmark, calendario_caliente):
+    inicios = [date(2026, 1, 5)] * 1000
+    fines = [date(2026, 12, 18)] * 1000
+    benchmark(calendario_caliente.calcular_dias_laborales_lote, inicios, fines)
@@ -0,0 +1,155 @@
+"""Rutas de /api/calendario: registro de rangos, tipos de dia y ETag del mes."""
+import importlib.util
+from datetime import date
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models import CalendarioLaboral, TipoDia, User, UserRole
+from app.services.calendario_service import CalendarioService, calendario_service
+from app.utils.security import create_access_token
+
+ES_POSTGRES = engine.dialect.name == "postgresql"
+MIGRACIONES = Path(__file__).resolve().parents[1] / "alembic" / "versions"
+
+
+def _headers(username, role=UserRole.ADMIN):
+    db = SessionLocal()
+    if db.query(User).filter(User.username == username).first() is None:
+        db.add(User(username=username, password_hash="x", role=role))
+        db.commit()
+    db.close()
+    return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+def _migracion(nombre):
+    spec = importlib.util.spec_from_file_location(nombre, MIGRACIONES / f"{nombre}.py")
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def test_rango_demasiado_largo_regresa_422():
+    admin = _headers("admin.calendario.rango")
+    with TestClient(app) as cliente:
+        respuesta = cliente.post("/api/calendario/", headers=admin, json={
+            "fecha": "2030-01-01", "fecha_fin": "2032-12-31", "tipo": "Vacacion",
+        })
+    assert respuesta.status_code == 422
+    db = SessionLocal()
+    assert db.query(CalendarioLaboral).filter(CalendarioLaboral.anio == 2031).count() == 0
+    db.close()
+
+
+def test_rango_en_el_limite_se_registra(monkeypatch):
+    monkeypatch.setattr(settings, "CALENDARIO_MAX_DIAS_RANGO", 5)
+    admin = _headers("admin.calendario.rango")
+    with TestClient(app) as cliente:
+        respuesta = cliente.post("/api/calendario/", headers=admin, json={
+            "fecha": "2033-03-01", "fecha_fin": "2033-03-05", "tipo": "Vacacion",
+        })
+        excedido = cliente.post("/api/calendario/", headers=admin, json={
+            "fecha": "2033-04-01", "fecha_fin": "2033-04-06", "tipo": "Vacacion",
+        })
+    assert respuesta.status_code == 200, respuesta.text
+    assert len(respuesta.json()) == 5
+    assert excedido.status_code == 422
+
+
+def test_registrar_dia_inhabil():
+    admin = _headers("admin.calendario.rango")
+    with TestClient(app) as cliente:
+        respuesta = cliente.post("/api/calendario/", headers=admin, json={
+            "fecha": "2033-06-15", "tipo": "Inhabil", "descripcion": "Suspension de labores",
+        })
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json()[0]["tipo"] == "Inhabil"
+
+
+@pytest.mark.skipif(not ES_POSTGRES, reason="requiere TEST_DATABASE_URL de PostgreSQL")
+def test_migracion_inhabil_idempotente():
+    migracion = _migracion("0005_tipodia_inhabil")
+    for _ in range(2):
+        with engine.connect() as conn:
+            with Operations.context(MigrationContext.configure(conn)):
+                migracion.upgrade()
+    with engine.connect() as conn:
+        etiquetas = set(conn.execute(text(
+            "SELECT enumlabel FROM pg_enum JOIN pg_type ON pg_type.oid = enumtypid WHERE typname = 'tipodia'"
+        )).scalars())
+    assert "INHABIL" in etiquetas
+
+
+def _dia(mes, fecha):
+    return next(d for d in mes.json()["dias"] if d["fecha"] == fecha)
+
+
+def test_mes_con_etag_vigente_regresa_304():
+    admin = _headers("admin.calendario.rango")
+    with TestClient(app) as cliente:
+        primera = cliente.get("/api/calendario/2034/2", headers=admin)
+        etag = primera.headers["etag"]
+        vigente = cliente.get("/api/calendario/2034/2", headers={**admin, "If-None-Match": etag})
+        otra = cliente.get("/api/calendario/2034/2", headers={**admin, "If-None-Match": '"otro"'})
+    assert primera.status_code == 200
+    assert vigente.status_code == 304
+    assert vigente.content == b""
+    assert vigente.headers["etag"] == etag
+    assert otra.status_code == 200
+    assert otra.json() == primera.json()
+
+
+def test_etag_cambia_al_registrar_y_eliminar():
+    admin = _headers("admin.calendario.rango")
+    with TestClient(app) as cliente:
+        antes = cliente.get("/api/calendario/2034/5", headers=admin)
+        assert _dia(antes, "2034-05-10")["laboral"]
+
+        registro = cliente.post("/api/calendario/", headers=admin, json={"fecha": "2034-05-10", "tipo": "Festivo"})
+        assert registro.status_code == 200, registro.text
+        con_festivo = cliente.get("/api/calendario/2034/5", headers={**admin, "If-None-Match": antes.headers["etag"]})
+        assert con_festivo.status_code == 200
+        assert con_festivo.headers["etag"] != antes.headers["etag"]
+        assert _dia(con_festivo, "2034-05-10")["estado"] == "festivo"
+
+        borrado = cliente.delete(f"/api/calendario/{registro.json()[0]['id']}", headers=admin)
+        assert borrado.status_code == 200
+        sin_festivo = cliente.get(
+            "/api/calendario/2034/5", headers={**admin, "If-None-Match": con_festivo.headers["etag"]}
+        )
+    assert sin_festivo.status_code == 200
+    assert sin_festivo.headers["etag"] != con_festivo.headers["etag"]
+    assert _dia(sin_festivo, "2034-05-10")["laboral"]
+
+
+def test_mes_no_obsoleto_tras_cambio_de_otro_worker(monkeypatch):
+    """Otro worker registra un dia; este, con el mes en cache, no sirve el ETag ni el mes viejos."""
+    # Sin esperar CALENDARIO_REVISION_MS entre revisiones del archivo de version
+    monkeypatch.setattr(calendario_service, "intervalo_revision", 0)
+    monkeypatch.setattr(calendario_service, "_proxima_revision", 0.0)
+    otro_worker = CalendarioService(settings.CALENDARIO_VERSION_ARCHIVO)
+    admin = _headers("admin.calendario.rango")
+    fecha = date(2034, 9, 12)
+    with TestClient(app) as cliente:
+        antes = cliente.get("/api/calendario/2034/9", headers=admin)
+        assert _dia(antes, fecha.isoformat())["laboral"]
+
+        db = SessionLocal()
+        try:
+            db.add(CalendarioLaboral(fecha=fecha, anio=fecha.year, tipo=TipoDia.INHABIL))
+            db.commit()
+            otro_worker.recargar_anio(db, fecha.year)
+        finally:
+            db.close()
+
+        despues = cliente.get("/api/calendario/2034/9", headers={**admin, "If-None-Match": antes.headers["etag"]})
+    assert despues.status_code == 200
+    assert despues.headers["etag"] != antes.headers["etag"]
+    assert _dia(despues, fecha.isoformat())["estado"] == "inhabil"
@@ -0,0 +1,196 @@
+import sys
+import threading
+from datetime import date, timedelta
+
+import pytest
+from hypothesis import HealthCheck, given, settings as hypothesis_settings, strategies as st
+
+from app.services.calendario_service import CalendarioService
+
+from .calendario_referencia import CalendarioReferencia
+
+fechas = st.dates(min_value=date(2024, 1, 1), max_value=date(2028, 12, 31))
+# Los calendarios de los fixtures solo se consultan, se pueden reutilizar entre ejemplos
+propiedad = hypothesis_settings(
+    max_examples=150,
+    deadline=None,
+    suppress_health_check=[HealthCheck.function_scoped_fixture],
+)
+
+
+@pytest.fixture(params=["calendario", "calendario_multiciclo"])
+def calendarios(request):
+    calendario = request.getfixturevalue(request.param)
+    return calendario, CalendarioReferencia(calendario)
+
+
+# --- Casos conocidos ---
+
+def test_festivo_y_fin_de_semana(calendario):
+    assert not calendario.es_dia_laboral(date(2026, 2, 2))   # Constitucion
+    assert not calendario.es_dia_laboral(date(2026, 2, 7))   # Sabado
+    assert calendario.es_dia_laboral(date(2026, 2, 3))
+
+
+def test_vacaciones_que_cruzan_anio(calendario):
+    assert calendario.esta_en_vacaciones(date(2025, 12, 29))
+    assert calendario.esta_en_vacaciones(date(2026, 1, 6))
+    assert not calendario.esta_en_vacaciones(date(2026, 1, 7))
+    assert calendario.obtener_siguiente_dia_laboral(date(2025, 12, 19)) == date(2026, 1, 7)
+
+
+def test_calcular_dias_laborales_rango_invertido(calendario):
+    assert calendario.calcular_dias_laborales(date(2026, 3, 10), date(2026, 3, 9)) == 0
+
+
+def test_agregar_y_restar_cero_dias(calendario):
+    sabado = date(2026, 2, 7)
+    assert calendario.agregar_dias_laborales(sabado, 0) == sabado
+    assert calendario.restar_dias_laborales(sabado, 0) == sabado
+
+
+def test_indices_acotados_por_lru(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "CALENDARIO_ANIOS_EN_CACHE", 2)
+    calendario = CalendarioService()
+    referencia = CalendarioReferencia(calendario)
+    inicio, fin = date(2020, 5, 4), date(2027, 8, 20)
+    assert calendario.calcular_dias_laborales(inicio, fin) == referencia.calcular_dias_laborales(inicio, fin)
+    assert len(calendario._indices) <= 2
+
+
+
+def test_caches_compartidas_entre_hilos(monkeypatch):
+    """Lecturas con desalojos e invalidaciones simultaneas, como en el threadpool."""
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "CALENDARIO_ANIOS_EN_CACHE", 2)
+    calendario = CalendarioService()
+    referencia = CalendarioReferencia(calendario)
+    casos = [(date(anio, 3, 1), date(anio + 1, 2, 10)) for anio in range(2020, 2028)]
+    esperado = [referencia.calcular_dias_laborales(i, f) for i, f in casos]
+    terminado = threading.Event()
+    errores = []
+
+    def leer():
+        try:
+            for _ in range(40):
+                assert [calendario.calcular_dias_laborales(i, f) for i, f in casos] == esperado
+                calendario.esta_en_periodo_bloqueado_vacaciones(date(2026, 7, 1))
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errores.append(e)
+
+    def invalidar():
+        anio = 2020
+        while not terminado.is_set():
+            calendario.invalidar_indices(anio)
+            anio = 2020 + (anio - 2019) % 8
+
+    lectores = [threading.Thread(target=leer) for _ in range(4)]
+    invalidador = threading.Thread(target=invalidar)
+    # Cambios de hilo mas frecuentes para que las carreras aparezcan
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        invalidador.start()
+        for t in lectores:
+            t.start()
+        for t in lectores:
+            t.join()
+    finally:
+        terminado.set()
+        invalidador.join()
+        sys.setswitchinterval(intervalo)
+    assert not errores
+    assert len(calendario._indices) <= 2
+
+
+def test_cambios_de_otro_worker(tmp_path):
+    """Un worker registra un dia en calendario_laboral; otro, con indices ya calculados, lo ve."""
+    from app.database import SessionLocal
+    from app.main import app  # noqa: F401 - crea las tablas
+    from app.models.calendario_laboral import CalendarioLaboral, TipoDia
+
+    archivo = str(tmp_path / ".version_calendario")
+    escritor = CalendarioService(archivo)
+    lector = CalendarioService(archivo)
+    fecha = date(2031, 6, 10)
+    assert lector.es_dia_laboral(fecha)
+
+    db = SessionLocal()
+    try:
+        db.add(CalendarioLaboral(fecha=fecha, anio=fecha.year, tipo=TipoDia.INHABIL))
+        db.commit()
+        escritor.recargar_anio(db, fecha.year)
+        assert not escritor.es_dia_laboral(fecha)
+        assert not lector.es_dia_laboral(fecha)
+
+        db.query(CalendarioLaboral).filter(CalendarioLaboral.fecha == fecha).delete()
+        db.commit()
+        escritor.recargar_anio(db, fecha.year)
+        assert lector.es_dia_laboral(fecha)
+    finally:
+        db.close()
+
+# --- Equivalencia contra la referencia dia por dia ---
+
+@propiedad
+@given(inicio=fechas, largo=st.integers(min_value=-5, max_value=800))
+def test_calcular_dias_laborales_equivale(calendarios, inicio, largo):
+    calendario, referencia = calendarios
+    fin = inicio + timedelta(days=largo)
+    assert calendario.calcular_dias_laborales(inicio, fin) == referencia.calcular_dias_laborales(inicio, fin)
+
+
+@propiedad
+@given(fecha=fechas, num_dias=st.integers(min_value=-3, max_value=300))
+def test_agregar_dias_laborales_equivale(calendarios, fecha, num_dias):
+    calendario, referencia = calendarios
+    assert calendario.agregar_dias_laborales(fecha, num_dias) == referencia.agregar_dias_laborales(fecha, num_dias)
+
+
+@propiedad
+@given(fecha=fechas, num_dias=st.integers(min_value=-3, max_value=300))
+def test_restar_dias_laborales_equivale(calendarios, fecha, num_dias):
+    calendario, referencia = calendarios
+    assert calendario.restar_dias_laborales(fecha, num_dias) == referencia.restar_dias_laborales(fecha, num_dias)
+
+
+@propiedad
+@given(
+    fecha=st.dates(min_value=date(2025, 6, 1), max_value=date(2027, 6, 30)),
+    dias_antes=st.sampled_from([1, 3, 15, 20]),
+    dias_despues=st.sampled_from([1, 15]),
+)
+def test_periodo_bloqueado_vacaciones_equivale(calendarios, fecha, dias_antes, dias_despues):
+    calendario, referencia = calendarios
+    assert calendario.esta_en_periodo_bloqueado_vacaciones(
+        fecha, dias_antes, dias_despues
+    ) == referencia.esta_en_periodo_bloqueado_vacaciones(fecha, dias_antes, dias_despues)
+
+
+@propiedad
+@given(fecha=fechas)
+def test_cerca_de_festivo_equivale(calendarios, fecha):
+    calendario, referencia = calendarios
+    assert calendario.esta_cerca_de_festivo(fecha) == referencia.esta_cerca_de_festivo(fecha)
+
+
+@propiedad
+@given(
+    inicios=st.lists(fechas, min_size=1, max_size=40),
+    largo=st.integers(min_value=-5, max_value=400),
+    num_dias=st.integers(min_value=-120, max_value=120),
+)
+def test_operaciones_lote_equivalen_a_escalares(calendario, inicios, largo, num_dias):
+    fines = [inicio + timedelta(days=largo) for inicio in inicios]
+    conteos = calendario.calcular_dias_laborales_lote(inicios, fines)
+    desplazadas = calendario.agregar_dias_laborales_lote(inicios, [num_dias] * len(inicios))
+    for inicio, fin, conteo, desplazada in zip(inicios, fines, conteos, desplazadas):
+        assert conteo == calendario.calcular_dias_laborales(inicio, fin)
+        if num_dias >= 0:
+            esperada = calendario.agregar_dias_laborales(inicio, num_dias)
+        else:
+            esperada = calendario.restar_dias_laborales(inicio, -num_dias)
+        assert desplazada.astype(date) == esperada
@@ -0,0 +1,133 @@
+"""Busqueda de fechas de dia economico contra validar_dia_economico dia por dia."""
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from hypothesis import HealthCheck, given, settings as hypothesis_settings, strategies as st
+
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.models import Contador, Empleado, TipoEmpleado, User, UserRole
+from app.utils.security import create_access_token
+from app.validators.dia_economico_validator import proximas_fechas_dia_economico, validar_dia_economico
+
+# El empleado del fixture se reutiliza: cada ejemplo reemplaza sus contadores
+propiedad = hypothesis_settings(
+    max_examples=25,
+    deadline=None,
+    suppress_health_check=[HealthCheck.function_scoped_fixture],
+)
+
+
+@pytest.fixture(scope="module")
+def empleado():
+    db = SessionLocal()
+    empleado = Empleado(
+        nombre_completo="Empleado Dias Economicos", claves_presupuestales="X", horario="8-15",
+        adscripcion="A", numero_asistencia="906", tipo=TipoEmpleado.DOCENTE,
+        fecha_ingreso=date(2015, 1, 1),
+    )
+    db.add(empleado)
+    db.flush()
+    usuario = User(username="empleado.economicos", password_hash="x", role=UserRole.USUARIO, empleado_id=empleado.id)
+    db.add(usuario)
+    db.commit()
+    resultado = {
+        "id": empleado.id,
+        "headers": {"Authorization": f"Bearer {create_access_token({'sub': usuario.username})}"},
+    }
+    db.close()
+    return resultado
+
+
+def _fijar_contadores(empleado_id, estados):
+    """Reemplaza los contadores del empleado; ``estados`` es {anio: (solicitudes, ultima)}."""
+    db = SessionLocal()
+    db.query(Contador).filter(Contador.empleado_id == empleado_id).delete()
+    for anio, (solicitudes, ultima) in estados.items():
+        db.add(Contador(
+            empleado_id=empleado_id, anio=anio,
+            solicitudes_economicos=solicitudes, fecha_ultima_solicitud_economico=ultima,
+        ))
+    db.commit()
+    db.close()
+
+
+def _referencia(db, empleado_id, desde, cantidad):
+    """Primeras ``cantidad`` fechas validas probando cada dia hasta el fin del anio siguiente."""
+    validas = []
+    fecha = desde
+    while fecha <= date(desde.year + 1, 12, 31) and len(validas) < cantidad:
+        validacion = validar_dia_economico(db, empleado_id, fecha)
+        if validacion.valido:
+            validas.append(validacion)
+        fecha += timedelta(days=1)
+    return validas
+
+
+@st.composite
+def contadores(draw, anio):
+    """Contador ausente, o con solicitudes y ultima fecha (laboral o no) dentro del anio."""
+    if draw(st.booleans()):
+        return None
+    solicitudes = draw(st.integers(min_value=0, max_value=settings.DIAS_ECONOMICOS_MAX_SOLICITUDES))
+    ultima = draw(st.one_of(st.none(), st.dates(min_value=date(anio, 1, 1), max_value=date(anio, 12, 31))))
+    return solicitudes, ultima
+
+
+@st.composite
+def escenarios(draw):
+    desde = draw(st.dates(min_value=date(2025, 10, 1), max_value=date(2026, 12, 31)))
+    estados = {}
+    for anio in (desde.year, desde.year + 1):
+        estado = draw(contadores(anio))
+        if estado is not None:
+            estados[anio] = estado
+    return desde, estados, draw(st.integers(min_value=1, max_value=8))
+
+
+@propiedad
+@given(escenario=escenarios())
+def test_proximas_fechas_equivale_a_validar(empleado, escenario):
+    desde, estados, cantidad = escenario
+    _fijar_contadores(empleado["id"], estados)
+    db = SessionLocal()
+    try:
+        esperadas = [v.fecha_inicio_calculada for v in _referencia(db, empleado["id"], desde, cantidad)]
+        assert proximas_fechas_dia_economico(db, empleado["id"], desde, cantidad) == esperadas
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("desde, estados, cantidad", [
+    # Diciembre sin fechas validas: la busqueda sigue en el anio siguiente
+    (date(2026, 12, 1), {}, 6),
+    # Anio agotado: todas las fechas salen del contador del anio siguiente
+    (date(2026, 3, 2), {2026: (3, date(2026, 2, 10)), 2027: (1, date(2027, 1, 20))}, 4),
+    # Ultima solicitud en sabado y en festivo (no laborales)
+    (date(2026, 3, 1), {2026: (1, date(2026, 3, 14))}, 5),
+    (date(2026, 3, 1), {2026: (2, date(2026, 3, 16))}, 5),
+    # Ultima solicitud en vacaciones de fin de anio, la separacion cruza al anio siguiente
+    (date(2026, 12, 1), {2026: (1, date(2026, 12, 24)), 2027: (1, date(2027, 1, 2))}, 5),
+])
+def test_fechas_disponibles_ruta(empleado, desde, estados, cantidad):
+    _fijar_contadores(empleado["id"], estados)
+    db = SessionLocal()
+    try:
+        esperadas = [
+            {"fecha_inicio": v.fecha_inicio_calculada.isoformat(), "fecha_fin": v.fecha_fin_calculada.isoformat()}
+            for v in _referencia(db, empleado["id"], desde, cantidad)
+        ]
+    finally:
+        db.close()
+    assert esperadas
+
+    with TestClient(app) as cliente:
+        respuesta = cliente.get(
+            "/api/justificantes/dias-economicos/fechas-disponibles",
+            params={"desde": desde.isoformat(), "cantidad": cantidad},
+            headers=empleado["headers"],
+        )
+    assert respuesta.status_code == 200, respuesta.text
+    assert respuesta.json() == {"empleado_id": empleado["id"], "fechas": esperadas}
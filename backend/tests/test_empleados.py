@@ -0,0 +1,26 @@
+"""Antiguedad minima: propiedad del empleado y fecha de corte del filtro SQL."""
+from datetime import date, timedelta
+
+from app.models.empleado import MESES_ANTIGUEDAD_MINIMA, fecha_corte_antiguedad, meses_de_antiguedad
+
+
+def test_fecha_corte_en_fin_de_mes():
+    # Agosto 31 a febrero 28/29: el mes aun no se completa
+    for hoy in (date(2027, 2, 28), date(2028, 2, 29)):
+        ingreso = hoy.replace(year=hoy.year - 1, month=8, day=31)
+        assert meses_de_antiguedad(ingreso, hoy) == MESES_ANTIGUEDAD_MINIMA - 1
+        assert ingreso > fecha_corte_antiguedad(hoy)
+    assert fecha_corte_antiguedad(date(2027, 2, 28)) == date(2026, 8, 28)
+    assert fecha_corte_antiguedad(date(2028, 2, 29)) == date(2027, 8, 29)
+    assert fecha_corte_antiguedad(date(2027, 3, 31)) == date(2026, 9, 30)
+
+
+def test_fecha_corte_coincide_con_antiguedad_meses():
+    hoy = date(2027, 1, 1)
+    while hoy < date(2029, 1, 1):
+        corte = fecha_corte_antiguedad(hoy)
+        for dias in range(-3, 4):
+            ingreso = corte + timedelta(days=dias)
+            cumple = meses_de_antiguedad(ingreso, hoy) >= MESES_ANTIGUEDAD_MINIMA
+            assert cumple == (ingreso <= corte), (ingreso, hoy)
+        hoy += timedelta(days=1)
@@ -0,0 +1,31 @@
+"""/health publico y detalle solo para admins."""
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import User, UserRole
+from app.utils.security import create_access_token
+
+
+def _headers(username, role):
+    db = SessionLocal()
+    db.add(User(username=username, password_hash="x", role=role))
+    db.commit()
+    db.close()
+    return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+def test_health_publico_sin_detalles():
+    with TestClient(app) as cliente:
+        assert cliente.get("/health").json() == {"status": "healthy"}
+
+
+def test_health_detalle_solo_admins():
+    admin = _headers("admin.health", UserRole.ADMIN)
+    usuario = _headers("usuario.health", UserRole.USUARIO)
+    with TestClient(app) as cliente:
+        assert cliente.get("/health/detalle").status_code == 401
+        assert cliente.get("/health/detalle", headers=usuario).status_code == 403
+        respuesta = cliente.get("/health/detalle", headers=admin)
+    assert respuesta.status_code == 200
+    assert {"base_de_datos", "cache_validaciones", "cache_principales"} <= set(respuesta.json())
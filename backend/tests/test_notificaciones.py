@@ -0,0 +1,460 @@
+"""Notificaciones: avisos a todos los admins y stream SSE."""
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func
+
+from app.config import settings
+from app.database import ES_POSTGRES, AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.main import app
+from app.models import (
+    ContadorNotificaciones,
+    Empleado,
+    EventoNotificacion,
+    Notificacion,
+    TipoEmpleado,
+    User,
+    UserRole,
+)
+from app.routes.notificaciones import _eventos
+from app.services.notificacion_service import (
+    _crear_contador,
+    crear_notificacion,
+    crear_notificaciones_masivas,
+    marcar_leida,
+    marcar_todas_leidas,
+)
+from app.services.notificaciones_canal import BackendSondeo, CanalNotificaciones, canal_notificaciones
+from app.utils.dependencies import get_stream_ticket
+from app.utils.security import create_access_token
+
+
+@pytest.fixture(scope="module")
+def datos():
+    db = SessionLocal()
+    empleado = Empleado(
+        nombre_completo="Empleado Avisos", claves_presupuestales="X", horario="8-15",
+        adscripcion="A", numero_asistencia="902", tipo=TipoEmpleado.DOCENTE,
+        fecha_ingreso=date(2015, 1, 1),
+    )
+    db.add(empleado)
+    db.flush()
+    admins = [User(username=f"admin.avisos{i}", password_hash="x", role=UserRole.ADMIN) for i in range(3)]
+    usuario = User(username="empleado.avisos", password_hash="x", role=UserRole.USUARIO, empleado_id=empleado.id)
+    lector = User(username="lector.avisos", password_hash="x", role=UserRole.USUARIO)
+    db.add_all([*admins, usuario, lector])
+    db.flush()
+    # Notificaciones anteriores a contadores_notificaciones (sin contador)
+    db.add_all([
+        Notificacion(usuario_id=lector.id, tipo="aviso", mensaje=f"Anterior {i}", leida=i < 2)
+        for i in range(5)
+    ])
+    db.commit()
+    resultado = {
+        "admin_ids": [a.id for a in admins],
+        "admin": create_access_token({"sub": admins[0].username}),
+        "usuario": {"Authorization": f"Bearer {create_access_token({'sub': usuario.username})}"},
+        "lector_id": lector.id,
+        "lector": {"Authorization": f"Bearer {create_access_token({'sub': lector.username})}"},
+    }
+    db.close()
+    return resultado
+
+
+@contextmanager
+def capturar_sentencias():
+    sentencias = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement.lstrip().split(None, 3)[:3])
+
+    def confirmar(conn):
+        sentencias.append(["COMMIT"])
+
+    # Las rutas asincronas ejecutan sus consultas en el motor asincrono
+    motores = (engine, async_engine.sync_engine)
+    for motor in motores:
+        event.listen(motor, "before_cursor_execute", registrar)
+        event.listen(motor, "commit", confirmar)
+    try:
+        yield sentencias
+    finally:
+        for motor in motores:
+            event.remove(motor, "before_cursor_execute", registrar)
+            event.remove(motor, "commit", confirmar)
+
+
+def _solicitar(cliente, datos, tipo):
+    respuesta = cliente.post("/api/documentos/solicitar-a-rh", headers=datos["usuario"], json={"tipo": tipo})
+    assert respuesta.status_code == 200
+    return respuesta.json()["id"]
+
+
+def _destinatarios(documento_id):
+    db = SessionLocal()
+    try:
+        return [
+            n.usuario_id for n in db.query(Notificacion)
+            .filter(Notificacion.enlace == f"/rh/documentos/{documento_id}")
+        ]
+    finally:
+        db.close()
+
+
+def test_un_insert_y_un_commit_para_todos_los_admins(datos):
+    with TestClient(app) as cliente:
+        _solicitar(cliente, datos, "Constancia previa")
+        with capturar_sentencias() as sentencias:
+            documento_id = _solicitar(cliente, datos, "Constancia laboral")
+
+    destinatarios = _destinatarios(documento_id)
+    assert set(datos["admin_ids"]) <= set(destinatarios)
+    assert len(destinatarios) == len(set(destinatarios))
+    # En las pruebas la auditoria se escribe despues, en su propia transaccion
+    solicitud = sentencias[:sentencias.index(["INSERT", "INTO", "audit_log"])]
+    assert solicitud.count(["INSERT", "INTO", "notificaciones"]) == 1
+    assert solicitud.count(["COMMIT"]) == 1
+    # Los admins (y el usuario autenticado) salen de la cache
+    assert not any(s[0] == "SELECT" and s[1].startswith("users.") for s in sentencias)
+
+
+def test_admin_nuevo_recibe_notificaciones(datos):
+    with TestClient(app) as cliente:
+        _solicitar(cliente, datos, "Constancia de prueba")
+        db = SessionLocal()
+        nuevo = User(username="admin.avisos.nuevo", password_hash="x", role=UserRole.ADMIN)
+        db.add(nuevo)
+        db.commit()
+        nuevo_id = nuevo.id
+        db.close()
+        documento_id = _solicitar(cliente, datos, "Constancia de servicios")
+
+    assert nuevo_id in _destinatarios(documento_id)
+
+
+def _en_bd(funcion, *args):
+    db = SessionLocal()
+    try:
+        return funcion(db, *args)
+    finally:
+        db.close()
+
+
+def _datos(evento: str) -> dict:
+    campos = dict(linea.split(": ", 1) for linea in evento.strip().split("\n"))
+    assert campos["event"] == "notificaciones"
+    return json.loads(campos["data"])
+
+
+def test_stream_envia_solo_los_cambios(datos):
+    admin_id = datos["admin_ids"][0]
+
+    async def escenario():
+        eventos = _eventos(admin_id, 0, time.time() + 600)
+        try:
+            inicial = _datos(await eventos.__anext__())
+            nueva = await asyncio.to_thread(_en_bd, crear_notificacion, admin_id, "aviso", "Por stream")
+            delta = _datos(await asyncio.wait_for(eventos.__anext__(), 5))
+            await asyncio.to_thread(_en_bd, marcar_todas_leidas, admin_id)
+            leidas = _datos(await asyncio.wait_for(eventos.__anext__(), 5))
+            return inicial, nueva.id, delta, leidas
+        finally:
+            await eventos.aclose()
+            await async_engine.dispose()
+
+    inicial, nueva_id, delta, leidas = asyncio.run(escenario())
+    assert inicial["inicial"] and inicial["total"] == len(inicial["nuevas"])
+    assert not delta["inicial"]
+    assert [n["id"] for n in delta["nuevas"]] == [nueva_id]
+    assert delta["no_leidas"] == inicial["no_leidas"] + 1
+    assert leidas["nuevas"] == [] and leidas["no_leidas"] == 0
+    assert canal_notificaciones.estadisticas()["conexiones"] == 0
+
+
+def test_stream_envia_notificaciones_confirmadas_fuera_de_orden(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICACIONES_STREAM_INICIAL", 2)
+    db = SessionLocal()
+    usuario = User(username="desorden.avisos", password_hash="x", role=UserRole.USUARIO)
+    db.add(usuario)
+    db.commit()
+    usuario_id = usuario.id
+    db.close()
+    for i in range(3):
+        _en_bd(crear_notificacion, usuario_id, "aviso", f"Anterior {i}")
+    ultimo = _en_bd(lambda db: db.query(func.max(Notificacion.id)).scalar())
+
+    def notificacion_con_id(db, notificacion_id):
+        db.add(Notificacion(id=notificacion_id, usuario_id=usuario_id, tipo="aviso", mensaje="Fuera de orden"))
+        db.commit()
+
+    async def escenario():
+        eventos = _eventos(usuario_id, 0, time.time() + 600)
+        try:
+            inicial = _datos(await eventos.__anext__())
+            await asyncio.to_thread(_en_bd, notificacion_con_id, ultimo + 2)
+            mayor = _datos(await asyncio.wait_for(eventos.__anext__(), 5))
+            # La transaccion con el id menor se confirma despues
+            await asyncio.to_thread(_en_bd, notificacion_con_id, ultimo + 1)
+            menor = _datos(await asyncio.wait_for(eventos.__anext__(), 5))
+            return inicial, mayor, menor
+        finally:
+            await eventos.aclose()
+            await async_engine.dispose()
+
+    try:
+        inicial, mayor, menor = asyncio.run(escenario())
+    finally:
+        # Ids explicitos: no dejarlos donde la secuencia de PostgreSQL los va a generar
+        _en_bd(lambda db: (db.query(Notificacion).filter(Notificacion.id > ultimo).delete(), db.commit()))
+
+    # Al conectar solo las mas recientes, con los conteos completos
+    assert [n["mensaje"] for n in inicial["nuevas"]] == ["Anterior 2", "Anterior 1"]
+    assert inicial["total"] == 3
+    assert [n["id"] for n in mayor["nuevas"]] == [ultimo + 2]
+    assert [n["id"] for n in menor["nuevas"]] == [ultimo + 1]
+
+
+def test_sondeo_avisa_cambios_de_otro_worker(datos):
+    admin_id = datos["admin_ids"][1]
+    canal = CanalNotificaciones()
+
+    def evento_de_otro_worker(db):
+        db.add(EventoNotificacion(usuario_id=admin_id, origen="otro-worker"))
+        db.commit()
+
+    async def escenario():
+        backend = BackendSondeo(canal, intervalo_ms=20)
+        await backend.iniciar()
+        cola = canal.suscribir(admin_id)
+        try:
+            await asyncio.to_thread(_en_bd, evento_de_otro_worker)
+            await asyncio.wait_for(cola.get(), 5)
+        finally:
+            canal.desuscribir(admin_id, cola)
+            await backend.detener()
+            await async_engine.dispose()
+
+    asyncio.run(escenario())
+    assert canal.estadisticas()["avisos"] == 1
+
+
+def test_sondeo_no_pierde_eventos_confirmados_fuera_de_orden(datos):
+    """El id menor se confirma despues (como dos transacciones en PostgreSQL)."""
+    primero, segundo = datos["admin_ids"][1:3]
+    canal = CanalNotificaciones()
+    ultimo = _en_bd(lambda db: db.query(func.max(EventoNotificacion.id)).scalar() or 0)
+
+    def evento_con_id(db, id_, usuario_id):
+        db.add(EventoNotificacion(id=id_, usuario_id=usuario_id, origen="otro-worker"))
+        db.commit()
+
+    async def escenario():
+        backend = BackendSondeo(canal, intervalo_ms=20)
+        await backend.iniciar()
+        colas = {u: canal.suscribir(u) for u in (primero, segundo)}
+        try:
+            await asyncio.to_thread(_en_bd, evento_con_id, ultimo + 2, primero)
+            await asyncio.wait_for(colas[primero].get(), 5)
+            await asyncio.sleep(0.1)  # Ya se consulto despues del id ultimo + 2
+            await asyncio.to_thread(_en_bd, evento_con_id, ultimo + 1, segundo)
+            await asyncio.wait_for(colas[segundo].get(), 5)
+        finally:
+            for usuario_id, cola in colas.items():
+                canal.desuscribir(usuario_id, cola)
+            await backend.detener()
+            await async_engine.dispose()
+
+    try:
+        asyncio.run(escenario())
+    finally:
+        # Ids explicitos: no dejarlos donde la secuencia de PostgreSQL los va a generar
+        _en_bd(lambda db: (db.query(EventoNotificacion).filter(EventoNotificacion.id > ultimo).delete(), db.commit()))
+
+
+def test_stream_se_cierra_al_desactivar_usuario(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICACIONES_KEEPALIVE_S", 0.05)
+    db = SessionLocal()
+    usuario = User(username="desactivado.avisos", password_hash="x", role=UserRole.USUARIO)
+    db.add(usuario)
+    db.commit()
+    usuario_id = usuario.id
+    db.close()
+
+    def desactivar(db):
+        db.get(User, usuario_id).active = False
+        db.commit()
+
+    async def escenario():
+        eventos = _eventos(usuario_id, 0, time.time() + 600)
+        try:
+            assert _datos(await eventos.__anext__())["inicial"]
+            assert await asyncio.wait_for(eventos.__anext__(), 5) == ": keepalive\n\n"
+            await asyncio.to_thread(_en_bd, desactivar)
+            with pytest.raises(StopAsyncIteration):
+                for _ in range(20):
+                    assert await asyncio.wait_for(eventos.__anext__(), 5) == ": keepalive\n\n"
+        finally:
+            await eventos.aclose()
+            await async_engine.dispose()
+
+    asyncio.run(escenario())
+    assert canal_notificaciones.estadisticas()["conexiones"] == 0
+
+
+def test_ticket_de_stream_de_un_solo_uso(datos):
+    async def consumir(ticket):
+        try:
+            async with AsyncSessionLocal() as db:
+                return await get_stream_ticket(ticket, db)
+        except HTTPException as e:
+            return e.status_code
+        finally:
+            await async_engine.dispose()
+
+    with TestClient(app) as cliente:
+        respuesta = cliente.post("/api/notificaciones/stream/ticket", headers=datos["lector"])
+    assert respuesta.status_code == 200
+    ticket = respuesta.json()["ticket"]
+
+    assert asyncio.run(consumir(ticket))["usuario_id"] == datos["lector_id"]
+    assert asyncio.run(consumir(ticket)) == 401
+
+    token = datos["lector"]["Authorization"].split()[1]
+    with TestClient(app) as cliente:
+        assert cliente.get("/api/notificaciones/stream", params={"ticket": ticket}).status_code == 401
+        # El token de acceso no sirve como ticket, ni el ticket como token de acceso
+        assert cliente.get("/api/notificaciones/stream", params={"ticket": token}).status_code == 401
+        assert cliente.get("/api/notificaciones/stream", params={"token": token}).status_code == 422
+        otro = cliente.post("/api/notificaciones/stream/ticket", headers=datos["lector"]).json()["ticket"]
+        assert cliente.get(
+            "/api/notificaciones/conteo", headers={"Authorization": f"Bearer {otro}"}
+        ).status_code == 401
+
+
+def _conteo_real(usuario_id):
+    db = SessionLocal()
+    try:
+        consulta = db.query(Notificacion).filter(Notificacion.usuario_id == usuario_id)
+        return {"total": consulta.count(), "no_leidas": consulta.filter(Notificacion.leida == False).count()}
+    finally:
+        db.close()
+
+
+def test_conteo_se_mantiene_sin_contar_notificaciones(datos):
+    lector_id = datos["lector_id"]
+    with TestClient(app) as cliente:
+        def conteo():
+            return cliente.get("/api/notificaciones/conteo", headers=datos["lector"]).json()
+
+        # Primera consulta: se calcula desde notificaciones, sin escribir el contador
+        with capturar_sentencias() as sentencias:
+            assert conteo() == {"total": 5, "no_leidas": 3}
+        assert not [s for s in sentencias if s[0] in ("INSERT", "COMMIT")]
+        assert _en_bd(lambda db: db.get(ContadorNotificaciones, lector_id)) is None
+
+        nueva = _en_bd(crear_notificacion, lector_id, "aviso", "Nueva")
+        _en_bd(lambda db: (crear_notificaciones_masivas(db, [lector_id, lector_id], "aviso", "Masiva"), db.commit()))
+        assert conteo() == _conteo_real(lector_id) == {"total": 7, "no_leidas": 5}
+
+        assert _en_bd(marcar_leida, nueva.id, lector_id)
+        assert _en_bd(marcar_leida, nueva.id, lector_id)  # ya leida: no descuenta otra vez
+        assert not _en_bd(marcar_leida, nueva.id, datos["admin_ids"][0])
+        assert conteo() == _conteo_real(lector_id) == {"total": 7, "no_leidas": 4}
+
+        assert cliente.put("/api/notificaciones/leer-todas", headers=datos["lector"]).status_code == 200
+        with capturar_sentencias() as sentencias:
+            final = conteo()
+        assert final == _conteo_real(lector_id) == {"total": 7, "no_leidas": 0}
+
+    # Ya con contador: una lectura por llave primaria, sin tocar notificaciones
+    consultas = [s for s in sentencias if s[0] == "SELECT"]
+    assert len(consultas) == 1 and "contadores_notificaciones.usuario_id" in consultas[0][1]
+
+
+def test_contador_nuevo_se_revierte_con_la_sesion(datos):
+    db = SessionLocal()
+    usuario = User(username="revertido.avisos", password_hash="x", role=UserRole.USUARIO)
+    db.add(usuario)
+    db.commit()
+    usuario_id = usuario.id
+    try:
+        # Sin otra escritura antes: el SAVEPOINT no debe abrir (y confirmar) su propia transaccion
+        assert _crear_contador(db, usuario_id) is not None
+        db.rollback()
+    finally:
+        db.close()
+    assert _en_bd(lambda db: db.get(ContadorNotificaciones, usuario_id)) is None
+
+
+def test_contador_nuevo_con_escrituras_simultaneas(datos):
+    """Varias sesiones crean el contador del mismo usuario y lo actualizan a la vez."""
+    db = SessionLocal()
+    usuario = User(username="concurrente.avisos", password_hash="x", role=UserRole.USUARIO)
+    db.add(usuario)
+    db.commit()
+    usuario_id = usuario.id
+    db.close()
+
+    hilos, por_hilo = 6, 4
+    barrera = threading.Barrier(hilos)
+    errores = []
+
+    def trabajar(indice):
+        db = SessionLocal()
+        try:
+            barrera.wait()
+            for _ in range(por_hilo):
+                notificacion = crear_notificacion(db, usuario_id, "aviso", f"Hilo {indice}")
+                if indice % 2:
+                    marcar_leida(db, notificacion.id, usuario_id)
+        except Exception as e:  # pragma: no cover - se reporta abajo
+            errores.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=trabajar, args=(i,)) for i in range(hilos)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errores
+    contador = _en_bd(lambda db: db.get(ContadorNotificaciones, usuario_id))
+    assert {"total": contador.total, "no_leidas": contador.no_leidas} == _conteo_real(usuario_id)
+    assert contador.total == hilos * por_hilo
+
+
+@pytest.mark.skipif(not ES_POSTGRES, reason="en SQLite el UPDATE ya toma el candado de escritura")
+def test_contador_creado_por_otra_transaccion_durante_la_suma(datos):
+    """Otra transaccion crea el contador justo despues del UPDATE (que no encontro fila)."""
+    db = SessionLocal()
+    usuario = User(username="carrera.avisos", password_hash="x", role=UserRole.USUARIO)
+    db.add(usuario)
+    db.commit()
+    usuario_id = usuario.id
+    db.add(Notificacion(usuario_id=usuario_id, tipo="aviso", mensaje="Previa"))
+    db.commit()
+    db.close()
+
+    def crear_en_otra_transaccion(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE contadores_notificaciones") and not creado:
+            creado.append(True)
+            _en_bd(lambda otra: (otra.add(ContadorNotificaciones(usuario_id=usuario_id, total=1, no_leidas=1)), otra.commit()))
+
+    creado = []
+    event.listen(engine, "after_cursor_execute", crear_en_otra_transaccion)
+    try:
+        _en_bd(crear_notificacion, usuario_id, "aviso", "Durante la carrera")
+    finally:
+        event.remove(engine, "after_cursor_execute", crear_en_otra_transaccion)
+
+    assert creado
+    contador = _en_bd(lambda db: db.get(ContadorNotificaciones, usuario_id))
+    assert {"total": contador.total, "no_leidas": contador.no_leidas} == _conteo_real(usuario_id)
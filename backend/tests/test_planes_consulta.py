@@ -0,0 +1,168 @@
+"""Verifica con EXPLAIN QUERY PLAN que las rutas frecuentes usan indices.
+
+Se ejecuta cada ruta, se capturan sus SELECT/UPDATE/DELETE y se falla si SQLite recorre
+completa alguna de las tablas que crecen con el uso.
+"""
+import re
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import ES_SQLITE, SessionLocal, async_engine, engine
+from app.main import app
+from app.models import (
+    Adeudo,
+    Documento,
+    Empleado,
+    Notificacion,
+    OrigenSolicitud,
+    Prestacion,
+    TipoEmpleado,
+    TipoPrestacion,
+    User,
+    UserRole,
+)
+from app.utils.security import create_access_token
+
+pytestmark = pytest.mark.skipif(not ES_SQLITE, reason="usa EXPLAIN QUERY PLAN de SQLite")
+
+TABLAS_GRANDES = {
+    "justificantes", "prestaciones", "notificaciones", "contadores",
+    "contadores_quincena", "adeudos", "documentos", "users", "audit_log",
+}
+
+RUTAS_EMPLEADO = [
+    ("GET", "/api/auth/me", None),
+    ("GET", "/api/justificantes/", None),
+    ("POST", "/api/justificantes/validar", {"tipo": "Dia Economico", "fecha_inicio": "2026-02-16"}),
+    ("POST", "/api/justificantes/validar", {"tipo": "Permiso por Horas", "fecha_inicio": "2026-03-03"}),
+    ("POST", "/api/justificantes/", {
+        "tipo": "Permiso por Horas", "fecha_inicio": "2026-03-04",
+        "hora_inicio": "09:00:00", "hora_fin": "10:00:00",
+    }),
+    ("GET", "/api/justificantes/dias-economicos/fechas-disponibles?desde=2026-02-01", None),
+    ("GET", "/api/prestaciones/", None),
+    ("POST", "/api/prestaciones/validar", {
+        "tipo": "Cuidados Medicos Familiares", "fecha_inicio": "2026-05-04", "fecha_fin": "2026-05-06",
+    }),
+    ("GET", "/api/notificaciones/", None),
+    ("GET", "/api/notificaciones/conteo", None),
+    ("PUT", "/api/notificaciones/leer-todas", None),
+    ("GET", "/api/adeudos/", None),
+    ("GET", "/api/documentos/", None),
+    ("GET", "/api/empleados/{empleado_id}/contadores?anio=2026", None),
+]
+
+RUTAS_ADMIN = [
+    ("GET", "/api/justificantes/?empleado_id={empleado_id}", None),
+    ("GET", "/api/prestaciones/?empleado_id={empleado_id}", None),
+    ("GET", "/api/adeudos/?empleado_id={empleado_id}", None),
+    ("GET", "/api/documentos/?empleado_id={empleado_id}", None),
+    ("POST", "/api/justificantes/validar-lote", {"items": [
+        {"empleado_id": "{empleado_id}", "fecha": "2026-02-16", "tipo": "Dia Economico"},
+        {"empleado_id": "{empleado_id}", "fecha": "2026-03-03", "tipo": "Permiso por Horas"},
+    ]}),
+]
+
+
+@pytest.fixture(scope="module")
+def datos():
+    db = SessionLocal()
+    empleado = Empleado(
+        nombre_completo="Empleado Planes", claves_presupuestales="X", horario="8-15",
+        adscripcion="A", numero_asistencia="900", tipo=TipoEmpleado.DOCENTE,
+        fecha_ingreso=date(2015, 1, 1),
+    )
+    db.add(empleado)
+    db.flush()
+    admin = User(username="admin.planes", password_hash="x", role=UserRole.ADMIN)
+    usuario = User(username="empleado.planes", password_hash="x", role=UserRole.USUARIO, empleado_id=empleado.id)
+    db.add_all([admin, usuario])
+    db.flush()
+    db.add_all([
+        Notificacion(usuario_id=usuario.id, tipo="aviso", mensaje="Hola"),
+        Adeudo(empleado_id=empleado.id, tipo="Dias pendientes", descripcion="x", marcado_por_user_id=admin.id),
+        Documento(empleado_id=empleado.id, tipo="CURP", origen=OrigenSolicitud.RH, solicitado_por_user_id=admin.id),
+        Prestacion(
+            empleado_id=empleado.id, tipo=TipoPrestacion.LICENCIA_NUPCIAS, fecha_inicio=date(2026, 6, 1),
+            fecha_fin=date(2026, 6, 5), created_by_user_id=usuario.id,
+        ),
+    ])
+    db.commit()
+    resultado = {
+        "empleado_id": empleado.id,
+        "admin": {"Authorization": f"Bearer {create_access_token({'sub': admin.username})}"},
+        "usuario": {"Authorization": f"Bearer {create_access_token({'sub': usuario.username})}"},
+    }
+    db.close()
+    return resultado
+
+
+@contextmanager
+def capturar_consultas():
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            consultas.append((statement, parameters))
+
+    # Las rutas asincronas ejecutan sus consultas en el motor de aiosqlite
+    motores = (engine, async_engine.sync_engine)
+    for motor in motores:
+        event.listen(motor, "before_cursor_execute", registrar)
+    try:
+        yield consultas
+    finally:
+        for motor in motores:
+            event.remove(motor, "before_cursor_execute", registrar)
+
+
+def recorridos_completos(consultas) -> list:
+    """Lineas del plan con SCAN sobre una tabla grande (sin busqueda por indice)."""
+    problemas = []
+    with engine.connect() as conn:
+        for statement, parameters in consultas:
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            for fila in plan:
+                detalle = fila[-1]
+                m = re.match(r"SCAN (\w+)", detalle)
+                if m and m.group(1) in TABLAS_GRANDES:
+                    problemas.append(f"{detalle}\n    {' '.join(statement.split())}")
+    return problemas
+
+
+def _rellenar(valor, empleado_id):
+    if isinstance(valor, str):
+        valor = valor.replace("{empleado_id}", str(empleado_id))
+        return int(valor) if valor.isdigit() else valor
+    if isinstance(valor, dict):
+        return {k: _rellenar(v, empleado_id) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_rellenar(v, empleado_id) for v in valor]
+    return valor
+
+
+def _ejecutar(datos, rol, metodo, ruta, cuerpo):
+    ruta = _rellenar(ruta, datos["empleado_id"])
+    with TestClient(app) as cliente, capturar_consultas() as consultas:
+        respuesta = cliente.request(
+            metodo, ruta, json=_rellenar(cuerpo, datos["empleado_id"]), headers=datos[rol]
+        )
+    assert respuesta.status_code < 500, respuesta.text
+    assert consultas, f"{ruta} no ejecuto consultas"
+    return recorridos_completos(consultas)
+
+
+@pytest.mark.parametrize("metodo,ruta,cuerpo", RUTAS_EMPLEADO)
+def test_rutas_empleado_usan_indices(datos, metodo, ruta, cuerpo):
+    problemas = _ejecutar(datos, "usuario", metodo, ruta, cuerpo)
+    assert not problemas, "Recorridos completos:\n" + "\n".join(problemas)
+
+
+@pytest.mark.parametrize("metodo,ruta,cuerpo", RUTAS_ADMIN)
+def test_rutas_admin_filtradas_usan_indices(datos, metodo, ruta, cuerpo):
+    problemas = _ejecutar(datos, "admin", metodo, ruta, cuerpo)
+    assert not problemas, "Recorridos completos:\n" + "\n".join(problemas)
@@ -0,0 +1,144 @@
+"""Traslapes de prestaciones y cache de /validar con varios workers."""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Empleado, EstadoPrestacion, Prestacion, TipoEmpleado, TipoPrestacion, User, UserRole
+from app.services.traslapes_service import IndicePrestaciones, indice_prestaciones
+from app.services.archivo_version import VersionesPorClave
+from app.services.validaciones_cache import CacheValidaciones
+from app.utils.security import create_access_token
+from app.validators.prestacion_validator import MENSAJE_TRASLAPE
+
+
+@pytest.fixture(scope="module")
+def empleado():
+    db = SessionLocal()
+    empleado = Empleado(
+        nombre_completo="Empleado Prestaciones", claves_presupuestales="X", horario="8-15",
+        adscripcion="A", numero_asistencia="904", tipo=TipoEmpleado.DOCENTE,
+        fecha_ingreso=date(2015, 1, 1),
+    )
+    db.add(empleado)
+    db.flush()
+    usuario = User(username="empleado.prestaciones", password_hash="x", role=UserRole.USUARIO, empleado_id=empleado.id)
+    db.add(usuario)
+    db.commit()
+    resultado = {
+        "id": empleado.id,
+        "usuario_id": usuario.id,
+        "headers": {"Authorization": f"Bearer {create_access_token({'sub': usuario.username})}"},
+    }
+    db.close()
+    return resultado
+
+
+def _prestacion_de_otro_worker(db, empleado, inicio, fin):
+    prestacion = Prestacion(
+        empleado_id=empleado["id"], tipo=TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES,
+        fecha_inicio=inicio, fecha_fin=fin, estado=EstadoPrestacion.PENDIENTE,
+        created_by_user_id=empleado["usuario_id"],
+    )
+    db.add(prestacion)
+    db.commit()
+    return prestacion
+
+
+def _contar_cargas(indice, cargas):
+    cargar = indice._cargar
+
+    def contar(db, empleado_id=None):
+        cargas.append((indice, empleado_id))
+        return cargar(db, empleado_id)
+
+    indice._cargar = contar
+
+
+def test_indice_ve_prestaciones_de_otro_worker(empleado, tmp_path):
+    directorio = str(tmp_path / "versiones_empleados")
+    escritor = IndicePrestaciones(VersionesPorClave(directorio))
+    lector = IndicePrestaciones(VersionesPorClave(directorio))
+    tipo = TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES
+    inicio, fin = date(2027, 3, 1), date(2027, 3, 3)
+    cargas = []
+    for indice in (escritor, lector):
+        _contar_cargas(indice, cargas)
+
+    db = SessionLocal()
+    try:
+        # Los dos indices ya cargaron al empleado (y todos los empleados)
+        assert not escritor.hay_traslape(db, empleado["id"], tipo, inicio, fin)
+        assert escritor.traslapes(db, inicio, fin, tipo) == []
+        assert not lector.hay_traslape(db, empleado["id"], tipo, inicio, fin)
+        assert lector.traslapes(db, inicio, fin, tipo) == []
+        cargas.clear()
+
+        prestacion = _prestacion_de_otro_worker(db, empleado, date(2027, 3, 2), date(2027, 3, 5))
+        # Lo que hacen el listener after_commit y la ruta del worker que escribio
+        escritor.versiones.publicar([empleado["id"]])
+        escritor.registrar(prestacion)
+
+        assert escritor.hay_traslape(db, empleado["id"], tipo, inicio, fin)
+        assert escritor.traslapes(db, inicio, fin, tipo) == [prestacion.id]
+        assert lector.hay_traslape(db, empleado["id"], tipo, inicio, fin)
+        assert lector.traslapes(db, inicio, fin, tipo) == [prestacion.id]
+    finally:
+        db.close()
+    # El escritor no recarga nada; el lector solo al empleado que cambio
+    assert cargas == [(lector, empleado["id"])]
+
+
+def test_crear_revisa_traslapes_en_la_bd(empleado):
+    """El indice de este worker no tiene la prestacion, pero la BD si."""
+    tipo = TipoPrestacion.CUIDADOS_MEDICOS_FAMILIARES
+    db = SessionLocal()
+    try:
+        assert not indice_prestaciones.hay_traslape(db, empleado["id"], tipo, date(2027, 5, 3), date(2027, 5, 5))
+        _prestacion_de_otro_worker(db, empleado, date(2027, 5, 4), date(2027, 5, 4))
+    finally:
+        db.close()
+
+    with TestClient(app) as cliente:
+        respuesta = cliente.post("/api/prestaciones/", headers=empleado["headers"], json={
+            "tipo": tipo.value, "fecha_inicio": "2027-05-03", "fecha_fin": "2027-05-05",
+        })
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"] == MENSAJE_TRASLAPE
+
+
+def test_validar_despues_de_crear(empleado):
+    solicitud = {"tipo": "Cuidados Medicos Familiares", "fecha_inicio": "2027-09-06", "fecha_fin": "2027-09-08"}
+    with TestClient(app) as cliente:
+        def validar():
+            return cliente.post("/api/prestaciones/validar", headers=empleado["headers"], json=solicitud).json()
+
+        assert validar()["valido"]
+        assert validar()["valido"]  # desde la cache
+        assert cliente.post("/api/prestaciones/", headers=empleado["headers"], json=solicitud).status_code == 200
+        assert validar()["errores"] == [MENSAJE_TRASLAPE]
+
+
+def test_cache_validaciones_de_otro_worker(tmp_path):
+    directorio = str(tmp_path / "versiones_empleados")
+    escritor = CacheValidaciones(16, VersionesPorClave(directorio))
+    lector = CacheValidaciones(16, VersionesPorClave(directorio))
+    calculos = []
+
+    def obtener(cache, empleado_id):
+        return cache.obtener(empleado_id, ("prueba",), lambda: calculos.append(empleado_id) or len(calculos))
+
+    assert obtener(lector, 1) == obtener(lector, 1) == 1
+    assert obtener(lector, 2) == 2
+    assert obtener(escritor, 1) == 3
+    assert obtener(escritor, 2) == 4
+    # Lo que hace el listener after_commit del worker que escribio
+    escritor.invalidar_empleados([1])
+    assert obtener(lector, 1) == 5
+    assert obtener(escritor, 1) == 6
+    # Solo el empleado 1 se vuelve a calcular, en los dos workers
+    assert obtener(lector, 2) == 2
+    assert obtener(escritor, 2) == 4
+    assert calculos == [1, 2, 1, 2, 1, 1]
@@ -0,0 +1,132 @@
+"""Reglas compiladas de prestaciones contra las ramas por tipo que reemplazaron."""
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import (
+    Contador, Empleado, EstadoPrestacion, Prestacion, TipoEmpleado, TipoPrestacion, User, UserRole,
+)
+from app.models.empleado import TipoNombramiento
+from app.utils.security import create_access_token
+from app.validators.prestacion_validator import obtener_regla, validar_prestacion
+
+from .prestaciones_referencia import campo_contador_aprobacion, validar_prestacion_referencia
+
+COMBINACIONES = [(tipo, tipo_empleado) for tipo in TipoPrestacion for tipo_empleado in TipoEmpleado]
+IDS = [f"{tipo.name}-{tipo_empleado.name}" for tipo, tipo_empleado in COMBINACIONES]
+
+# 1, 5, 6, 7, 12, 14 y 15 dias laborales desde el lunes 12 de febrero, y un rango invertido
+RANGOS = [
+    (date(2029, 2, 12), fin)
+    for fin in [date(2029, 2, 12), date(2029, 2, 16), date(2029, 2, 19), date(2029, 2, 20),
+                date(2029, 2, 27), date(2029, 3, 1), date(2029, 3, 2)]
+] + [(date(2029, 2, 16), date(2029, 2, 12))]
+# (cuidados_maternos_usados, cuidados_medicos_usados); None = sin contador
+CONTADORES = [None, (0, 0), (3, 4), (6, 10)]
+# Prestacion previa de cada tipo que se traslapa con los rangos de 12 dias o mas
+TRASLAPE = date(2029, 2, 27)
+CAMPOS_CONTADOR = ["cuidados_maternos_usados", "cuidados_medicos_usados"]
+
+
+def _empleado(db, nombre, tipo, nombramiento, fecha_ingreso):
+    empleado = Empleado(
+        nombre_completo=nombre, claves_presupuestales="X", horario="8-15", adscripcion="A",
+        numero_asistencia="920", tipo=tipo, nombramiento=nombramiento, fecha_ingreso=fecha_ingreso,
+    )
+    db.add(empleado)
+    db.flush()
+    return empleado.id
+
+
+@pytest.fixture(scope="module")
+def datos():
+    """Por tipo de empleado: uno elegible, uno excluido (interino y sin antiguedad) y uno para aprobar."""
+    db = SessionLocal()
+    admin = User(username="admin.reglas", password_hash="x", role=UserRole.ADMIN)
+    db.add(admin)
+    db.flush()
+    resultado = {"admin": {"Authorization": f"Bearer {create_access_token({'sub': admin.username})}"},
+                 "admin_id": admin.id}
+    for tipo_empleado in TipoEmpleado:
+        elegible = _empleado(db, f"Reglas {tipo_empleado.name}", tipo_empleado, TipoNombramiento.BASE, date(2015, 1, 1))
+        excluido = _empleado(
+            db, f"Reglas Excluido {tipo_empleado.name}", tipo_empleado, TipoNombramiento.INTERINO,
+            date.today() - timedelta(days=60),
+        )
+        aprobacion = _empleado(
+            db, f"Reglas Aprobacion {tipo_empleado.name}", tipo_empleado, TipoNombramiento.BASE, date(2015, 1, 1),
+        )
+        for tipo in TipoPrestacion:
+            db.add(Prestacion(
+                empleado_id=elegible, tipo=tipo, fecha_inicio=TRASLAPE, fecha_fin=TRASLAPE,
+                estado=EstadoPrestacion.PENDIENTE, created_by_user_id=admin.id,
+            ))
+        resultado[tipo_empleado] = {"elegible": elegible, "excluido": excluido, "aprobacion": aprobacion}
+    db.commit()
+    db.close()
+    return resultado
+
+
+def _fijar_contador(db, empleado_id, usados):
+    db.query(Contador).filter(Contador.empleado_id == empleado_id).delete()
+    if usados is not None:
+        db.add(Contador(
+            empleado_id=empleado_id, anio=2029,
+            cuidados_maternos_usados=usados[0], cuidados_medicos_usados=usados[1],
+        ))
+    db.commit()
+
+
+@pytest.mark.parametrize("tipo, tipo_empleado", COMBINACIONES, ids=IDS)
+def test_reglas_compiladas_equivalen_a_ramas_por_tipo(datos, tipo, tipo_empleado):
+    db = SessionLocal()
+    try:
+        for clave in ("elegible", "excluido"):
+            empleado = db.get(Empleado, datos[tipo_empleado][clave])
+            for usados in CONTADORES:
+                _fijar_contador(db, empleado.id, usados)
+                for inicio, fin in RANGOS:
+                    for dias_solicitados in (None, 3):
+                        obtenido = validar_prestacion(db, empleado, tipo, inicio, fin, dias_solicitados)
+                        esperado = validar_prestacion_referencia(db, empleado, tipo, inicio, fin, dias_solicitados)
+                        assert obtenido.model_dump() == esperado, (clave, usados, inicio, fin, dias_solicitados)
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("tipo, tipo_empleado", COMBINACIONES, ids=IDS)
+def test_aprobar_suma_al_campo_de_la_regla(datos, tipo, tipo_empleado):
+    empleado_id = datos[tipo_empleado]["aprobacion"]
+    campo = campo_contador_aprobacion(tipo)
+    assert obtener_regla(tipo, tipo_empleado).contador_anual == campo
+
+    db = SessionLocal()
+    try:
+        _fijar_contador(db, empleado_id, (1, 2))
+        prestacion = Prestacion(
+            empleado_id=empleado_id, tipo=tipo, fecha_inicio=date(2029, 6, 4), fecha_fin=date(2029, 6, 5),
+            dias_solicitados=2, estado=EstadoPrestacion.PENDIENTE, created_by_user_id=datos["admin_id"],
+        )
+        db.add(prestacion)
+        db.commit()
+        prestacion_id = prestacion.id
+    finally:
+        db.close()
+
+    with TestClient(app) as cliente:
+        respuesta = cliente.put(f"/api/prestaciones/{prestacion_id}/aprobar", headers=datos["admin"])
+    assert respuesta.status_code == 200, respuesta.text
+
+    db = SessionLocal()
+    try:
+        contador = db.query(Contador).filter(Contador.empleado_id == empleado_id, Contador.anio == 2029).one()
+        usados = {c: getattr(contador, c) for c in CAMPOS_CONTADOR}
+    finally:
+        db.close()
+    esperados = {"cuidados_maternos_usados": 1, "cuidados_medicos_usados": 2}
+    if campo:
+        esperados[campo] += 2
+    assert usados == esperados
@@ -0,0 +1,33 @@
+"""Reportes y export a Excel."""
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import User, UserRole
+from app.utils.security import create_access_token
+
+
+def test_reportes_corren_en_el_threadpool():
+    """Armar un reporte usa CPU: en una ruta async bloquearia el event loop."""
+    rutas = [r for r in app.routes if getattr(r, "path", "").startswith("/api/reportes/")]
+    assert len(rutas) == 9
+    assert not [r.path for r in rutas if asyncio.iscoroutinefunction(r.endpoint)]
+
+
+def test_exportar_reporte():
+    db = SessionLocal()
+    admin = User(username="admin.reportes", password_hash="x", role=UserRole.ADMIN)
+    db.add(admin)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': admin.username})}"}
+    db.close()
+
+    with TestClient(app) as cliente:
+        respuesta = cliente.get(
+            "/api/reportes/export", headers=headers,
+            params={"reporte": "prestaciones", "fecha_inicio": "2027-01-01", "fecha_fin": "2027-12-31"},
+        )
+    assert respuesta.status_code == 200
+    assert respuesta.content[:2] == b"PK"  # xlsx: archivo zip
@@ -0,0 +1,114 @@
+"""/validar-lote regresa, item por item, lo mismo que /validar."""
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Contador, ContadorQuincena, Empleado, TipoEmpleado, TipoJustificante, User, UserRole
+from app.utils.security import create_access_token
+from app.validators.dia_economico_validator import validar_dia_economico
+from app.validators.permiso_horas_validator import validar_permiso_horas
+
+EMPLEADO_INEXISTENTE = 987654
+
+
+def _token(username):
+    return {"Authorization": f"Bearer {create_access_token({'sub': username})}"}
+
+
+@pytest.fixture(scope="module")
+def datos():
+    """Tres empleados: sin contadores, con el anio agotado y con la 1a quincena de marzo llena."""
+    db = SessionLocal()
+    admin = User(username="admin.lote", password_hash="x", role=UserRole.ADMIN)
+    db.add(admin)
+    empleados = []
+    for i, tipo in enumerate([TipoEmpleado.DOCENTE, TipoEmpleado.APOYO, TipoEmpleado.DOCENTE]):
+        empleado = Empleado(
+            nombre_completo=f"Empleado Lote {i}", claves_presupuestales="X", horario="8-15",
+            adscripcion="A", numero_asistencia=f"91{i}", tipo=tipo, fecha_ingreso=date(2015, 1, 1),
+        )
+        db.add(empleado)
+        db.flush()
+        db.add(User(username=f"empleado.lote{i}", password_hash="x", role=UserRole.USUARIO, empleado_id=empleado.id))
+        empleados.append(empleado.id)
+    db.add(Contador(empleado_id=empleados[1], anio=2026, solicitudes_economicos=3,
+                    fecha_ultima_solicitud_economico=date(2026, 2, 9)))
+    db.add(Contador(empleado_id=empleados[2], anio=2026, solicitudes_economicos=1,
+                    fecha_ultima_solicitud_economico=date(2026, 2, 24)))
+    db.add(ContadorQuincena(empleado_id=empleados[2], anio=2026, mes=3, quincena=1, permisos_horas=2))
+    db.add(ContadorQuincena(empleado_id=empleados[0], anio=2026, mes=3, quincena=2, permisos_horas=1))
+    db.commit()
+    db.close()
+    return {"admin": _token("admin.lote"), "empleados": empleados}
+
+
+FECHAS = [date(2026, 3, 3), date(2026, 3, 11), date(2026, 3, 17), date(2026, 3, 23), date(2026, 5, 13)]
+TIPOS = [TipoJustificante.DIA_ECONOMICO, TipoJustificante.PERMISO_HORAS, TipoJustificante.COMISION_DIA]
+
+
+def _items(empleados):
+    items = [
+        {"empleado_id": empleado_id, "fecha": fecha.isoformat(), "tipo": tipo.value}
+        for empleado_id in [*empleados, EMPLEADO_INEXISTENTE]
+        for fecha in FECHAS
+        for tipo in TIPOS
+    ]
+    # Duplicados, intercalados con el resto del lote
+    return items + items[::7]
+
+
+def test_lote_equivale_a_validar_individual(datos):
+    empleados = datos["empleados"]
+    items = _items(empleados)
+    with TestClient(app) as cliente:
+        respuesta = cliente.post("/api/justificantes/validar-lote", headers=datos["admin"], json={"items": items})
+        assert respuesta.status_code == 200, respuesta.text
+        lote = respuesta.json()
+        assert [(r["empleado_id"], r["fecha"], r["tipo"]) for r in lote] == [
+            (i["empleado_id"], i["fecha"], i["tipo"]) for i in items
+        ]
+
+        individuales = {}
+        for item in items:
+            clave = (item["empleado_id"], item["fecha"], item["tipo"])
+            if item["empleado_id"] == EMPLEADO_INEXISTENTE or clave in individuales:
+                continue
+            usuario = _token(f"empleado.lote{empleados.index(item['empleado_id'])}")
+            individual = cliente.post("/api/justificantes/validar", headers=usuario, json={
+                "tipo": item["tipo"], "fecha_inicio": item["fecha"],
+            })
+            assert individual.status_code == 200, individual.text
+            individuales[clave] = individual.json()
+
+    for resultado in lote:
+        clave = (resultado["empleado_id"], resultado["fecha"], resultado["tipo"])
+        if resultado["empleado_id"] != EMPLEADO_INEXISTENTE:
+            assert resultado["resultado"] == individuales[clave], clave
+    # El lote no es trivial: hay items validos e invalidos por contador
+    assert {r["resultado"]["valido"] for r in lote} == {True, False}
+
+
+def test_lote_empleado_inexistente_como_sin_contadores(datos):
+    items = [
+        {"empleado_id": EMPLEADO_INEXISTENTE, "fecha": fecha.isoformat(), "tipo": tipo.value}
+        for fecha in FECHAS
+        for tipo in TIPOS[:2]
+    ]
+    with TestClient(app) as cliente:
+        respuesta = cliente.post("/api/justificantes/validar-lote", headers=datos["admin"], json={"items": items})
+    assert respuesta.status_code == 200, respuesta.text
+
+    validadores = {
+        TipoJustificante.DIA_ECONOMICO.value: validar_dia_economico,
+        TipoJustificante.PERMISO_HORAS.value: validar_permiso_horas,
+    }
+    db = SessionLocal()
+    try:
+        for resultado in respuesta.json():
+            esperado = validadores[resultado["tipo"]](db, EMPLEADO_INEXISTENTE, date.fromisoformat(resultado["fecha"]))
+            assert resultado["resultado"] == esperado.model_dump(mode="json")
+    finally:
+        db.close()
@@ -1,5 +1,5 @@
 import { createContext, useContext, useState, useEffect, useCallback } from 'react';
-import api from '../services/api';
+import api, { API_URL } from '../services/api';
 import { useAuth } from './AuthContext';
 
 const NotificationContext = createContext();
@@ -29,20 +29,67 @@ export const NotificationProvider = ({ children }) => {
     }
   }, [isAuthenticated]);
 
+  // El servidor envia las notificaciones al conectar y despues solo los cambios (SSE)
   useEffect(() => {
-    fetchNotifications();
-    const interval = setInterval(fetchNotifications, 30000); // Poll cada 30s
-    return () => clearInterval(interval);
-  }, [fetchNotifications]);
+    if (!isAuthenticated) return;
+    let source;
+    let reintento;
+
+    let cancelado = false;
+
+    const conectar = async () => {
+      if (!localStorage.getItem('token')) return;
+      let ticket;
+      try {
+        // Ticket de un solo uso: el token de acceso no va en la URL (ni en los logs)
+        ({ data: { ticket } } = await api.post('/api/notificaciones/stream/ticket'));
+      } catch {
+        reintento = setTimeout(conectar, 30000);
+        return;
+      }
+      if (cancelado) return;
+      source = new EventSource(
+        `${API_URL}/api/notificaciones/stream?ticket=${encodeURIComponent(ticket)}`
+      );
+      source.addEventListener('notificaciones', (event) => {
+        const data = JSON.parse(event.data);
+        setNotifications((prev) => {
+          if (data.inicial) return data.nuevas;
+          // Al reconectar el servidor puede repetir alguna reciente
+          const ids = new Set(data.nuevas.map((n) => n.id));
+          return [...data.nuevas, ...prev.filter((n) => !ids.has(n.id))];
+        });
+        setUnreadCount(data.no_leidas);
+      });
+      source.onerror = () => {
+        // Token vencido, usuario desactivado o servidor caido: consultar por REST
+        // (el interceptor cierra la sesion si el token ya no sirve) y reconectar
+        // en 30s con un ticket nuevo (el anterior ya se uso)
+        source.close();
+        reintento = setTimeout(() => {
+          fetchNotifications();
+          conectar();
+        }, 30000);
+      };
+    };
+
+    conectar();
+    return () => {
+      cancelado = true;
+      source?.close();
+      clearTimeout(reintento);
+    };
+  }, [isAuthenticated, fetchNotifications]);
 
+  // El conteo llega por el stream; la lista se actualiza aqui
   const markAsRead = async (id) => {
     await api.put(`/api/notificaciones/${id}/leer`);
-    fetchNotifications();
+    setNotifications((prev) => prev.map((n) => (n.id === id ? { ...n, leida: true } : n)));
   };
 
   const markAllRead = async () => {
     await api.put('/api/notificaciones/leer-todas');
-    fetchNotifications();
+    setNotifications((prev) => prev.map((n) => ({ ...n, leida: true })));
   };
 
   return (